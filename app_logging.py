@@ -0,0 +1,107 @@
+"""
+Leveled, asynchronous logging for both builds.
+
+Modules log through logging.getLogger(__name__) with the same "[tag]"
+messages they always printed. setup() routes every record through a
+QueueHandler, so the thread doing the work (the typing path included)
+only puts the record on a queue; a QueueListener thread formats it and
+does the console and file writes.
+
+Logging is quiet by default: startup, retries, errors and other
+notable events only. Per-utterance detail (recording, encode sizes,
+transcripts) is logged at DEBUG, and debug mode can be switched on and
+off while running. API keys are redacted before a record leaves the
+calling thread, so they never reach the console or the log file.
+"""
+
+import logging
+import logging.handlers
+import queue
+import re
+import sys
+
+LOG_FORMAT = "%(asctime)s %(levelname)-7s %(message)s"
+MAX_BYTES = 1024 * 1024  # Rotate the log file at 1 MB
+QUIET_LEVEL = logging.INFO
+
+# Third-party loggers that are too chatty even in debug mode
+NOISY_LOGGERS = ("httpx", "httpcore", "hpack", "h2", "PIL", "asyncio")
+
+KEY_PATTERN = re.compile(r"\bgsk_[A-Za-z0-9]{8,}|(?<=Bearer )[A-Za-z0-9._~+/=-]{8,}")
+REDACTED = "[redacted]"
+
+_secrets = set()
+_listener = None
+
+
+def add_secret(secret):
+    """Redact this exact string (an API key, say) from every log record."""
+    if secret and len(secret) >= 8:
+        _secrets.add(secret)
+
+
+def redact(text):
+    for secret in _secrets:
+        if secret in text:
+            text = text.replace(secret, REDACTED)
+    return KEY_PATTERN.sub(REDACTED, text)
+
+
+class RedactingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that formats the message and strips secrets on the calling thread."""
+
+    def prepare(self, record):
+        record = super().prepare(record)
+        record.msg = redact(record.msg)
+        return record
+
+
+def setup(debug=False, log_file=None):
+    """Send log records through a background queue to stderr and log_file."""
+    global _listener
+    if _listener is not None:
+        set_debug(debug)
+        return
+
+    handlers = []
+    formatter = logging.Formatter(LOG_FORMAT, "%H:%M:%S")
+    if sys.stderr:
+        console = logging.StreamHandler(sys.stderr)
+        console.setFormatter(formatter)
+        handlers.append(console)
+    if log_file:
+        try:
+            file_handler = logging.handlers.RotatingFileHandler(
+                log_file, maxBytes=MAX_BYTES, backupCount=1, encoding="utf-8")
+            file_handler.setFormatter(formatter)
+            handlers.append(file_handler)
+        except OSError as e:
+            print(f"[log] Could not open {log_file}: {e}")
+
+    records = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(RedactingQueueHandler(records))
+    for name in NOISY_LOGGERS:
+        logging.getLogger(name).setLevel(logging.WARNING)
+    set_debug(debug)
+
+    _listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+    _listener.start()
+
+
+def set_debug(enabled):
+    logging.getLogger().setLevel(logging.DEBUG if enabled else QUIET_LEVEL)
+
+
+def is_debug():
+    return logging.getLogger().getEffectiveLevel() <= logging.DEBUG
+
+
+def shutdown():
+    """Write out whatever is still queued. Call before os._exit()."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,268 @@
+"""
+In-memory audio encoding for uploads.
+
+Recordings never touch the disk: the capture buffer reserves room for a
+WAV header in front of the PCM data, the header is filled in when the
+utterance ends, and the upload reads straight out of a memoryview.
+
+When the optional soundfile package (libsndfile) is installed, clips can
+also be compressed to FLAC (lossless) or Opus in an OGG container
+(lossy) before upload. CodecPolicy picks whichever codec is expected to
+finish encoding plus uploading first on the measured uplink.
+"""
+
+import io
+import logging
+import struct
+import time
+
+log = logging.getLogger(__name__)
+
+try:
+    import soundfile
+except (ImportError, OSError):  # OSError: package present but libsndfile missing
+    soundfile = None
+
+WAV_HEADER_SIZE = 44
+
+CODEC_WAV = "wav"
+CODEC_FLAC = "flac"
+CODEC_OPUS = "opus"
+
+# codec -> (upload filename, content type)
+CODEC_FILES = {
+    CODEC_WAV: ("audio.wav", "audio/wav"),
+    CODEC_FLAC: ("audio.flac", "audio/flac"),
+    CODEC_OPUS: ("audio.ogg", "audio/ogg"),
+}
+
+# codec -> (soundfile format, subtype)
+_SOUNDFILE_FORMATS = {
+    CODEC_FLAC: ("FLAC", "PCM_16"),
+    CODEC_OPUS: ("OGG", "OPUS"),
+}
+
+
+def wav_header(data_size, rate, channels, sample_width):
+    """Build a canonical 44-byte PCM WAV header for data_size bytes of audio."""
+    byte_rate = rate * channels * sample_width
+    block_align = channels * sample_width
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + data_size, b"WAVE",
+        b"fmt ", 16, 1, channels, rate, byte_rate, block_align, sample_width * 8,
+        b"data", data_size,
+    )
+
+
+def encode_wav(pcm, rate, channels, sample_width):
+    """Wrap raw PCM in a WAV container (copies once; prefer PcmBuffer for live capture)."""
+    buffer = bytearray(WAV_HEADER_SIZE + len(pcm))
+    buffer[WAV_HEADER_SIZE:] = pcm
+    buffer[:WAV_HEADER_SIZE] = wav_header(len(pcm), rate, channels, sample_width)
+    return memoryview(buffer)
+
+
+class PcmBuffer:
+    """Growable PCM buffer with space for a WAV header kept in front.
+
+    Do not hold on to views from pcm()/wav() while still appending: a
+    bytearray with exported views cannot grow.
+    """
+
+    def __init__(self, rate, channels, sample_width):
+        self.rate = rate
+        self.channels = channels
+        self.sample_width = sample_width
+        self._data = bytearray(WAV_HEADER_SIZE)
+        # PCM lives in _data[_start:_end]; _end None means "to the end"
+        self._start = WAV_HEADER_SIZE
+        self._end = None
+
+    def __len__(self):
+        end = len(self._data) if self._end is None else self._end
+        return end - self._start
+
+    def append(self, chunk):
+        if self._end is not None:
+            raise ValueError("cannot append to a trimmed buffer")
+        self._data += chunk
+
+    def trim(self, start, end):
+        """Keep only pcm()[start:end] (byte offsets), in place and without copying.
+
+        wav() later writes its header over the discarded audio just in
+        front of the kept range, which is why there is always room for it.
+        """
+        length = len(self)
+        start = max(0, min(start, length))
+        end = max(start, min(end, length))
+        self._end = self._start + end
+        self._start += start
+
+    @property
+    def duration(self):
+        """Length of the audio in seconds."""
+        return len(self) / (self.rate * self.channels * self.sample_width)
+
+    def pcm(self):
+        """Zero-copy view of the raw PCM samples."""
+        return memoryview(self._data)[self._start:self._end]
+
+    def wav(self):
+        """Zero-copy view of a complete WAV file (header written in place)."""
+        header_start = self._start - WAV_HEADER_SIZE
+        self._data[header_start:self._start] = wav_header(
+            len(self), self.rate, self.channels, self.sample_width
+        )
+        return memoryview(self._data)[header_start:self._end]
+
+
+class BufferReader(io.RawIOBase):
+    """Seekable file-like reader over a bytes-like object, without copying it.
+
+    httpx streams multipart file fields in chunks via read(), so this lets
+    an upload come straight from a memoryview.
+    """
+
+    def __init__(self, buffer):
+        super().__init__()
+        self._view = memoryview(buffer).cast("B")
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, b):
+        n = min(len(b), len(self._view) - self._pos)
+        if n <= 0:
+            return 0
+        b[:n] = self._view[self._pos:self._pos + n]
+        self._pos += n
+        return n
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            pos = offset
+        elif whence == io.SEEK_CUR:
+            pos = self._pos + offset
+        elif whence == io.SEEK_END:
+            pos = len(self._view) + offset
+        else:
+            raise ValueError(f"invalid whence: {whence}")
+        if pos < 0:
+            raise ValueError("negative seek position")
+        self._pos = pos
+        return pos
+
+    def tell(self):
+        return self._pos
+
+    def close(self):
+        if not self.closed:
+            self._view.release()
+        super().close()
+
+
+class EncodedAudio:
+    """An upload-ready clip plus what it cost to produce."""
+
+    def __init__(self, data, codec, raw_size, encode_seconds=0.0, duration=None):
+        self.data = data
+        self.codec = codec
+        self.filename, self.content_type = CODEC_FILES[codec]
+        self.raw_size = raw_size
+        self.encode_seconds = encode_seconds
+        self.duration = duration  # Seconds of audio
+
+    def __len__(self):
+        return len(self.data)
+
+
+def available_codecs():
+    """Codecs that can be produced on this machine, WAV first."""
+    codecs = [CODEC_WAV]
+    if soundfile is not None:
+        formats = soundfile.available_formats()
+        if "FLAC" in formats:
+            codecs.append(CODEC_FLAC)
+        if "OGG" in formats and "OPUS" in soundfile.available_subtypes("OGG"):
+            codecs.append(CODEC_OPUS)
+    return codecs
+
+
+def encode(buffer, codec):
+    """Encode a PcmBuffer into an EncodedAudio using the given codec."""
+    start = time.perf_counter()
+    if codec == CODEC_WAV:
+        data = buffer.wav()
+    else:
+        fmt, subtype = _SOUNDFILE_FORMATS[codec]
+        out = io.BytesIO()
+        with soundfile.SoundFile(out, "w", samplerate=buffer.rate, channels=buffer.channels,
+                                 format=fmt, subtype=subtype) as f:
+            f.buffer_write(buffer.pcm(), dtype="int16")
+        data = out.getbuffer()
+    return EncodedAudio(data, codec, len(buffer) + WAV_HEADER_SIZE,
+                        time.perf_counter() - start, buffer.duration)
+
+
+class CodecPolicy:
+    """Chooses the upload codec from clip length and uplink throughput.
+
+    Each codec's compression ratio and encode cost (seconds of CPU per
+    second of audio) start from conservative guesses and are refined
+    from every clip actually encoded. The chosen codec is the one with
+    the lowest expected encode + upload time. Lossy Opus is only
+    considered once a plain WAV upload would take longer than
+    lossy_after seconds, so short clips on good links stay lossless.
+    """
+
+    # Starting estimates for 16 kHz mono speech
+    DEFAULT_RATIO = {CODEC_WAV: 1.0, CODEC_FLAC: 0.6, CODEC_OPUS: 0.1}
+    DEFAULT_COST = {CODEC_WAV: 0.0, CODEC_FLAC: 0.005, CODEC_OPUS: 0.02}
+
+    def __init__(self, mode="auto", lossy_after=1.0, codecs=None):
+        self.mode = mode
+        self.lossy_after = lossy_after
+        self.codecs = codecs if codecs is not None else available_codecs()
+        self.ratio = dict(self.DEFAULT_RATIO)
+        self.cost = dict(self.DEFAULT_COST)
+
+    def choose(self, raw_size, duration, throughput):
+        """Pick a codec for raw_size bytes / duration seconds at throughput bytes/s."""
+        if self.mode != "auto":
+            return self.mode if self.mode in self.codecs else CODEC_WAV
+        if not throughput:
+            return CODEC_FLAC if CODEC_FLAC in self.codecs else CODEC_WAV
+
+        candidates = [c for c in self.codecs if c != CODEC_OPUS]
+        if CODEC_OPUS in self.codecs and raw_size / throughput > self.lossy_after:
+            candidates.append(CODEC_OPUS)
+        return min(candidates, key=lambda c: self.estimate(c, raw_size, duration, throughput))
+
+    def estimate(self, codec, raw_size, duration, throughput):
+        """Expected seconds to encode and upload a clip with codec."""
+        return duration * self.cost[codec] + raw_size * self.ratio[codec] / throughput
+
+    def record(self, encoded, duration):
+        """Refine estimates from a clip that was actually encoded."""
+        if not encoded.raw_size or duration <= 0:
+            return
+        codec = encoded.codec
+        self.ratio[codec] = 0.8 * self.ratio[codec] + 0.2 * (len(encoded) / encoded.raw_size)
+        self.cost[codec] = 0.8 * self.cost[codec] + 0.2 * (encoded.encode_seconds / duration)
+
+    def encode(self, buffer, throughput):
+        """Choose a codec for buffer and encode it, falling back to WAV on failure."""
+        codec = self.choose(len(buffer), buffer.duration, throughput)
+        try:
+            encoded = encode(buffer, codec)
+        except Exception as e:
+            log.warning(f"[encode] {codec} failed, sending WAV: {e}")
+            encoded = encode(buffer, CODEC_WAV)
+        self.record(encoded, buffer.duration)
+        return encoded
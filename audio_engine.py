@@ -0,0 +1,286 @@
+"""
+Long-lived audio capture engine for Voice Type.
+
+Keeps one PyAudio instance and one input stream open while armed, so a
+hotkey press never waits on a device open. Incoming audio is written to
+a fixed-size ring buffer; starting an utterance hands over the last few
+hundred milliseconds of pre-roll plus everything captured until it ends.
+
+By default PortAudio delivers audio through a stream callback that only
+pushes the raw buffer onto a queue. Everything else (ring buffer upkeep,
+handing chunks to the current utterance) happens on a separate pump
+thread, so a busy GIL in Tk or httpx never makes the device overflow.
+"""
+
+import logging
+import math
+import queue
+import threading
+import time
+from collections import deque
+
+import pyaudio
+
+from audio_encoding import PcmBuffer
+
+log = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+CHANNELS = 1
+FORMAT = pyaudio.paInt16
+DEFAULT_CHUNK = 1024
+DEFAULT_PREROLL_MS = 300
+
+CAPTURE_CALLBACK = "callback"
+CAPTURE_BLOCKING = "blocking"
+
+# PortAudio's paInputOverflowed, raised by blocking reads
+_INPUT_OVERFLOWED = -9981
+
+
+class Utterance:
+    """Audio captured for a single push-to-talk press.
+
+    Chunks are appended to a PcmBuffer, so once the utterance has ended
+    wav() is a ready-to-upload WAV file with no further copying.
+    """
+
+    def __init__(self, preroll, rate, channels, sample_width, overflows=0):
+        self.buffer = PcmBuffer(rate, channels, sample_width)
+        self.preroll = preroll
+        for data in preroll:
+            self.buffer.append(data)
+        self.chunk_count = len(preroll)
+        self.preroll_count = len(preroll)
+        self.start_time = time.time()
+        self.end_time = None
+        self.overflows = 0
+        self._overflows_at_start = overflows
+        self._live = queue.SimpleQueue()
+
+    @property
+    def live_count(self):
+        """Number of chunks captured after the hotkey went down."""
+        return self.chunk_count - self.preroll_count
+
+    def append(self, data):
+        self.buffer.append(data)
+        self.chunk_count += 1
+        self._live.put(data)
+
+    def read(self, timeout=0.1):
+        """Return the next live chunk, or None if nothing arrived in time (or on wake())."""
+        try:
+            return self._live.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def wake(self):
+        """Make a read() blocked waiting for audio return None now."""
+        self._live.put(None)
+
+    def drain(self):
+        """Live chunks that haven't been read yet."""
+        chunks = []
+        while True:
+            try:
+                data = self._live.get_nowait()
+            except queue.Empty:
+                return chunks
+            if data is not None:
+                chunks.append(data)
+
+    def pcm(self):
+        """View of all captured PCM data (pre-roll included). Call after end()."""
+        return self.buffer.pcm()
+
+    def wav(self):
+        """View of the utterance as a complete WAV file. Call after end()."""
+        return self.buffer.wav()
+
+
+class AudioEngine:
+    """Owns the microphone for the lifetime of the app."""
+
+    def __init__(self, device_index=None, rate=SAMPLE_RATE, chunk=DEFAULT_CHUNK,
+                 preroll_ms=DEFAULT_PREROLL_MS, mode=CAPTURE_CALLBACK):
+        self.device_index = device_index
+        self.rate = rate
+        self.chunk = chunk
+        self.mode = mode
+        self.channels = CHANNELS
+        self.sample_width = pyaudio.get_sample_size(FORMAT)
+
+        preroll_chunks = math.ceil(max(preroll_ms, 0) * rate / 1000 / chunk)
+        self._ring = deque(maxlen=max(preroll_chunks, 1))
+        self._preroll_enabled = preroll_chunks > 0
+
+        self._pa = None
+        self._stream = None
+        self._reader = None
+        self._pump = None
+        self._utterance = None
+        self._lock = threading.Lock()
+        self._running = False
+
+        # Raw buffers from the audio thread; SimpleQueue.put never blocks
+        self._incoming = queue.SimpleQueue()
+        self.overflows = 0
+
+    @property
+    def armed(self):
+        return self._running
+
+    def arm(self):
+        """Open the input stream and start filling the ring buffer."""
+        if self._running:
+            return
+        if self._pa is None:
+            self._pa = pyaudio.PyAudio()
+        # A read error stops the reader but leaves the dead stream behind
+        self._close_stream()
+
+        use_callback = self.mode == CAPTURE_CALLBACK
+        self._stream = self._pa.open(
+            format=FORMAT,
+            channels=self.channels,
+            rate=self.rate,
+            input=True,
+            input_device_index=self.device_index if self.device_index is not None else 0,
+            frames_per_buffer=self.chunk,
+            stream_callback=self._on_audio if use_callback else None,
+        )
+        self._running = True
+        self._pump = threading.Thread(target=self._pump_loop, daemon=True)
+        self._pump.start()
+        if not use_callback:
+            self._reader = threading.Thread(target=self._read_loop, daemon=True)
+            self._reader.start()
+        log.info(f"[audio] Armed (device {self.device_index}, {self.mode} mode, "
+                 f"{self._ring.maxlen} pre-roll chunks)")
+
+    def disarm(self):
+        """Stop capturing and release the input stream (PyAudio stays alive)."""
+        self._running = False
+        if self._reader:
+            self._reader.join(timeout=1)
+            self._reader = None
+        self._close_stream()
+        if self._pump:
+            self._pump.join(timeout=1)
+            self._pump = None
+        while True:
+            try:
+                self._incoming.get_nowait()
+            except queue.Empty:
+                break
+        self._ring.clear()
+
+    def close(self):
+        """Disarm and terminate PyAudio. Call once at shutdown."""
+        self.disarm()
+        if self._pa is not None:
+            self._pa.terminate()
+            self._pa = None
+
+    def set_device(self, device_index):
+        """Switch to another input device, re-arming if currently armed."""
+        if device_index == self.device_index:
+            return
+        was_armed = self._running
+        self.disarm()
+        self.device_index = device_index
+        if was_armed:
+            self.arm()
+
+    def input_devices(self):
+        """List (index, name) for every device with input channels."""
+        if self._pa is None:
+            self._pa = pyaudio.PyAudio()
+        devices = []
+        for i in range(self._pa.get_device_count()):
+            dev = self._pa.get_device_info_by_index(i)
+            if dev["maxInputChannels"] > 0:
+                devices.append((i, dev["name"]))
+        return devices
+
+    def begin(self):
+        """Start an utterance seeded with the current pre-roll."""
+        self.arm()
+        with self._lock:
+            preroll = list(self._ring) if self._preroll_enabled else []
+            self._ring.clear()
+            self._utterance = Utterance(preroll, self.rate, self.channels,
+                                        self.sample_width, self.overflows)
+            return self._utterance
+
+    def wake(self):
+        """Wake whoever is reading the current utterance (the hotkey came up)."""
+        utterance = self._utterance
+        if utterance is not None:
+            utterance.wake()
+
+    def end(self):
+        """Finish the current utterance and return it."""
+        with self._lock:
+            # Hand over whatever the device delivered before the key came up
+            while True:
+                try:
+                    self._dispatch(self._incoming.get_nowait())
+                except queue.Empty:
+                    break
+            utterance = self._utterance
+            self._utterance = None
+        if utterance:
+            utterance.end_time = time.time()
+            utterance.overflows = self.overflows - utterance._overflows_at_start
+            if utterance.overflows:
+                log.warning(f"[audio] {utterance.overflows} input overflow(s) during recording")
+        return utterance
+
+    def _close_stream(self):
+        if self._stream is None:
+            return
+        try:
+            self._stream.stop_stream()
+            self._stream.close()
+        except Exception as e:
+            log.warning(f"[audio] Error closing stream: {e}")
+        self._stream = None
+
+    def _on_audio(self, in_data, frame_count, time_info, status):
+        """PortAudio stream callback. Runs on the audio thread: enqueue only."""
+        if status & pyaudio.paInputOverflow:
+            self.overflows += 1
+        self._incoming.put(in_data)
+        return (None, pyaudio.paContinue)
+
+    def _read_loop(self):
+        """Blocking-mode reader, for hosts where callbacks misbehave."""
+        stream = self._stream
+        while self._running:
+            try:
+                data = stream.read(self.chunk, exception_on_overflow=True)
+            except IOError as e:
+                if e.errno == _INPUT_OVERFLOWED:
+                    self.overflows += 1
+                    continue
+                log.warning(f"[audio] Read error: {e}")
+                self._running = False
+                break
+            self._incoming.put(data)
+
+    def _pump_loop(self):
+        while self._running:
+            try:
+                data = self._incoming.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            with self._lock:
+                self._dispatch(data)
+
+    def _dispatch(self, data):
+        # Caller holds self._lock
+        self._ring.append(data)
+        if self._utterance is not None:
+            self._utterance.append(data)
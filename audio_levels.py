@@ -0,0 +1,126 @@
+"""
+Audio level metering for 16-bit PCM chunks.
+
+measure() returns the peak and RMS level of a raw buffer in one pass,
+both normalised to 0.0-1.0, so the level bar and silence detection can
+share one computation. The fastest available backend is used: the
+stdlib audioop module (C, removed in Python 3.13), then NumPy (listed in
+requirements.txt, so normally present). The last resort is plain
+Python over a memoryview of the samples; it is correct but no faster
+than the per-sample loop these replaced.
+
+Every backend computes the same numbers: the peak, and the RMS of all
+samples truncated to a whole sample value, as audioop.rms() does, so the
+voice activity thresholds below don't depend on which one is active.
+
+find_speech() builds on it as a small energy-based voice activity pass,
+used to trim silence off recordings and to skip uploading clips that
+contain no speech at all.
+"""
+
+import array
+import math
+import operator
+import sys
+import warnings
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        import audioop
+except ImportError:
+    audioop = None
+
+FULL_SCALE = 32768.0
+
+_NATIVE_LITTLE_ENDIAN = sys.byteorder == "little"
+
+
+def _samples(data):
+    """View 16-bit little-endian PCM as signed ints without copying (where possible)."""
+    if _NATIVE_LITTLE_ENDIAN:
+        return memoryview(data).cast("B").cast("h")
+    samples = array.array("h", bytes(data))
+    samples.byteswap()
+    return samples
+
+
+def _measure_numpy(data):
+    samples = numpy.frombuffer(data, dtype="<i2")
+    if not samples.size:
+        return 0.0, 0.0
+    peak = max(int(samples.max()), -int(samples.min()))
+    values = samples.astype(numpy.int64)
+    rms = int(math.sqrt(int(values.dot(values)) / samples.size))
+    return min(peak / FULL_SCALE, 1.0), min(rms / FULL_SCALE, 1.0)
+
+
+def _measure_audioop(data):
+    if not _NATIVE_LITTLE_ENDIAN:
+        data = audioop.byteswap(data, 2)
+    peak = audioop.max(data, 2)
+    rms = audioop.rms(data, 2)
+    return min(peak / FULL_SCALE, 1.0), min(rms / FULL_SCALE, 1.0)
+
+
+def _measure_python(data):
+    samples = _samples(data).tolist()
+    if not samples:
+        return 0.0, 0.0
+    peak = max(max(samples), -min(samples))
+    if hasattr(math, "sumprod"):  # Python 3.12+
+        energy = math.sumprod(samples, samples)
+    else:
+        energy = sum(map(operator.mul, samples, samples))
+    rms = int(math.sqrt(energy / len(samples)))
+    return min(peak / FULL_SCALE, 1.0), min(rms / FULL_SCALE, 1.0)
+
+
+def measure(data):
+    """Return (peak, rms) of a 16-bit PCM buffer, each normalised to 0.0-1.0."""
+    if len(data) % 2:
+        data = memoryview(data)[:-1]
+    if audioop is not None:
+        return _measure_audioop(data)
+    if numpy is not None:
+        return _measure_numpy(data)
+    return _measure_python(data)
+
+
+# Voice activity defaults (RMS, 0.0-1.0 scale)
+SPEECH_RMS = 0.006  # Frames quieter than this are never speech
+NOISE_FACTOR = 3.0  # ...nor anything within 3x of the clip's noise floor
+VAD_FRAME_MS = 30
+MIN_SPEECH_MS = 90  # Total speech needed before a clip is worth sending
+SPEECH_PAD_MS = 200  # Kept around speech so onsets and trailing consonants survive
+
+
+def find_speech(pcm, rate, sample_width=2, frame_ms=VAD_FRAME_MS,
+                min_speech_ms=MIN_SPEECH_MS, pad_ms=SPEECH_PAD_MS):
+    """Locate speech in a mono 16-bit PCM buffer.
+
+    Returns (start, end) byte offsets covering the speech plus padding,
+    or None when the clip holds less than min_speech_ms of speech.
+    """
+    frame_bytes = max(rate * frame_ms // 1000, 1) * sample_width
+    view = memoryview(pcm).cast("B")
+    frames = [measure(view[i:i + frame_bytes])[1] for i in range(0, len(view), frame_bytes)]
+    if not frames:
+        return None
+
+    # The quietest tenth of the clip approximates the room's noise floor
+    noise_floor = sorted(frames)[len(frames) // 10]
+    threshold = max(SPEECH_RMS, noise_floor * NOISE_FACTOR)
+    speech = [i for i, rms in enumerate(frames) if rms > threshold]
+    if len(speech) * frame_ms < min_speech_ms:
+        return None
+
+    pad = pad_ms // frame_ms
+    start = max(speech[0] - pad, 0) * frame_bytes
+    end = min((speech[-1] + 1 + pad) * frame_bytes, len(view))
+    return start, end
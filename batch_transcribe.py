@@ -0,0 +1,224 @@
+"""
+Headless batch transcription of many audio files.
+
+    python voice_type.py batch recordings/
+    python voice_type.py batch "meetings/**/*.m4a" --workers 8 --format jsonl
+
+Runs without Tk, the tray or keyboard hooks. Each file is decoded,
+transcribed (split into windows when long) and written next to the
+source file: NAME.txt, or one line per file in transcripts.jsonl in the
+same folder. Every finished file is appended to a manifest in its own
+folder (or to the one given with --manifest), so running the same
+command again after an interruption picks up where it stopped, from
+whichever directory it is started. A transcript already in a folder's
+transcripts.jsonl is not appended a second time.
+
+This module only orchestrates; voice_type.py passes in the functions
+that talk to the API and post-process the text.
+"""
+
+import argparse
+import glob
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+import long_audio
+
+AUDIO_EXTENSIONS = {".wav", ".mp3", ".m4a", ".ogg", ".flac", ".webm"}
+DEFAULT_WORKERS = 4
+MANIFEST_NAME = ".voice-type-batch.jsonl"  # Per-folder manifest, next to the inputs
+JSONL_NAME = "transcripts.jsonl"
+
+
+def find_audio_files(targets):
+    """Expand directories (recursively) and glob patterns into audio file paths."""
+    files = []
+    for target in targets:
+        path = Path(target)
+        if path.is_dir():
+            matches = (p for p in path.rglob("*") if p.is_file())
+        elif path.is_file():
+            matches = [path]
+        else:
+            matches = (Path(p) for p in glob.glob(target, recursive=True))
+        files.extend(p for p in matches if p.suffix.lower() in AUDIO_EXTENSIONS)
+    # De-duplicate while keeping a stable order
+    return list(dict.fromkeys(p.resolve() for p in files))
+
+
+def load_transcript_names(path):
+    """File names that already have a line in a transcripts.jsonl."""
+    names = set()
+    try:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    names.add(json.loads(line)["file"])
+                except (ValueError, KeyError, TypeError):
+                    continue
+    except FileNotFoundError:
+        pass
+    return names
+
+
+def load_manifest(path):
+    """Return the set of files a previous run already finished."""
+    done = set()
+    try:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # A line cut short by the interruption
+                if entry.get("status") == "done":
+                    done.add(entry["file"])
+    except FileNotFoundError:
+        pass
+    return done
+
+
+class BatchRun:
+    """One batch job: a worker pool, the manifest and running totals."""
+
+    def __init__(self, transcribe_buffer, transcribe_path, process_text=None,
+                 workers=DEFAULT_WORKERS, output_format="txt", manifest=None):
+        self.transcribe_buffer = transcribe_buffer
+        self.transcribe_path = transcribe_path
+        self.process_text = process_text
+        self.workers = workers
+        self.output_format = output_format
+        # One manifest for the whole run, or None for one per folder
+        self.manifest = Path(manifest).resolve() if manifest else None
+        self._lock = threading.Lock()
+        self._transcribed = {}  # transcripts.jsonl path -> file names already in it
+
+        self.files_done = 0
+        self.files_failed = 0
+        self.audio_seconds = 0.0
+
+    def run(self, files):
+        finished = set()
+        for manifest in {self._manifest_for(f) for f in files}:
+            finished |= load_manifest(manifest)
+        pending = [f for f in files if str(f) not in finished]
+        skipped = len(files) - len(pending)
+        print(f"[batch] {len(files)} file(s), {skipped} already done, "
+              f"{len(pending)} to go with {self.workers} worker(s)")
+
+        start = time.time()
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="batch") as pool:
+            futures = [pool.submit(self._transcribe_one, f) for f in pending]
+            try:
+                for i, future in enumerate(as_completed(futures), 1):
+                    future.result()
+                    if i % 10 == 0 or i == len(pending):
+                        print(f"[batch] {i}/{len(pending)}")
+            except KeyboardInterrupt:
+                print("[batch] Interrupted; run the same command again to resume")
+                for future in futures:
+                    future.cancel()
+                raise
+
+        self.report(time.time() - start)
+        return 1 if self.files_failed else 0
+
+    def report(self, elapsed):
+        elapsed = max(elapsed, 1e-6)
+        print(f"[batch] {self.files_done} done, {self.files_failed} failed "
+              f"in {elapsed:.1f}s")
+        print(f"[batch] {self.files_done / elapsed * 60:.1f} files/min, "
+              f"{self.audio_seconds / 3600:.2f} audio hours "
+              f"({self.audio_seconds / elapsed:.1f} audio hours/hour)")
+
+    def _transcribe_one(self, path):
+        start = time.time()
+        duration = None
+        try:
+            buffer = long_audio.decode(path)
+            if buffer is not None:
+                duration = buffer.duration
+                # Files run in parallel already, so each file's windows go one at a time
+                text, error = long_audio.transcribe_pcm(buffer, self.transcribe_buffer, workers=1)
+            else:
+                text, error = self.transcribe_path(str(path))
+        except Exception as e:
+            text, error = None, str(e)
+
+        if error is None and self.process_text:
+            text = self.process_text(text or "")
+
+        entry = {"file": str(path), "seconds": duration,
+                 "elapsed": round(time.time() - start, 2)}
+        if error is None:
+            self._write_output(path, text or "", duration)
+            entry["status"] = "done"
+        else:
+            print(f"[batch] {path.name}: {error}")
+            entry["status"] = "error"
+            entry["error"] = error
+
+        with self._lock:
+            if error is None:
+                self.files_done += 1
+                self.audio_seconds += duration or 0.0
+            else:
+                self.files_failed += 1
+            with open(self._manifest_for(path), "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+
+    def _manifest_for(self, path):
+        return self.manifest or path.parent / MANIFEST_NAME
+
+    def _write_output(self, path, text, duration):
+        if self.output_format == "jsonl":
+            record = {"file": path.name, "text": text, "seconds": duration}
+            output = path.parent / JSONL_NAME
+            with self._lock:
+                if output not in self._transcribed:
+                    self._transcribed[output] = load_transcript_names(output)
+                # Written by a run killed before it reached the manifest
+                if path.name in self._transcribed[output]:
+                    return
+                with open(output, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                self._transcribed[output].add(path.name)
+        else:
+            path.with_suffix(".txt").write_text(text + "\n", encoding="utf-8")
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="voice_type.py batch",
+        description="Transcribe directories or glob patterns of audio files without the GUI.",
+    )
+    parser.add_argument("targets", nargs="+", help="directories, files or glob patterns")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"files transcribed at once (default {DEFAULT_WORKERS})")
+    parser.add_argument("--format", choices=["txt", "jsonl"], default="txt",
+                        help="NAME.txt next to each file, or transcripts.jsonl per folder")
+    parser.add_argument("--manifest",
+                        help=f"progress file used to resume (default {MANIFEST_NAME} "
+                             f"in each input folder)")
+    return parser.parse_args(argv)
+
+
+def main(args, transcribe_buffer, transcribe_path, process_text=None):
+    """Entry point for `voice_type.py batch`; args come from parse_args().
+
+    Returns a process exit code.
+    """
+    files = find_audio_files(args.targets)
+    if not files:
+        print("[batch] No audio files found")
+        return 1
+    run = BatchRun(transcribe_buffer, transcribe_path, process_text,
+                   workers=max(args.workers, 1), output_format=args.format,
+                   manifest=args.manifest)
+    try:
+        return run.run(files)
+    except KeyboardInterrupt:
+        return 130
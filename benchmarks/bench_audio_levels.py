@@ -0,0 +1,55 @@
+"""
+Microbenchmark: level-metering cost per second of 16 kHz audio.
+
+Compares the old per-chunk struct.unpack + generator peak with
+audio_levels.measure() (audioop, NumPy and the pure-Python fallback).
+
+    python benchmarks/bench_audio_levels.py
+"""
+
+import random
+import struct
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import audio_levels  # noqa: E402
+
+RATE = 16000
+CHUNK = 1024
+
+
+def old_peak(data):
+    """The metering loop record_and_transcribe() used to run per chunk."""
+    samples = struct.unpack(f'<{len(data)//2}h', data)
+    max_sample = max(abs(s) for s in samples) if samples else 0
+    return min(max_sample / 32768.0, 1.0)
+
+
+def main():
+    rng = random.Random(0)
+    chunk = struct.pack(f"<{CHUNK}h", *(rng.randint(-12000, 12000) for _ in range(CHUNK)))
+    chunks_per_second = RATE / CHUNK
+
+    candidates = [("struct.unpack + generator (old)", old_peak)]
+    if audio_levels.numpy is not None:
+        candidates.append(("measure() numpy", audio_levels._measure_numpy))
+    if audio_levels.audioop is not None:
+        candidates.append(("measure() audioop", audio_levels._measure_audioop))
+    candidates.append(("measure() pure Python (fallback)", audio_levels._measure_python))
+
+    print(f"{CHUNK}-sample chunks, {chunks_per_second:.1f} chunks per second of audio\n")
+    baseline = None
+    for name, func in candidates:
+        number = 2000
+        best = min(timeit.repeat(lambda: func(chunk), number=number, repeat=5)) / number
+        per_second = best * chunks_per_second
+        baseline = baseline or per_second
+        print(f"{name:<34} {best * 1e6:8.1f} us/chunk  {per_second * 1e3:7.3f} ms per audio-second"
+              f"  ({baseline / per_second:5.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
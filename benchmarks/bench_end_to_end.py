@@ -0,0 +1,333 @@
+"""
+End-to-end latency from hotkey release to paste, with no network.
+
+Runs the real record_and_transcribe() of voice_type.py and
+voice_type_lite.py against the local Groq stub (groq_stub.py). The
+microphone, the hotkey and the clipboard are replaced by simulators: a
+PyAudio stand-in streams synthetic speech in real time, the hotkey is
+"held" for a fixed time and then released, and the paste keystroke is
+timestamped.
+
+    python benchmarks/bench_end_to_end.py
+    python benchmarks/bench_end_to_end.py --lengths 2 10 30 --runs 10 --latency 0.3
+    python benchmarks/bench_end_to_end.py --base-url https://127.0.0.1:8787 --ca-bundle cert.pem
+
+Needs the GUI packages from requirements.txt importable (the widget
+itself is never shown).
+"""
+
+import argparse
+import importlib
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import types
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_upload_codecs import synthetic_speech  # noqa: E402
+from groq_stub import StubBehaviour, StubServer  # noqa: E402
+
+RATE = 16000
+HOTKEY = "shift"
+BUILDS = ["voice_type", "voice_type_lite"]
+
+
+class SimulatedKeyboard(types.ModuleType):
+    """The parts of the keyboard module the apps use, driven by the benchmark."""
+
+    KEY_DOWN = "down"
+    KEY_UP = "up"
+
+    def __init__(self):
+        super().__init__("keyboard")
+        self.held = set()
+        self.hooks = {}  # key -> callbacks
+        self.pressed_at = None
+        self.released_at = None
+        self.pasted_at = None
+        self.pasted = threading.Event()
+
+    def hold(self, key):
+        self.held.add(key)
+        self.pasted.clear()
+        self.pasted_at = None
+        self.pressed_at = time.perf_counter()
+        self._deliver(key, self.KEY_DOWN)
+
+    def release_key(self, key):
+        self.held.discard(key)
+        self.released_at = time.perf_counter()
+        self._deliver(key, self.KEY_UP)
+
+    def _deliver(self, key, event_type):
+        event = types.SimpleNamespace(event_type=event_type, scan_code=hash(key), name=key,
+                                      time=time.time())
+        for callback in list(self.hooks.get(key, ())):
+            callback(event)
+
+    def hook_key(self, key, callback, suppress=False):
+        self.hooks.setdefault(key, []).append(callback)
+        return (key, callback)
+
+    def unhook(self, handle):
+        key, callback = handle
+        self.hooks[key].remove(callback)
+
+    def is_pressed(self, key):
+        return key in self.held
+
+    def press_and_release(self, keys):
+        if keys == "ctrl+v":
+            self._paste()
+
+    def write(self, text):
+        self._paste()
+
+    def _paste(self):
+        if self.pasted_at is None:
+            self.pasted_at = time.perf_counter()
+            self.pasted.set()
+
+    def release(self, key):
+        pass
+
+    def unhook_all(self):
+        pass
+
+
+class SimulatedStream:
+    """Delivers synthetic speech through the stream callback in real time."""
+
+    def __init__(self, source, rate, frames, callback):
+        self.source = source
+        self.rate = rate
+        self.frames = frames
+        self.callback = callback
+        self.position = 0
+        self.running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        if callback:
+            self._thread.start()
+
+    def _next_chunk(self):
+        size = self.frames * 2
+        if self.position + size > len(self.source):
+            self.position = 0
+        chunk = self.source[self.position:self.position + size]
+        self.position += size
+        return chunk
+
+    def _run(self):
+        interval = self.frames / self.rate
+        deadline = time.perf_counter()
+        while self.running:
+            deadline += interval
+            time.sleep(max(deadline - time.perf_counter(), 0))
+            self.callback(self._next_chunk(), self.frames, {}, 0)
+
+    def read(self, frames, exception_on_overflow=True):
+        time.sleep(frames / self.rate)
+        return self._next_chunk()
+
+    def stop_stream(self):
+        self.running = False
+
+    def close(self):
+        self.running = False
+
+
+def simulated_pyaudio(source):
+    module = types.ModuleType("pyaudio")
+    module.paInt16 = 8
+    module.paContinue = 0
+    module.paInputOverflow = 2
+    module.get_sample_size = lambda fmt: 2
+
+    class PyAudio:
+        def open(self, rate, frames_per_buffer, stream_callback=None, **kwargs):
+            return SimulatedStream(source, rate, frames_per_buffer, stream_callback)
+
+        def get_device_count(self):
+            return 1
+
+        def get_device_info_by_index(self, index):
+            return {"name": "Simulated microphone", "maxInputChannels": 1}
+
+        def terminate(self):
+            pass
+
+    module.PyAudio = PyAudio
+    return module
+
+
+def simulated_pystray():
+    """A pystray module whose tray icon does nothing, so no GUI backend is loaded."""
+    module = types.ModuleType("pystray")
+
+    class Menu:
+        SEPARATOR = None
+
+        def __init__(self, *items):
+            self.items = items
+
+    class MenuItem:
+        def __init__(self, text, action, **kwargs):
+            self.text, self.action = text, action
+
+    class Icon:
+        def __init__(self, name, image=None, title=None, menu=None):
+            self.name, self.title, self.menu = name, title, menu
+
+        def run(self):
+            pass
+
+        def stop(self):
+            pass
+
+    module.Menu, module.MenuItem, module.Icon = Menu, MenuItem, Icon
+    return module
+
+
+class NullWidget:
+    """Accepts every call record_and_transcribe() makes on the floating widget."""
+
+    hidden = False
+
+    class root:
+        @staticmethod
+        def after(ms, func=None, *args):
+            pass
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+def install_simulators(home, base_url, ca_bundle):
+    """Point HOME at a scratch config and swap in the device simulators."""
+    config = {
+        "api_key": "stub-key",
+        "api_base_url": base_url,
+        "api_ca_bundle": ca_bundle,
+        "hotkey": HOTKEY,
+        "mic_index": 0,
+        "auto_copy": False,
+        "save_audio": False,
+    }
+    (home / ".voice-type-config.json").write_text(json.dumps(config))
+    os.environ["HOME"] = os.environ["USERPROFILE"] = str(home)
+
+    keyboard = SimulatedKeyboard()
+    sys.modules["keyboard"] = keyboard
+    sys.modules["pyaudio"] = simulated_pyaudio(synthetic_speech(10))
+    sys.modules["pyperclip"] = types.SimpleNamespace(copy=lambda text: None, paste=lambda: "")
+    sys.modules["pystray"] = simulated_pystray()
+    return keyboard
+
+
+def load_build(name):
+    """Import a build and wire it up the way its main() does, minus the GUI."""
+    app = importlib.import_module(name)
+    app.widget = NullWidget()
+    app.groq_client = app.GroqClient(base_url=app.API_BASE_URL, verify=app.API_CA_BUNDLE or True)
+    app.codec_policy = app.CodecPolicy(mode=app.UPLOAD_CODEC)
+    app.text_pipeline.stages()
+    chunk = 512 if name.endswith("lite") else 1024
+    app.audio_engine = app.AudioEngine(device_index=0, chunk=chunk, preroll_ms=app.PREROLL_MS)
+    app.audio_engine.arm()
+    if hasattr(app, "trace_log"):
+        app.trace_log = app.latency_trace.TraceLog(app.TRACE_FILE)
+    if hasattr(app, "setup_hotkeys"):
+        app.setup_hotkeys()
+    else:
+        app.setup_hotkey()
+    return app
+
+
+def is_recording(app):
+    return app.state.recording if hasattr(app, "state") else app.recording
+
+
+def measure(app, keyboard, seconds, timeout=60):
+    """Hold the hotkey for seconds, release, and return seconds until the paste."""
+    keyboard.hold(HOTKEY)  # The app's press hook starts record_and_transcribe()
+    time.sleep(seconds)
+    keyboard.release_key(HOTKEY)
+    if not keyboard.pasted.wait(timeout):
+        return None
+    latency = keyboard.pasted_at - keyboard.released_at
+    deadline = time.time() + timeout
+    while is_recording(app) and time.time() < deadline:
+        time.sleep(0.01)
+    return latency
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(int(round(p / 100 * (len(values) - 1))), len(values) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--builds", nargs="+", default=BUILDS, choices=BUILDS)
+    parser.add_argument("--lengths", nargs="+", type=float, default=[2, 5, 15],
+                        help="seconds the hotkey is held")
+    parser.add_argument("--runs", type=int, default=5, help="utterances per length")
+    parser.add_argument("--latency", type=float, default=0.2, help="stub server latency")
+    parser.add_argument("--base-url", help="use an already running stub instead")
+    parser.add_argument("--ca-bundle", help="CA bundle for an https --base-url")
+    args = parser.parse_args()
+
+    server = None
+    base_url = args.base_url
+    if not base_url:
+        server = StubServer(StubBehaviour(latency=[args.latency], seed=1)).start()
+        base_url = server.base_url
+
+    home = Path(tempfile.mkdtemp(prefix="voice-type-bench-"))
+    keyboard = install_simulators(home, base_url, args.ca_bundle)
+    print(f"Stub: {base_url}  scratch HOME: {home}\n")
+
+    results = {}
+    stage_stats = {}
+    for name in args.builds:
+        app = load_build(name)
+        # One throwaway utterance opens the connection and warms the caches
+        measure(app, keyboard, 2.0)
+        for seconds in args.lengths:
+            samples = [measure(app, keyboard, seconds) for _ in range(args.runs)]
+            results[(name, seconds)] = [s for s in samples if s is not None]
+        app.audio_engine.close()
+        app.groq_client.close()
+        if getattr(app, "trace_log", None):
+            stage_stats[name] = app.trace_log.stage_percentiles()
+
+    print(f"\n{'build':<16} {'held':>6} {'runs':>5} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}")
+    print("-" * 56)
+    for (name, seconds), samples in results.items():
+        if not samples:
+            print(f"{name:<16} {seconds:>5.1f}s {0:>5}  no paste observed")
+            continue
+        print(f"{name:<16} {seconds:>5.1f}s {len(samples):>5} "
+              f"{statistics.median(samples) * 1000:>8.0f} {percentile(samples, 95) * 1000:>8.0f} "
+              f"{max(samples) * 1000:>8.0f}")
+
+    for name, stages in stage_stats.items():
+        print(f"\n{name} per-stage latency (ms, all lengths)")
+        print(f"{'stage':<20} {'p50':>8} {'p95':>8} {'p99':>8}")
+        for stage, (count, (p50, p95, p99)) in stages.items():
+            print(f"{stage:<20} {p50:>8.1f} {p95:>8.1f} {p99:>8.1f}")
+
+    if server:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
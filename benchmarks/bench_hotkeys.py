@@ -0,0 +1,172 @@
+"""
+Hotkey latency: press-to-capture and release-to-stop, hooks vs polling.
+
+Runs the real record_and_transcribe() of voice_type.py and
+voice_type_lite.py with the simulators from bench_end_to_end.py (fake
+microphone, fake keyboard, local Groq stub) and times:
+
+    press-to-capture  key down -> audio_engine.begin() has returned
+    release-to-stop   key up   -> audio_engine.end() is called
+    idle wakeups/s    hotkey checks per second with no key touched
+
+The idle column counts the input layer only. The widget's render tick
+stops once nothing on it is moving, so an idle app has no other timers.
+An armed microphone still delivers audio chunks for the pre-roll. Those
+wakeups come from the audio device, not from hotkeys, and aren't counted.
+
+"hooks" is the current event-driven input layer (hotkeys.py). "polling"
+puts back what it replaced: a thread checking is_pressed() for the
+hotkey, F1 and F2 every 20 ms, and a recording loop that only notices
+the release when the next audio chunk arrives.
+
+    python benchmarks/bench_hotkeys.py
+    python benchmarks/bench_hotkeys.py --runs 20 --hold 1.0
+"""
+
+import argparse
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from contextlib import nullcontext
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_end_to_end import (BUILDS, HOTKEY, install_simulators, is_recording,  # noqa: E402
+                              load_build, percentile)
+from groq_stub import StubBehaviour, StubServer  # noqa: E402
+
+POLL_INTERVAL = 0.02  # The old hotkey_loop's sleep
+
+
+class PollingHotkeys:
+    """Baseline: the old hotkey_loop and is_pressed() recording loop."""
+
+    def __init__(self, keyboard, on_press):
+        self.keyboard = keyboard
+        self.on_press = on_press
+        self.polls = 0
+        self.running = True
+        threading.Thread(target=self._loop, daemon=True).start()
+
+    def _loop(self):
+        was_pressed = False
+        while self.running:
+            self.polls += 1
+            pressed = self.keyboard.is_pressed(HOTKEY)
+            if pressed and not was_pressed:
+                self.on_press()
+            was_pressed = pressed
+            self.keyboard.is_pressed("f1")
+            self.keyboard.is_pressed("f2")
+            time.sleep(POLL_INTERVAL)
+
+    def is_held(self, key):
+        return self.keyboard.is_pressed(key)
+
+    def paused(self):
+        return nullcontext()
+
+    def close(self):
+        self.running = False
+
+
+def instrument(engine):
+    """Timestamp audio_engine.begin() returning and end() being called."""
+    times = {}
+    begin, end = engine.begin, engine.end
+
+    def timed_begin():
+        utterance = begin()
+        times["begin"] = time.perf_counter()
+        return utterance
+
+    def timed_end():
+        times["end"] = time.perf_counter()
+        return end()
+
+    engine.begin, engine.end = timed_begin, timed_end
+    return times
+
+
+def run(app, keyboard, times, hold, runs, timeout=30):
+    press, release = [], []
+    for _ in range(runs):
+        times.clear()
+        keyboard.hold(HOTKEY)
+        time.sleep(hold)
+        keyboard.release_key(HOTKEY)
+        keyboard.pasted.wait(timeout)
+        deadline = time.time() + timeout
+        while is_recording(app) and time.time() < deadline:
+            time.sleep(0.01)
+        if "begin" in times and "end" in times:
+            press.append(times["begin"] - keyboard.pressed_at)
+            release.append(times["end"] - keyboard.released_at)
+    return press, release
+
+
+def summary(samples):
+    if not samples:
+        return f"{'-':>8} {'-':>8}"
+    return f"{statistics.median(samples) * 1000:>8.1f} {percentile(samples, 95) * 1000:>8.1f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--builds", nargs="+", default=BUILDS, choices=BUILDS)
+    parser.add_argument("--runs", type=int, default=10, help="presses per mode")
+    parser.add_argument("--hold", type=float, default=0.8, help="seconds the key is held")
+    parser.add_argument("--idle", type=float, default=2.0, help="seconds to count idle wakeups")
+    args = parser.parse_args()
+
+    server = StubServer(StubBehaviour(latency=[0.05], seed=1)).start()
+    home = Path(tempfile.mkdtemp(prefix="voice-type-bench-"))
+    keyboard = install_simulators(home, server.base_url, None)
+
+    rows = []
+    for name in args.builds:
+        app = load_build(name)
+        times = instrument(app.audio_engine)
+
+        # Hooks: count hook deliveries while nothing is pressed
+        delivered = [0]
+        for callbacks in keyboard.hooks.values():
+            for i, callback in enumerate(callbacks):
+                def counted(event, callback=callback):
+                    delivered[0] += 1
+                    callback(event)
+                callbacks[i] = counted
+        time.sleep(args.idle)
+        idle = delivered[0] / args.idle
+        press, release = run(app, keyboard, times, args.hold, args.runs)
+        rows.append((name, "hooks", press, release, idle))
+
+        # Polling: drop the hooks and put the old loops back
+        hooks = dict(keyboard.hooks)
+        keyboard.hooks.clear()
+        polling = PollingHotkeys(keyboard, app.on_hotkey_press)
+        app.hotkeys = polling
+        time.sleep(args.idle)
+        idle = polling.polls / args.idle
+        press, release = run(app, keyboard, times, args.hold, args.runs)
+        polling.close()
+        keyboard.hooks.update(hooks)
+        rows.append((name, "polling", press, release, idle))
+
+        app.audio_engine.close()
+        app.groq_client.close()
+
+    print(f"\n{'build':<16} {'mode':<8} {'press-to-capture ms':>19} {'release-to-stop ms':>19} {'idle':>10}")
+    print(f"{'':<16} {'':<8} {'p50':>8} {'p95':>8}   {'p50':>8} {'p95':>8}   {'wakeups/s':>10}")
+    print("-" * 80)
+    for name, mode, press, release, idle in rows:
+        print(f"{name:<16} {mode:<8} {summary(press)}   {summary(release)}   {idle:>10.1f}")
+
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Benchmark accounting mode: per-word regex loop vs the number_words parser.
+
+The old convert_numbers_to_digits() ran one case-insensitive regex per
+number word (29 of them) over the text and only mapped single words, so
+"twenty five" came out as "20 5". This times that loop against
+number_words.convert_numbers() on a corpus of dictated accounting
+sentences, and prints a few conversions side by side.
+
+    python benchmarks/bench_number_words.py
+"""
+
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from number_words import add_thousands_separators, convert_numbers  # noqa: E402
+
+TRANSCRIPT_WORDS = [50, 500, 5000]
+
+SENTENCES = [
+    "Please book the invoice for twenty five dollars and fifty cents to office supplies.",
+    "The quarterly total came to one million two hundred thousand dollars.",
+    "Margin improved by three point five percent over last year.",
+    "We paid one hundred and six invoices in March and forty two in April.",
+    "Reconcile account nineteen against the bank statement before Friday.",
+    "Depreciation was seven thousand four hundred eighty dollars for the year.",
+    "Send the report to the whole team once the numbers are final.",
+    "Line items one, two and three are duplicates and should be removed.",
+    "The tax rate is twelve per cent on the first fifty thousand.",
+    "Nobody has approved the expense report yet, so hold the payment.",
+]
+
+OLD_NUMBER_WORD_MAP = {
+    "zero": "0", "one": "1", "two": "2", "three": "3", "four": "4",
+    "five": "5", "six": "6", "seven": "7", "eight": "8", "nine": "9",
+    "ten": "10", "eleven": "11", "twelve": "12", "thirteen": "13", "fourteen": "14",
+    "fifteen": "15", "sixteen": "16", "seventeen": "17", "eighteen": "18", "nineteen": "19",
+    "twenty": "20", "thirty": "30", "forty": "40", "fourty": "40", "fifty": "50",
+    "sixty": "60", "seventy": "70", "eighty": "80", "ninety": "90",
+}
+
+
+# --- The previous implementation, kept here as the baseline ---
+
+def old_convert(text):
+    result = text
+    sorted_numbers = sorted(OLD_NUMBER_WORD_MAP.items(), key=lambda x: len(x[0]), reverse=True)
+    for word, digit in sorted_numbers:
+        pattern = re.compile(r'(?<![a-zA-Z])' + re.escape(word) + r'(?![a-zA-Z])', re.IGNORECASE)
+        result = pattern.sub(digit, result)
+    return result
+
+
+def transcript(words, seed=1):
+    rng = random.Random(seed)
+    out = []
+    while len(out) < words:
+        out.extend(rng.choice(SENTENCES).split())
+    return " ".join(out[:words])
+
+
+def best_of(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    print("Sample conversions\n")
+    for sentence in SENTENCES[:4]:
+        print(f"  said: {sentence}")
+        print(f"  old:  {old_convert(sentence)}")
+        print(f"  new:  {add_thousands_separators(convert_numbers(sentence))}\n")
+
+    print(f"{'words':>6} {'old ms':>9} {'new ms':>9} {'speedup':>8}")
+    print("-" * 35)
+    for words in TRANSCRIPT_WORDS:
+        text = transcript(words)
+        repeat = 20 if words < 5000 else 5
+        old = best_of(lambda: old_convert(text), repeat)
+        new = best_of(lambda: convert_numbers(text), repeat)
+        print(f"{words:>6} {old * 1000:>9.3f} {new * 1000:>9.3f} {old / new:>7.1f}x")
+
+    # Per-utterance cost, the case that sits on the release-to-paste path
+    count = 2000
+    old = best_of(lambda: [old_convert(s) for s in SENTENCES * (count // len(SENTENCES))], 3)
+    new = best_of(lambda: [convert_numbers(s) for s in SENTENCES * (count // len(SENTENCES))], 3)
+    print(f"\nPer sentence: old {old / count * 1e6:.1f} us, new {new / count * 1e6:.1f} us "
+          f"({old / new:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Benchmark phrase expansion: per-table regex loops vs one compiled PhraseMatcher.
+
+The old pipeline ran apply_macros(), the inline pass of
+process_voice_commands() and convert_emojis() one after another, each
+sorting its table and compiling one regex per entry on every call. This
+compares that with a single PhraseMatcher scan over the same tables
+(read straight out of voice_type.py, so no GUI imports are needed), on
+transcripts of several lengths and with extra user macros.
+
+    python benchmarks/bench_phrase_matching.py
+"""
+
+import ast
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from phrase_matcher import PhraseMatcher  # noqa: E402
+
+WORDS = ("the report is due on friday and we should send it to the whole team "
+         "before lunch so that everyone has time to review the numbers").split()
+TRANSCRIPT_WORDS = [50, 500, 5000]
+EXTRA_MACROS = [0, 100, 500]
+
+
+def load_tables():
+    """Read DEFAULT_MACROS, VOICE_COMMANDS and EMOJI_MAP literals from voice_type.py."""
+    wanted = {"DEFAULT_MACROS", "VOICE_COMMANDS", "EMOJI_MAP"}
+    tree = ast.parse((ROOT / "voice_type.py").read_text(encoding="utf-8"))
+    tables = {}
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and len(node.targets) == 1:
+            name = getattr(node.targets[0], "id", None)
+            if name in wanted:
+                tables[name] = ast.literal_eval(node.value)
+    return tables["DEFAULT_MACROS"], tables["VOICE_COMMANDS"], tables["EMOJI_MAP"]
+
+
+# --- The previous implementation, kept here as the baseline ---
+
+def old_apply_macros(text, macros):
+    result = text
+    sorted_macros = sorted(macros.items(), key=lambda x: len(x[0]), reverse=True)
+    for phrase, expansion in sorted_macros:
+        pattern = re.compile(re.escape(phrase), re.IGNORECASE)
+        expansion = expansion.replace("{{DATE}}", time.strftime("%Y-%m-%d"))
+        result = pattern.sub(expansion, result)
+    return re.sub(r'\s+', ' ', result).strip()
+
+
+def old_inline_commands(text, commands):
+    result = text
+    for command, replacement in commands.items():
+        if replacement.startswith("__"):
+            continue
+        pattern = re.compile(re.escape(command), re.IGNORECASE)
+        if pattern.search(result):
+            result = pattern.sub(replacement, result)
+    return result
+
+
+def old_convert_emojis(text, emojis):
+    result = text
+    sorted_emojis = sorted(emojis.items(), key=lambda x: len(x[0]), reverse=True)
+    for phrase, emoji in sorted_emojis:
+        pattern = re.compile(re.escape(phrase), re.IGNORECASE)
+        result = pattern.sub(emoji, result)
+    return re.sub(r'\s+', ' ', result).strip()
+
+
+def old_pipeline(text, macros, commands, emojis):
+    text = old_apply_macros(text, macros)
+    text = old_inline_commands(text, commands)
+    return old_convert_emojis(text, emojis)
+
+
+# --- New ---
+
+def new_pipeline(text, matcher):
+    result = matcher.sub(text)
+    return re.sub(r' {2,}', ' ', result).strip(' ')
+
+
+def transcript(words, phrases, seed=1):
+    """Filler words with a phrase from the tables roughly every 12 words."""
+    rng = random.Random(seed)
+    out = []
+    while len(out) < words:
+        out.extend(rng.choice(WORDS) for _ in range(rng.randint(6, 18)))
+        out.append(rng.choice(phrases))
+    return " ".join(out[:words])
+
+
+def best_of(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    macros, commands, emojis = load_tables()
+    inline = {k: v for k, v in commands.items() if not v.startswith("__")}
+    print(f"Tables: {len(macros)} macros, {len(inline)} inline commands, {len(emojis)} emojis\n")
+    print(f"{'words':>6} {'+macros':>8} {'old ms':>9} {'new ms':>9} {'speedup':>8} {'build ms':>9}")
+    print("-" * 54)
+
+    for extra in EXTRA_MACROS:
+        all_macros = dict(macros)
+        all_macros.update({f"custom phrase {i}": f"Expansion number {i}." for i in range(extra)})
+        start = time.perf_counter()
+        matcher = PhraseMatcher(all_macros, inline, emojis)
+        build = time.perf_counter() - start
+        phrases = list(all_macros) + list(inline) + list(emojis)
+        for words in TRANSCRIPT_WORDS:
+            text = transcript(words, phrases)
+            repeat = 5 if words < 5000 else 2
+            old = best_of(lambda: old_pipeline(text, all_macros, commands, emojis), repeat)
+            new = best_of(lambda: new_pipeline(text, matcher), repeat)
+            print(f"{words:>6} {extra:>8} {old * 1000:>9.2f} {new * 1000:>9.2f} "
+                  f"{old / new:>7.1f}x {build * 1000:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Startup cost: import time, time to ready, and time until background startup is done.
+
+Each run starts a fresh Python process that imports a build with the
+simulators from bench_end_to_end.py (fake microphone and keyboard, local
+Groq stub, no window) and calls its start(), the part of main() before
+the Tk main loop:
+
+    import      python importing voice_type / voice_type_lite
+    ready       start() returned: widget built, hotkey hooked, mic armed
+    background  deferred_startup() finished: HTTP client warm, text
+                stages compiled, tray started, history indexed
+
+It also lists which of the deferred modules the build had already loaded
+at the ready point (ideally none). A scratch history of --history entries
+makes the cost of loading it visible. keyboard, pyaudio, pyperclip and
+pystray are simulators here, so their own import time isn't counted.
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --runs 10 --history 100000 --importtime
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_end_to_end import BUILDS  # noqa: E402
+from groq_stub import StubBehaviour, StubServer  # noqa: E402
+
+DEFERRED_MODULES = ["httpx", "PIL", "tkinter.ttk", "history_view", "long_audio"]
+APP_IMPORT_MARKER = "--- importing the app ---"
+
+
+def child(build, base_url, home):
+    """Runs in the measured process; prints one JSON line of timings."""
+    import importlib
+
+    from bench_end_to_end import NullWidget, install_simulators
+
+    install_simulators(Path(home), base_url, None)
+    before = set(sys.modules)
+    sys.stderr.write(APP_IMPORT_MARKER + "\n")
+    sys.stderr.flush()
+    started = time.perf_counter()
+    app = importlib.import_module(build)
+    imported = time.perf_counter()
+    app.FloatingWidget = NullWidget
+    app.start()
+    ready = time.perf_counter()
+    loaded = [name for name in DEFERRED_MODULES if name in sys.modules and name not in before]
+    app.startup_done.wait(60)
+    done = time.perf_counter()
+    app.audio_engine.close()
+    print(json.dumps({
+        "import": imported - started,
+        "ready": ready - imported,
+        "background": done - imported,
+        "loaded_at_ready": loaded,
+    }))
+
+
+def write_history(home, count):
+    with open(home / ".voice-type-history.jsonl", "w", encoding="utf-8") as f:
+        for i in range(count):
+            entry = {"text": f"entry {i} please send the quarterly report to the team",
+                     "timestamp": "2024-01-01 12:00:00", "words": 9}
+            f.write(json.dumps(entry) + "\n")
+
+
+def run_child(build, base_url, home, importtime):
+    command = [sys.executable]
+    if importtime:
+        command += ["-X", "importtime"]
+    command += [__file__, "--child", build, base_url, str(home)]
+    result = subprocess.run(command, capture_output=True, text=True, timeout=120)
+    lines = [line for line in result.stdout.splitlines() if line.startswith("{")]
+    if not lines:
+        raise RuntimeError(f"{build} failed:\n{result.stderr[-2000:]}")
+    return json.loads(lines[-1]), result.stderr
+
+
+def slowest_imports(stderr, count=10):
+    """Top-level imports by cumulative time from -X importtime output (the app's only)."""
+    rows = []
+    for line in stderr.split(APP_IMPORT_MARKER)[-1].splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit() and not name.startswith("  "):
+            rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)[:count]
+
+
+def main():
+    if sys.argv[1:2] == ["--child"]:
+        child(*sys.argv[2:5])
+        return
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--builds", nargs="+", default=BUILDS, choices=BUILDS)
+    parser.add_argument("--runs", type=int, default=5, help="fresh processes per build")
+    parser.add_argument("--history", type=int, default=20000, help="entries in the scratch history")
+    parser.add_argument("--importtime", action="store_true",
+                        help="also list the slowest top-level imports (background ones included)")
+    args = parser.parse_args()
+
+    server = StubServer(StubBehaviour(latency=[0.05], seed=1)).start()
+    home = Path(tempfile.mkdtemp(prefix="voice-type-bench-"))
+    write_history(home, args.history)
+
+    print(f"{'build':<16} {'import ms':>10} {'ready ms':>10} {'background ms':>14}  loaded at ready")
+    print("-" * 78)
+    for build in args.builds:
+        samples = []
+        stderr = ""
+        for _ in range(args.runs):
+            timings, stderr = run_child(build, server.base_url, home, args.importtime)
+            samples.append(timings)
+        median = {key: statistics.median(s[key] for s in samples) * 1000
+                  for key in ("import", "ready", "background")}
+        loaded = ", ".join(samples[-1]["loaded_at_ready"]) or "none"
+        print(f"{build:<16} {median['import']:>10.0f} {median['ready']:>10.0f} "
+              f"{median['background']:>14.0f}  {loaded}")
+        if args.importtime:
+            for micros, name in slowest_imports(stderr):
+                print(f"{'':<16} {micros / 1000:>10.1f}  {name}")
+
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Benchmark upload codecs: bytes and latency saved per utterance length.
+
+Encodes clips of several lengths with every available codec and reports
+size, encode time and the end-to-end upload time saved over plain WAV
+at a few uplink speeds, plus which codec CodecPolicy would pick.
+
+    python benchmarks/bench_upload_codecs.py
+    python benchmarks/bench_upload_codecs.py --wav my_recording.wav
+"""
+
+import argparse
+import array
+import math
+import random
+import sys
+import wave
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from audio_encoding import (  # noqa: E402
+    CODEC_WAV, CodecPolicy, PcmBuffer, available_codecs, encode,
+)
+
+RATE = 16000
+DURATIONS = [1, 3, 5, 10, 30, 60]
+UPLINKS_KBIT = [256, 1000, 5000, 20000]
+
+
+def synthetic_speech(seconds, seed=1):
+    """Voiced harmonics with a syllable-rate envelope, pauses and a little noise."""
+    rng = random.Random(seed)
+    samples = array.array("h")
+    pitch = 120.0
+    for n in range(int(seconds * RATE)):
+        t = n / RATE
+        if n % 1600 == 0:
+            pitch = min(max(pitch + rng.uniform(-15, 15), 90), 220)
+        envelope = max(0.0, math.sin(2 * math.pi * 4 * t)) * (0.2 if int(t) % 4 == 3 else 1.0)
+        voiced = sum(math.sin(2 * math.pi * pitch * k * t) / k for k in range(1, 6))
+        value = 6000 * envelope * voiced + rng.gauss(0, 150)
+        samples.append(int(max(-32768, min(32767, value))))
+    return samples.tobytes()
+
+
+def load_wav(path):
+    with wave.open(str(path), "rb") as wf:
+        if wf.getframerate() != RATE or wf.getnchannels() != 1 or wf.getsampwidth() != 2:
+            sys.exit("Expected 16 kHz mono 16-bit WAV")
+        return wf.readframes(wf.getnframes())
+
+
+def clip(source, seconds):
+    needed = int(seconds * RATE) * 2
+    data = source * (needed // len(source) + 1)
+    buffer = PcmBuffer(RATE, 1, 2)
+    buffer.append(data[:needed])
+    return buffer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--wav", help="16 kHz mono WAV to use instead of synthetic speech")
+    parser.add_argument("--repeat", type=int, default=3, help="encodes per measurement")
+    args = parser.parse_args()
+
+    source = load_wav(args.wav) if args.wav else synthetic_speech(10)
+    codecs = available_codecs()
+    if codecs == [CODEC_WAV]:
+        print("soundfile/libsndfile not installed: only WAV is available, nothing to compare.")
+        return
+    print(f"Codecs: {', '.join(codecs)}\n")
+
+    header = f"{'len':>5} {'codec':>5} {'bytes':>9} {'saved':>6} {'enc ms':>7}"
+    header += "".join(f" {f'{k}k saved':>12}" for k in UPLINKS_KBIT)
+    print(header)
+    print("-" * len(header))
+
+    policy = CodecPolicy()
+    for seconds in DURATIONS:
+        buffer = clip(source, seconds)
+        raw = len(buffer) + 44
+        for codec in codecs:
+            runs = [encode(buffer, codec) for _ in range(args.repeat)]
+            encoded = min(runs, key=lambda e: e.encode_seconds)
+            policy.record(encoded, seconds)
+            row = (f"{seconds:>4}s {codec:>5} {len(encoded):>9,} "
+                   f"{1 - len(encoded) / raw:>6.0%} {encoded.encode_seconds * 1000:>7.1f}")
+            for kbit in UPLINKS_KBIT:
+                throughput = kbit * 1000 / 8
+                saved = (raw - len(encoded)) / throughput - encoded.encode_seconds
+                row += f" {saved * 1000 + 0.0:>9.0f} ms"
+            print(row)
+        picks = [policy.choose(raw, seconds, kbit * 1000 / 8) for kbit in UPLINKS_KBIT]
+        print(f"{'':>5} policy picks: " + ", ".join(
+            f"{kbit}k={pick}" for kbit, pick in zip(UPLINKS_KBIT, picks)))
+        print()
+
+
+if __name__ == "__main__":
+    main()
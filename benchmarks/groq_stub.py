@@ -0,0 +1,246 @@
+"""
+Local stand-in for the Groq transcription API, for benchmarks and load tests.
+
+Implements POST /openai/v1/audio/transcriptions (plus HEAD / for the
+client's keep-alive pings) with scripted behaviour:
+
+    python benchmarks/groq_stub.py --port 8787
+    python benchmarks/groq_stub.py --latency 0.2,0.2,1.5 --per-second 0.01
+    python benchmarks/groq_stub.py --error-rate 0.05 --burst-429 50:5 --retry-after 2
+    python benchmarks/groq_stub.py --transcripts lines.txt --cert cert.pem --key key.pem
+
+Point the app at it with "api_base_url": "http://127.0.0.1:8787" (or
+https:// plus "api_ca_bundle" when serving TLS) in the config file.
+"""
+
+import argparse
+import itertools
+import json
+import random
+import ssl
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+TRANSCRIPTIONS_PATH = "/openai/v1/audio/transcriptions"
+WAV_BYTES_PER_SECOND = 16000 * 2  # 16 kHz mono 16-bit, what the app uploads uncompressed
+
+DEFAULT_TRANSCRIPTS = [
+    "Hello, this is a test of the voice typing pipeline.",
+    "Please send the quarterly report to the whole team by Friday.",
+    "Twenty five dollars and fifty cents, paid on the third of March.",
+    "Let me check on that and get back to you this afternoon.",
+    "The meeting moved to two thirty, same room as last week.",
+]
+
+
+class StubBehaviour:
+    """Decides latency, status and text for each request."""
+
+    def __init__(self, latency=(0.2,), jitter=0.0, per_second=0.0, tail=None,
+                 error_rate=0.0, burst_429=None, retry_after=1.0, limit=None,
+                 transcripts=None, seed=None):
+        self.latencies = itertools.cycle(latency)
+        self.jitter = jitter
+        self.per_second = per_second
+        self.tail = tail  # (probability, seconds)
+        self.error_rate = error_rate
+        self.burst_429 = burst_429  # (every, count)
+        self.retry_after = retry_after
+        self.limit = limit  # Requests per minute advertised in x-ratelimit-* headers
+        self.transcripts = itertools.cycle(transcripts or DEFAULT_TRANSCRIPTS)
+        self.random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._served = 0
+        self._burst_left = 0
+        self._window = []
+        self.counts = {"requests": 0, "ok": 0, "errors": 0, "throttled": 0}
+
+    def plan(self, upload_bytes):
+        """Return (delay seconds, status code, text, extra headers) for one request."""
+        with self._lock:
+            self.counts["requests"] += 1
+            now = time.monotonic()
+            self._window = [t for t in self._window if now - t < 60]
+            headers = {}
+            if self.limit:
+                remaining = max(self.limit - len(self._window) - 1, 0)
+                reset = 60 - (now - self._window[0]) if self._window else 60
+                headers["x-ratelimit-limit-requests"] = str(self.limit)
+                headers["x-ratelimit-remaining-requests"] = str(remaining)
+                headers["x-ratelimit-reset-requests"] = f"{reset:.2f}s"
+
+            throttled = False
+            if self._burst_left:
+                self._burst_left -= 1
+                throttled = True
+            elif self.limit and len(self._window) >= self.limit:
+                throttled = True
+            if throttled:
+                self.counts["throttled"] += 1
+                headers["retry-after"] = f"{self.retry_after:g}"
+                return 0.01, 429, None, headers
+
+            if self.random.random() < self.error_rate:
+                self.counts["errors"] += 1
+                return 0.05, self.random.choice([500, 502, 503]), None, headers
+
+            self._served += 1
+            self._window.append(now)
+            if self.burst_429 and self._served % self.burst_429[0] == 0:
+                self._burst_left = self.burst_429[1]
+            self.counts["ok"] += 1
+
+            delay = next(self.latencies) + self.per_second * upload_bytes / WAV_BYTES_PER_SECOND
+            if self.jitter:
+                delay += self.random.uniform(-self.jitter, self.jitter)
+            if self.tail and self.random.random() < self.tail[0]:
+                delay += self.tail[1]
+            return max(delay, 0.0), 200, next(self.transcripts), headers
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, like the real API
+    behaviour = None
+    quiet = True
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            length = self._drain_chunked()
+        else:
+            self.rfile.read(length)
+
+        if self.path.split("?")[0] != TRANSCRIPTIONS_PATH:
+            self._reply(404, {"error": {"message": "not found"}})
+            return
+        if not self.headers.get("Authorization", "").startswith("Bearer "):
+            self._reply(401, {"error": {"message": "missing API key"}})
+            return
+
+        delay, status, text, headers = self.behaviour.plan(length)
+        time.sleep(delay)
+        if status == 200:
+            self._reply(200, {"text": text}, headers)
+        else:
+            self._reply(status, {"error": {"message": f"stub error {status}"}}, headers)
+
+    def _drain_chunked(self):
+        total = 0
+        while True:
+            size = int(self.rfile.readline().strip() or b"0", 16)
+            if size == 0:
+                self.rfile.readline()
+                return total
+            self.rfile.read(size)
+            self.rfile.readline()
+            total += size
+
+    def _reply(self, status, body, headers=None):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, fmt, *args):
+        if not self.quiet:
+            super().log_message(fmt, *args)
+
+
+class StubServer:
+    """Run the stub on a background thread (used by the benchmark drivers)."""
+
+    def __init__(self, behaviour=None, host="127.0.0.1", port=0, certfile=None,
+                 keyfile=None, quiet=True):
+        handler = type("Handler", (StubHandler,),
+                       {"behaviour": behaviour or StubBehaviour(), "quiet": quiet})
+        self.behaviour = handler.behaviour
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self.scheme = "http"
+        if certfile:
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            context.load_cert_chain(certfile, keyfile)
+            self.httpd.socket = context.wrap_socket(self.httpd.socket, server_side=True)
+            self.scheme = "https"
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"{self.scheme}://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def _tail(value):
+    probability, seconds = value.split(":")
+    return float(probability), float(seconds)
+
+
+def _burst(value):
+    every, count = value.split(":")
+    return int(every), int(count)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--latency", default="0.2",
+                        help="seconds per request; a comma list is played in a loop")
+    parser.add_argument("--jitter", type=float, default=0.0, help="+/- uniform seconds")
+    parser.add_argument("--per-second", type=float, default=0.0,
+                        help="extra seconds per second of (WAV-equivalent) audio uploaded")
+    parser.add_argument("--tail", type=_tail, help="PROB:SECONDS extra delay, e.g. 0.05:2")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction answered with 5xx")
+    parser.add_argument("--burst-429", type=_burst, help="EVERY:COUNT 429s after every N successes")
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--limit", type=int, help="requests per minute before 429s")
+    parser.add_argument("--transcripts", help="text file, one canned transcript per line")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--cert", help="serve TLS with this certificate (PEM)")
+    parser.add_argument("--key", help="private key for --cert")
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    args = parser.parse_args()
+
+    transcripts = None
+    if args.transcripts:
+        with open(args.transcripts, encoding="utf-8") as f:
+            transcripts = [line.strip() for line in f if line.strip()]
+
+    behaviour = StubBehaviour(
+        latency=[float(x) for x in args.latency.split(",")], jitter=args.jitter,
+        per_second=args.per_second, tail=args.tail, error_rate=args.error_rate,
+        burst_429=args.burst_429, retry_after=args.retry_after, limit=args.limit,
+        transcripts=transcripts, seed=args.seed,
+    )
+    server = StubServer(behaviour, args.host, args.port, args.cert, args.key,
+                        quiet=not args.verbose)
+    print(f"Groq stub listening on {server.base_url}{TRANSCRIPTIONS_PATH}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"Served: {behaviour.counts}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+Shared HTTP client for the Groq transcription endpoint.
+
+One process-wide httpx.Client keeps a pooled, keep-alive (HTTP/2 when
+the h2 package is installed) connection to the API. The connection is
+opened as soon as the hotkey goes down and kept warm with lightweight
+HEAD pings while the app is idle, so DNS, TCP and TLS setup stay off the
+critical path after the key is released.
+
+base_url and verify are configurable so the client can be pointed at a
+local TLS stand-in server with its own CA bundle.
+
+Transcriptions go through a RequestScheduler that paces requests to the
+API's advertised rate limits and backs off on 429s.
+"""
+
+import logging
+import os
+import ssl
+import threading
+import time
+from pathlib import Path
+
+from request_scheduler import RequestScheduler
+
+log = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL = "https://api.groq.com"
+TRANSCRIPTIONS_PATH = "/openai/v1/audio/transcriptions"
+
+DEFAULT_TIMEOUT = 30
+DEFAULT_KEEPALIVE_INTERVAL = 30  # Seconds between idle pings
+DEFAULT_IDLE_LIMIT = 15 * 60  # Stop pinging after this long without a transcription
+
+
+class UplinkEstimator:
+    """Rough uplink throughput (bytes/s) learned from completed uploads.
+
+    A request's elapsed time also includes server processing, so the
+    fastest recent request is treated as fixed overhead and subtracted
+    before dividing. Small uploads tell us little about bandwidth and
+    are ignored.
+    """
+
+    MIN_SAMPLE_BYTES = 16 * 1024
+
+    def __init__(self):
+        self.throughput = None
+        self._floor = None
+
+    def record(self, num_bytes, seconds):
+        if seconds <= 0:
+            return
+        self._floor = seconds if self._floor is None else min(seconds, self._floor * 1.05)
+        if num_bytes < self.MIN_SAMPLE_BYTES:
+            return
+        sample = num_bytes / max(seconds - self._floor, 0.05)
+        if self.throughput is None:
+            self.throughput = sample
+        else:
+            self.throughput = 0.7 * self.throughput + 0.3 * sample
+
+
+def _http2_available():
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class GroqClient:
+    """Pooled, pre-warmed connection to a Groq-compatible API."""
+
+    def __init__(self, base_url=DEFAULT_BASE_URL, verify=True, timeout=DEFAULT_TIMEOUT,
+                 http2=True, keepalive_interval=DEFAULT_KEEPALIVE_INTERVAL,
+                 idle_limit=DEFAULT_IDLE_LIMIT, scheduler=None):
+        self.base_url = (base_url or DEFAULT_BASE_URL).rstrip("/")
+        # A CA bundle path is turned into a context (httpx deprecates path strings)
+        if isinstance(verify, (str, os.PathLike)):
+            verify = ssl.create_default_context(cafile=os.fspath(verify))
+        self.verify = verify
+        self.timeout = timeout
+        self.http2 = http2 and _http2_available()
+        self.keepalive_interval = keepalive_interval
+        self.idle_limit = idle_limit
+
+        self._client = None
+        self._lock = threading.Lock()
+        self._warming = False
+        self._last_used = 0.0  # Last real request
+        self._last_contact = 0.0  # Last request or ping
+        self._keepalive_thread = None
+        self._stopped = threading.Event()
+        self.uplink = UplinkEstimator()
+        self.scheduler = scheduler or RequestScheduler()
+
+    @property
+    def transcriptions_url(self):
+        return self.base_url + TRANSCRIPTIONS_PATH
+
+    @property
+    def client(self):
+        with self._lock:
+            if self._client is None:
+                import httpx  # ~100 ms to import, so not until the first request or ping
+                self._client = httpx.Client(
+                    http2=self.http2,
+                    timeout=self.timeout,
+                    verify=self.verify,
+                    limits=httpx.Limits(
+                        max_connections=8,
+                        max_keepalive_connections=4,
+                        # Outlive the ping interval so the pool never drops the socket itself
+                        keepalive_expiry=self.keepalive_interval * 2,
+                    ),
+                )
+            return self._client
+
+    def transcribe(self, api_key, audio, data, hedge=False):
+        """POST audio to the transcription endpoint and return the httpx.Response.
+
+        audio is a path to a file on disk, an EncodedAudio, or an
+        in-memory WAV buffer. hedge=True is for interactive requests,
+        where a slow answer is worth a duplicate request.
+        """
+        # Imported here so the client has no hard dependency on the audio modules
+        from audio_encoding import BufferReader, EncodedAudio
+
+        content_type = "audio/wav"
+        seconds = None  # Length of the clip, for the hedge deadline
+        if isinstance(audio, (str, os.PathLike)):
+            def open_audio():
+                return open(audio, "rb")
+            filename = Path(audio).name
+            size = os.path.getsize(audio)
+        elif isinstance(audio, EncodedAudio):
+            def open_audio():
+                return BufferReader(audio.data)
+            filename, content_type = audio.filename, audio.content_type
+            size = len(audio)
+            seconds = audio.duration
+        else:
+            def open_audio():
+                return BufferReader(audio)
+            filename = "audio.wav"
+            size = memoryview(audio).nbytes
+
+        headers = {"Authorization": f"Bearer {api_key}"}
+
+        def send():
+            # A fresh reader per attempt, since a retry re-reads from the start
+            start = time.monotonic()
+            with open_audio() as f:
+                files = {"file": (filename, f, content_type)}
+                response = self.client.post(self.transcriptions_url, headers=headers,
+                                            files=files, data=data)
+            self._last_used = self._last_contact = time.monotonic()
+            self.uplink.record(size, self._last_used - start)
+            return response
+
+        return self.scheduler.request(send, hedge=hedge, seconds=seconds)
+
+    def warm(self):
+        """Open (or refresh) the connection in the background. Safe to call often."""
+        if self._warming:
+            return
+        # A connection used within the last few seconds is certainly still open
+        if time.monotonic() - self._last_contact < 5:
+            return
+        self._warming = True
+        self._last_used = max(self._last_used, time.monotonic())
+        threading.Thread(target=self._ping, daemon=True).start()
+
+    def start_keepalive(self):
+        """Ping periodically while idle so the connection stays warm."""
+        if self._keepalive_thread is not None:
+            return
+        self._keepalive_thread = threading.Thread(target=self._keepalive_loop, daemon=True)
+        self._keepalive_thread.start()
+
+    def close(self):
+        self._stopped.set()
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+    def _ping(self):
+        try:
+            self.client.head(self.base_url + "/")
+            self._last_contact = time.monotonic()
+        except Exception as e:
+            log.warning(f"[http] Warm-up failed: {e}")
+        finally:
+            self._warming = False
+
+    def _keepalive_loop(self):
+        while not self._stopped.wait(self.keepalive_interval):
+            now = time.monotonic()
+            # Never pinged or used yet, or idle for too long: let the connection go
+            if not self._last_used or now - self._last_used > self.idle_limit:
+                continue
+            if now - self._last_contact >= self.keepalive_interval:
+                self._warming = True
+                self._ping()
@@ -0,0 +1,216 @@
+"""
+Full-text search over the transcription history.
+
+An inverted index maps every word to the entries containing it (and how
+often), built once in the background from the history file and then
+kept up to date as new transcriptions are appended. Queries look words
+up instead of scanning every entry:
+
+    invoice march          entries with both words, best matches first
+    recon*                 prefix: reconcile, reconciliation, ...
+    "send the report"      exact phrase
+    after:2024-03 before:2024-04-15 on:2024-05-02
+                           date range (day, month or year)
+
+Results are ranked with BM25 (ties go to the newer entry); a query with
+only dates lists the matching entries newest first. Long searches check
+a cancelled() callback so a newer query can stop an older one.
+"""
+
+import bisect
+import math
+import re
+import threading
+from array import array
+
+TOKEN = re.compile(r"\w+")
+QUERY_PART = re.compile(r'"([^"]*)"?|(after|before|on):(\S+)|(\S+)', re.IGNORECASE)
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+BUILD_CHUNK = 2000  # Entries read per lock hold while building
+CANCEL_CHECK = 2000  # Candidates scored between cancel checks
+
+
+class SearchCancelled(Exception):
+    pass
+
+
+def tokenize(text):
+    return TOKEN.findall(text.lower())
+
+
+class Query:
+    """A parsed search string."""
+
+    def __init__(self, text):
+        self.words = []  # Whole words
+        self.prefixes = []  # "recon*"
+        self.phrases = []  # Token lists that must appear in order
+        self.after = self.before = self.on = None
+        for match in QUERY_PART.finditer(text):
+            phrase, field, value, word = match.groups()
+            if phrase is not None:
+                tokens = tokenize(phrase)
+                if len(tokens) > 1:
+                    self.phrases.append(tokens)
+                self.words.extend(tokens)
+            elif field:
+                setattr(self, field.lower(), value)
+            elif word.endswith("*") and tokenize(word):
+                self.prefixes.append(tokenize(word)[0])
+            else:
+                self.words.extend(tokenize(word))
+
+    @property
+    def has_terms(self):
+        return bool(self.words or self.prefixes)
+
+    def in_range(self, timestamp):
+        if self.after and timestamp < self.after:
+            return False
+        if self.before and timestamp >= self.before:
+            return False
+        if self.on and not timestamp.startswith(self.on):
+            return False
+        return True
+
+
+class HistoryIndex:
+    """Inverted index over a HistoryStore, updated as entries are appended."""
+
+    def __init__(self, store):
+        self.store = store
+        self.postings = {}  # word -> (entry indexes, counts), indexes ascending
+        self.lengths = array("H")  # Words per entry
+        self.total_words = 0
+        self.count = 0  # Entries indexed so far
+        self.ready = threading.Event()
+        self._sorted_words = None  # For prefix lookups, rebuilt after new words arrive
+        self._generation = None
+        self._lock = threading.Lock()
+        self._started = False
+        store.listeners.append(self._on_append)
+
+    def build(self):
+        """Index every entry in the store. Safe to run on a background thread."""
+        with self._lock:
+            self.postings, self.lengths, self.total_words, self.count = {}, array("H"), 0, 0
+            self._sorted_words = None
+            self._generation = self.store.generation
+            self.ready.clear()
+        while True:
+            with self._lock:
+                if self.count >= len(self.store):
+                    self.ready.set()
+                    return self
+                for entry in self.store.page(self.count, BUILD_CHUNK, newest_first=False):
+                    self._add(entry.get("text", ""))
+
+    def start(self):
+        """Build in a daemon thread; searches wait for it to finish. Runs once."""
+        with self._lock:
+            if self._started:
+                return self
+            self._started = True
+        threading.Thread(target=self.build, daemon=True).start()
+        return self
+
+    def search(self, text, cancelled=None, wait=None):
+        """Entry indexes matching the query text, best first.
+
+        Raises SearchCancelled if cancelled() turns true along the way.
+        """
+        if self._generation != self.store.generation:
+            self.build()  # Compaction renumbered the entries
+        self.ready.wait(wait)
+        query = Query(text)
+
+        with self._lock:
+            if not query.has_terms:
+                return [i for i in range(self.count - 1, -1, -1)
+                        if query.in_range(self.store.timestamp(i))]
+
+            groups = [self._lookup_word(word) for word in dict.fromkeys(query.words)]
+            groups += [self._lookup_prefix(prefix) for prefix in query.prefixes]
+            groups.sort(key=lambda group: sum(len(docs) for docs, _ in group))
+            candidates = None
+            for group in groups:
+                docs = set()
+                for entries, _ in group:
+                    docs.update(entries)
+                candidates = docs if candidates is None else candidates & docs
+                if not candidates:
+                    return []
+
+            candidates = [i for i in candidates if query.in_range(self.store.timestamp(i))]
+            scores = dict.fromkeys(candidates, 0.0)
+            average = self.total_words / max(self.count, 1)
+            for group in groups:
+                for entries, counts in group:
+                    idf = math.log(1 + (self.count - len(entries) + 0.5) / (len(entries) + 0.5))
+                    for n, (i, tf) in enumerate(zip(entries, counts)):
+                        if i in scores:
+                            norm = 1 - BM25_B + BM25_B * self.lengths[i] / average
+                            scores[i] += idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * norm)
+                        if cancelled and n % CANCEL_CHECK == 0 and cancelled():
+                            raise SearchCancelled()
+
+        ranked = sorted(scores, key=lambda i: (scores[i], i), reverse=True)
+        if query.phrases:
+            ranked = self._with_phrases(ranked, query.phrases, cancelled)
+        return ranked
+
+    def _with_phrases(self, ranked, phrases, cancelled):
+        """Keep the candidates whose text has every phrase (this reads the texts)."""
+        result = []
+        for n, i in enumerate(ranked):
+            if cancelled and n % 100 == 0 and cancelled():
+                raise SearchCancelled()
+            tokens = tokenize(self.store.get(i).get("text", ""))
+            if all(_contains(tokens, phrase) for phrase in phrases):
+                result.append(i)
+        return result
+
+    def _lookup_word(self, word):
+        posting = self.postings.get(word)
+        return [posting] if posting else []
+
+    def _lookup_prefix(self, prefix):
+        if self._sorted_words is None:
+            self._sorted_words = sorted(self.postings)
+        words = self._sorted_words
+        start = bisect.bisect_left(words, prefix)
+        end = bisect.bisect_left(words, prefix + "\uffff")
+        return [self.postings[word] for word in words[start:end]]
+
+    def _add(self, text):
+        index = self.count
+        counts = {}
+        for token in tokenize(text):
+            counts[token] = counts.get(token, 0) + 1
+        for token, tf in counts.items():
+            posting = self.postings.get(token)
+            if posting is None:
+                posting = self.postings[token] = (array("i"), array("H"))
+                self._sorted_words = None
+            posting[0].append(index)
+            posting[1].append(min(tf, 65535))
+        length = sum(counts.values())
+        self.lengths.append(min(length, 65535))
+        self.total_words += length
+        self.count += 1
+
+    def _on_append(self, index, entry):
+        with self._lock:
+            # Before the build finishes it picks new entries up itself
+            if self.ready.is_set() and index == self.count:
+                self._add(entry.get("text", ""))
+
+
+def _contains(tokens, phrase):
+    first, size = phrase[0], len(phrase)
+    for start, token in enumerate(tokens):
+        if token == first and tokens[start:start + size] == phrase:
+            return True
+    return False
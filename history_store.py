@@ -0,0 +1,273 @@
+"""
+Append-only transcription history.
+
+History is a JSONL file with one record per utterance, oldest first.
+Saving a transcription appends one line, so the cost doesn't grow with
+the size of the history and a crash can at worst leave a torn last
+line, which the next load skips.
+
+append() doesn't touch the disk itself. The line is queued in memory
+(readable right away) and a background writer appends whatever has
+queued up in a single write on an O_APPEND descriptor, then fsyncs it.
+The price is a short crash window: entries appended since the writer's
+last fsync, normally a few milliseconds' worth, are lost if the process
+dies. close() writes out anything still queued.
+
+Only the byte offset and timestamp of each record are kept in memory;
+texts are read back from the file on demand (see page()), so years of
+dictation stay cheap to hold open. The file is rewritten (to a temp
+file, then renamed over the original) only to compact it: dropping torn
+or unreadable lines, or trimming to max_entries when a limit is set.
+
+The old ~/.voice-type-history.json (a JSON list, newest first) is
+migrated on first load.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from array import array
+
+log = logging.getLogger(__name__)
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+COMPACT_EVERY = 500  # Appends between checks whether a limited history needs trimming
+LIMIT_SLACK = 0.1  # Let a limited history grow this far past max_entries before trimming
+
+
+class HistoryStore:
+    """Append-only history file, indexed by position (0 = oldest)."""
+
+    def __init__(self, path, legacy_path=None, max_entries=None):
+        self.path = path
+        self.legacy_path = legacy_path
+        self.max_entries = max_entries
+        self._offsets = array("q")  # Byte offset of each record
+        self._timestamps = []
+        self._end = 0  # Byte offset where the next record goes
+        self._written = 0  # Byte offset where the queued (unwritten) records start
+        self._pending = bytearray()  # Records appended but not written yet
+        self._torn = 0  # Unreadable lines found by load()
+        self._appends = 0
+        self._reader = None
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()  # One file write at a time
+        self._changed = threading.Event()
+        self._closing = threading.Event()
+        self._compact_due = False
+        self._thread = None
+        self.listeners = []  # Called with (index, entry) after each append
+        self.generation = 0  # Bumped whenever entries are renumbered (load, compaction)
+        self.loaded = False
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def load(self):
+        """Index the history file (migrating the legacy file if needed)."""
+        with self._lock:
+            if not self.path.exists() and self.legacy_path and self.legacy_path.exists():
+                self._migrate()
+            self._index()
+            self.loaded = True
+        if self._torn or self._over_limit():
+            self.compact()
+        return self
+
+    def append(self, text, timestamp=None):
+        """Record one transcription; returns its index.
+
+        The entry is readable at once; the background writer saves it.
+        """
+        if not self.loaded:
+            self.load()
+        entry = {
+            "text": text,
+            "timestamp": timestamp or time.strftime(TIMESTAMP_FORMAT),
+            "words": len(text.split()),
+        }
+        line = (json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8")
+        with self._lock:
+            index = len(self._offsets)
+            self._offsets.append(self._end)
+            self._timestamps.append(entry["timestamp"])
+            self._pending += line
+            self._end += len(line)
+            self._appends += 1
+            if self._appends % COMPACT_EVERY == 0:
+                self._compact_due = True
+        self._schedule()
+        for listener in self.listeners:
+            listener(index, entry)
+        return index
+
+    def flush(self):
+        """Write queued entries to the file and fsync it."""
+        with self._write_lock:
+            with self._lock:
+                data = bytes(self._pending)
+            if not data:
+                return
+            try:
+                fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, "O_BINARY", 0), 0o600)
+                try:
+                    os.write(fd, data)
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+            except OSError as e:
+                log.warning(f"[history] Could not save: {e}")
+                return  # Still queued; the next flush tries again
+            with self._lock:
+                del self._pending[:len(data)]
+                self._written += len(data)
+
+    def get(self, index):
+        """The entry at index (0 = oldest), read from disk."""
+        with self._lock:
+            return self._read(index)
+
+    def page(self, start, count, newest_first=True):
+        """count entries starting at position start, newest first by default."""
+        with self._lock:
+            total = len(self._offsets)
+            if newest_first:
+                indexes = range(total - 1 - start, max(total - 1 - start - count, -1), -1)
+            else:
+                indexes = range(start, min(start + count, total))
+            return [self._read(i) for i in indexes if 0 <= i < total]
+
+    def timestamp(self, index):
+        return self._timestamps[index]
+
+    def __iter__(self):
+        """Entries oldest first, streamed from the file."""
+        self.flush()
+        with open(self.path, "rb") as f:
+            for raw in f:
+                entry = _parse(raw)
+                if entry is not None:
+                    yield entry
+
+    def compact(self):
+        """Rewrite the file without torn lines (and trimmed to max_entries)."""
+        with self._write_lock, self._lock:
+            keep = len(self._offsets)
+            if self._over_limit():
+                keep = self.max_entries
+            first = len(self._offsets) - keep
+            temp = self.path.with_name(self.path.name + ".tmp")
+            try:
+                with open(temp, "wb") as out:
+                    for index in range(first, len(self._offsets)):
+                        out.write(self._read_line(index))
+                    out.flush()
+                    os.fsync(out.fileno())
+                self._close_reader()
+                os.replace(temp, self.path)
+            except OSError as e:
+                log.warning(f"[history] Compaction failed: {e}")
+                return
+            dropped = first + self._torn
+            self._index()
+        log.info(f"[history] Compacted: {len(self._offsets)} entries kept, {dropped} dropped")
+
+    def close(self):
+        """Stop the background writer, write what is queued and close the file."""
+        self._closing.set()
+        self._changed.set()
+        if self._thread is not None:
+            self._thread.join()  # Lets a compaction in progress finish
+        self.flush()
+        with self._lock:
+            self._close_reader()
+
+    def _schedule(self):
+        self._changed.set()
+        with self._lock:
+            if self._thread is None and not self._closing.is_set():
+                self._thread = threading.Thread(target=self._writer, daemon=True)
+                self._thread.start()
+
+    def _writer(self):
+        while not self._closing.is_set():
+            self._changed.wait()
+            self._changed.clear()
+            # Appends that arrive during the write go out together in the next one
+            self.flush()
+            if self._compact_due:
+                self._compact_due = False
+                if self._over_limit():
+                    self.compact()
+
+    def _over_limit(self):
+        return bool(self.max_entries) and len(self._offsets) > self.max_entries * (1 + LIMIT_SLACK)
+
+    def _index(self):
+        offsets = array("q")
+        timestamps = []
+        torn = 0
+        position = 0
+        try:
+            with open(self.path, "rb") as f:
+                for raw in f:
+                    entry = _parse(raw) if raw.endswith(b"\n") else None
+                    if entry is None:
+                        torn += 1
+                    else:
+                        offsets.append(position)
+                        timestamps.append(entry.get("timestamp", ""))
+                    position += len(raw)
+        except FileNotFoundError:
+            pass
+        if torn:
+            log.warning(f"[history] Skipped {torn} unreadable line(s) in {self.path}")
+        self._offsets, self._timestamps, self._torn, self._end = offsets, timestamps, torn, position
+        self._written = position
+        self._pending = bytearray()
+        self.generation += 1
+        self._close_reader()
+
+    def _read_line(self, index):
+        offset = self._offsets[index]
+        if offset >= self._written:
+            # Still queued for the writer
+            start = offset - self._written
+            return bytes(self._pending[start:self._pending.index(b"\n", start) + 1])
+        if self._reader is None:
+            self._reader = open(self.path, "rb")
+        self._reader.seek(offset)
+        return self._reader.readline()
+
+    def _read(self, index):
+        return _parse(self._read_line(index)) or {}
+
+    def _close_reader(self):
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+
+    def _migrate(self):
+        try:
+            entries = json.loads(self.legacy_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            log.warning(f"[history] Could not read {self.legacy_path}: {e}")
+            return
+        temp = self.path.with_name(self.path.name + ".tmp")
+        with open(temp, "wb") as out:
+            for entry in reversed(entries):  # The old file was newest first
+                out.write((json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8"))
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(temp, self.path)
+        log.info(f"[history] Migrated {len(entries)} entries from {self.legacy_path}")
+
+
+def _parse(raw):
+    try:
+        entry = json.loads(raw)
+    except ValueError:
+        return None
+    return entry if isinstance(entry, dict) else None
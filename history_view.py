@@ -0,0 +1,137 @@
+"""
+Virtualized list of history entries for the history window.
+
+The Listbox only ever holds the rows that fit on screen. The list being
+shown (all of history, or search results) is a sequence of history
+indexes; scrolling moves a window over it and redraws just those rows,
+reading their text from the history store as they come into view. The
+scrollbar is driven by hand from the window position, so opening the
+window and scrolling cost the same with a hundred entries or a hundred
+thousand.
+"""
+
+import tkinter as tk
+from tkinter import font as tkfont
+
+PREVIEW_CHARS = 50
+WHEEL_ROWS = 3  # Rows per mouse wheel notch
+CACHE_ROWS = 2000  # Formatted rows kept before the cache is cleared
+
+
+class HistoryList:
+    """Scrollable view onto a sequence of history indexes."""
+
+    def __init__(self, parent, store, bg, **listbox_options):
+        self.store = store
+        self.rows = ()  # History indexes, in display order (any sequence: list, range)
+        self.top = 0  # Position in rows of the first visible row
+        self.visible = 1  # Rows that fit in the Listbox
+        self.selected = None  # History index of the selected entry
+        self._lines = {}  # History index -> formatted row
+        self._generation = store.generation
+
+        self.frame = tk.Frame(parent, bg=bg)
+        self.scrollbar = tk.Scrollbar(self.frame, command=self._on_scrollbar)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.listbox = tk.Listbox(self.frame, selectmode=tk.SINGLE, exportselection=False,
+                                  **listbox_options)
+        self.listbox.pack(fill=tk.BOTH, expand=True)
+        self._row_height = tkfont.Font(font=self.listbox.cget("font")).metrics("linespace") + 1
+
+        self.listbox.bind("<Configure>", self._on_resize)
+        self.listbox.bind("<<ListboxSelect>>", self._on_select)
+        self.listbox.bind("<MouseWheel>", lambda e: self.scroll(-e.delta // 120 * WHEEL_ROWS))
+        self.listbox.bind("<Button-4>", lambda e: self.scroll(-WHEEL_ROWS))
+        self.listbox.bind("<Button-5>", lambda e: self.scroll(WHEEL_ROWS))
+        self.listbox.bind("<Up>", lambda e: self._move_selection(-1))
+        self.listbox.bind("<Down>", lambda e: self._move_selection(1))
+        self.listbox.bind("<Prior>", lambda e: self._move_selection(-self.visible))
+        self.listbox.bind("<Next>", lambda e: self._move_selection(self.visible))
+
+    def pack(self, **options):
+        self.frame.pack(**options)
+
+    def set_rows(self, rows):
+        """Show a new sequence of history indexes, scrolled to the top."""
+        self.rows = rows
+        self.top = 0
+        self.selected = None
+        self.redraw()
+
+    def scroll(self, delta):
+        self.scroll_to(self.top + delta)
+        return "break"
+
+    def scroll_to(self, top):
+        top = max(0, min(top, len(self.rows) - self.visible))
+        if top != self.top:
+            self.top = top
+            self.redraw()
+
+    def redraw(self):
+        """Refill the Listbox with the visible rows (and only those)."""
+        if self.store.generation != self._generation:
+            self._lines.clear()  # Compaction renumbered the entries
+            self._generation = self.store.generation
+        if len(self._lines) > CACHE_ROWS:
+            self._lines.clear()
+        window = self.rows[self.top:self.top + self.visible]
+        self.listbox.delete(0, tk.END)
+        if window:
+            self.listbox.insert(tk.END, *[self._line(index) for index in window])
+        if self.selected is not None:
+            for row, index in enumerate(window):
+                if index == self.selected:
+                    self.listbox.selection_set(row)
+                    break
+        self.listbox.yview_moveto(0)
+        total = len(self.rows)
+        if total:
+            self.scrollbar.set(self.top / total, min(self.top + self.visible, total) / total)
+        else:
+            self.scrollbar.set(0, 1)
+
+    def _line(self, index):
+        line = self._lines.get(index)
+        if line is None:
+            entry = self.store.get(index)
+            text = entry.get("text", "")
+            preview = text[:PREVIEW_CHARS] + ("..." if len(text) > PREVIEW_CHARS else "")
+            line = self._lines[index] = f"[{entry.get('timestamp', '')}] {preview}"
+        return line
+
+    def _on_resize(self, event):
+        visible = max(1, event.height // self._row_height)
+        if visible != self.visible:
+            self.visible = visible
+            self.top = max(0, min(self.top, len(self.rows) - visible))
+            self.redraw()
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == tk.MOVETO:
+            self.scroll_to(int(float(amount) * len(self.rows)))
+        elif unit == tk.PAGES:
+            self.scroll(int(amount) * self.visible)
+        else:
+            self.scroll(int(amount))
+
+    def _on_select(self, event):
+        selection = self.listbox.curselection()
+        if selection and self.top + selection[0] < len(self.rows):
+            self.selected = self.rows[self.top + selection[0]]
+
+    def _move_selection(self, delta):
+        if not self.rows:
+            return "break"
+        position = self.top
+        if self.selected is not None:
+            selection = self.listbox.curselection()
+            position = self.top + (selection[0] if selection else 0) + delta
+        position = max(0, min(position, len(self.rows) - 1))
+        self.selected = self.rows[position]
+        if position < self.top:
+            self.top = position
+        elif position >= self.top + self.visible:
+            self.top = position - self.visible + 1
+        self.redraw()
+        return "break"
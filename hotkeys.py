@@ -0,0 +1,115 @@
+"""
+Event-driven hotkeys for both builds.
+
+Keys are watched with keyboard hooks instead of polling is_pressed():
+the hook thread calls back when a key goes down and when it comes up,
+and nothing runs at all while no key is touched. Auto-repeat is
+filtered out, so on_press fires once per press and on_release once the
+key (every variant of it: left and right shift, say) has been let go.
+is_held() answers from the same event state without asking the OS.
+
+Callbacks run on the keyboard hook thread and must return quickly;
+anything slow belongs on a thread of its own. Keystrokes the app sends
+itself (pasting, Quicken typing) should be wrapped in paused() so a
+synthetic shift doesn't start a recording.
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+import keyboard
+
+log = logging.getLogger(__name__)
+
+
+class _Binding:
+    def __init__(self, key, on_press, on_release, hotkeys):
+        self.key = key
+        self.on_press = on_press
+        self.on_release = on_release
+        self.hotkeys = hotkeys
+        self.down = set()  # Scan codes of this key currently held
+        self.hook = None
+
+    def handle(self, event):
+        if event.event_type == keyboard.KEY_DOWN:
+            first = not self.down
+            self.down.add(event.scan_code)
+            if first and self.on_press and not self.hotkeys.is_paused(event.time):
+                self._call(self.on_press)
+        elif event.scan_code in self.down:
+            self.down.discard(event.scan_code)
+            if not self.down and self.on_release:
+                self._call(self.on_release)
+
+    def _call(self, callback):
+        try:
+            callback()
+        except Exception as e:
+            log.error(f"[hotkey] {self.key} handler failed: {e}")
+
+
+class Hotkeys:
+    """Press and release callbacks for a set of keys."""
+
+    def __init__(self):
+        self._bindings = {}
+        self._lock = threading.Lock()
+        self._paused = 0
+        self._resumed_at = 0.0
+
+    def bind(self, key, on_press=None, on_release=None):
+        """Call on_press when key goes down and on_release when it comes back up."""
+        self.unbind(key)
+        binding = _Binding(key, on_press, on_release, self)
+        binding.hook = keyboard.hook_key(key, binding.handle)
+        with self._lock:
+            self._bindings[key] = binding
+        log.debug(f"[hotkey] Bound {key}")
+
+    def unbind(self, key):
+        with self._lock:
+            binding = self._bindings.pop(key, None)
+        if binding is not None:
+            try:
+                keyboard.unhook(binding.hook)
+            except (KeyError, ValueError):
+                pass
+
+    def rebind(self, old_key, new_key):
+        """Move the callbacks bound to old_key over to new_key.
+
+        Raises ValueError for a key name the keyboard library doesn't know,
+        leaving old_key bound.
+        """
+        binding = self._bindings.get(old_key)
+        if binding is None or old_key == new_key:
+            return
+        self.bind(new_key, binding.on_press, binding.on_release)
+        self.unbind(old_key)
+
+    def is_held(self, key):
+        binding = self._bindings.get(key)
+        return bool(binding and binding.down)
+
+    @contextmanager
+    def paused(self):
+        """Ignore presses (but keep tracking releases) for keystrokes the app sends itself."""
+        with self._lock:
+            self._paused += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._paused -= 1
+                # Hook events are delivered a little late; ones stamped before now are ours
+                self._resumed_at = time.time()
+
+    def is_paused(self, event_time=None):
+        return self._paused > 0 or (event_time is not None and event_time <= self._resumed_at)
+
+    def close(self):
+        for key in list(self._bindings):
+            self.unbind(key)
@@ -0,0 +1,189 @@
+"""
+Per-stage latency tracing for utterances.
+
+Each push-to-talk press gets a Trace of monotonic timestamps, one per
+stage (hotkey down, first frame, hotkey up, encode, request, response,
+each text-pipeline step, paste). The trace is bound to the thread doing
+the work, so code along the way just calls mark("stage") without having
+the trace passed in; on threads with no active trace it does nothing.
+
+Segments of a long dictation are transcribed on worker threads while
+the recording thread keeps marking its own stages. Each segment call
+gets a child trace of its own (see per_segment()), so the main stages
+are measured only between marks of the recording thread, and segment
+stages are reported separately as "segment:<stage>".
+
+Finished traces are appended to a small rolling JSONL file, and the
+recent ones are kept in memory so the settings window can show rolling
+p50/p95/p99 per stage.
+"""
+
+import json
+import logging
+import math
+import threading
+import time
+from collections import deque
+
+log = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 1024 * 1024  # Rotate the trace file at 1 MB
+DEFAULT_WINDOW = 500  # Traces kept for the rolling percentiles
+
+_local = threading.local()
+
+
+class Trace:
+    """Timestamps for the stages of one utterance."""
+
+    def __init__(self):
+        self.started = time.time()
+        self.marks = []  # (stage, monotonic seconds), in order
+        self.segments = []  # Child traces, one per segment transcribed on a worker
+
+    def mark(self, stage):
+        self.marks.append((stage, time.monotonic()))
+
+    def segment(self, stage="segment_start"):
+        """Start a child trace for one segment and return it."""
+        child = Trace()
+        child.mark(stage)
+        self.segments.append(child)
+        return child
+
+    def durations(self):
+        """Seconds spent reaching each stage from the one before it (this trace's marks only)."""
+        result = {}
+        for (_, previous), (stage, at) in zip(self.marks, self.marks[1:]):
+            result[stage] = result.get(stage, 0.0) + at - previous
+        at = dict(self.marks)
+        if "hotkey_up" in at and "paste" in at:
+            result["release_to_paste"] = at["paste"] - at["hotkey_up"]
+        return result
+
+    def all_durations(self):
+        """durations() of this trace, then one dict per segment with "segment:" stage names."""
+        return [self.durations()] + [
+            {f"segment:{stage}": seconds for stage, seconds in child.durations().items()}
+            for child in list(self.segments)]
+
+    def to_dict(self):
+        origin = self.marks[0][1] if self.marks else 0.0
+        entry = {
+            "started": round(self.started, 3),
+            "marks": [[stage, round((at - origin) * 1000, 2)] for stage, at in self.marks],
+        }
+        if self.segments:
+            entry["segments"] = [[[stage, round((at - origin) * 1000, 2)] for stage, at in child.marks]
+                                 for child in list(self.segments)]
+        return entry
+
+    @classmethod
+    def from_dict(cls, entry):
+        trace = cls()
+        trace.started = entry.get("started", 0.0)
+        trace.marks = [(stage, ms / 1000) for stage, ms in entry.get("marks", [])]
+        for marks in entry.get("segments", []):
+            child = cls()
+            child.marks = [(stage, ms / 1000) for stage, ms in marks]
+            trace.segments.append(child)
+        return trace
+
+
+def start(stage="start"):
+    """Begin a new trace on the current thread and return it."""
+    trace = Trace()
+    trace.mark(stage)
+    _local.trace = trace
+    return trace
+
+
+def current():
+    return getattr(_local, "trace", None)
+
+
+def mark(stage):
+    """Mark a stage on the current thread's trace, if there is one."""
+    trace = getattr(_local, "trace", None)
+    if trace is not None:
+        trace.mark(stage)
+
+
+def per_segment(trace, func):
+    """Wrap func so each call records into a new child trace of trace,
+    on whichever thread runs it."""
+    def call(*args, **kwargs):
+        previous = getattr(_local, "trace", None)
+        _local.trace = trace.segment()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _local.trace = previous
+    return call
+
+
+def finish(log=None):
+    """Detach the current thread's trace and record it in log."""
+    trace = getattr(_local, "trace", None)
+    _local.trace = None
+    if trace is not None and log is not None and len(trace.marks) > 1:
+        log.record(trace)
+    return trace
+
+
+def percentile(values, p):
+    """Nearest-rank percentile of an already sorted list."""
+    index = min(len(values) - 1, max(0, math.ceil(p / 100 * len(values)) - 1))
+    return values[index]
+
+
+class TraceLog:
+    """Rolling trace file plus the recent per-stage durations."""
+
+    def __init__(self, path, max_bytes=DEFAULT_MAX_BYTES, window=DEFAULT_WINDOW):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._recent = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._load()
+
+    def record(self, trace):
+        entry = trace.to_dict()
+        with self._lock:
+            self._recent.append(trace.all_durations())
+            try:
+                if self.path.exists() and self.path.stat().st_size > self.max_bytes:
+                    self.path.replace(self.path.with_name(self.path.name + ".1"))
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(entry) + "\n")
+            except OSError as e:
+                log.warning(f"[trace] Could not write {self.path}: {e}")
+
+    def stage_percentiles(self, ps=(50, 95, 99)):
+        """{stage: (count, [ms at each percentile])} over the recent traces, in stage order."""
+        with self._lock:
+            recent = list(self._recent)
+        samples = {}
+        for trace_durations in recent:
+            for durations in trace_durations:
+                for stage, seconds in durations.items():
+                    samples.setdefault(stage, []).append(seconds * 1000)
+        result = {}
+        for stage, values in samples.items():
+            values.sort()
+            result[stage] = (len(values), [percentile(values, p) for p in ps])
+        return result
+
+    def _load(self):
+        # Seed the rolling window from the file so stats survive a restart
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                lines = deque(f, maxlen=self._recent.maxlen)
+        except OSError:
+            return
+        for line in lines:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            self._recent.append(Trace.from_dict(entry).all_durations())
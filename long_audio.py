@@ -0,0 +1,205 @@
+"""
+Chunked, parallel transcription of long audio files.
+
+A single request for an hour-long recording either exceeds the upload
+limit or times out. Instead the file is decoded to PCM, split into
+windows that end at the quietest point near each boundary, and the
+windows are transcribed concurrently on a bounded worker pool. Each
+window runs a couple of seconds past its cut so no word is lost at the
+seam; the duplicated words are removed again when the texts are
+stitched.
+
+Decoding uses ffmpeg when it is on PATH (any format, resampled to 16 kHz
+mono) and falls back to the optional soundfile package.
+"""
+
+import logging
+import re
+import shutil
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from audio_encoding import PcmBuffer
+from audio_levels import measure
+
+log = logging.getLogger(__name__)
+
+try:
+    import soundfile
+except (ImportError, OSError):
+    soundfile = None
+
+SAMPLE_RATE = 16000
+DEFAULT_WINDOW = 120.0  # Seconds of audio per request
+DEFAULT_OVERLAP = 2.0  # Seconds each window runs past its cut
+DEFAULT_SEARCH = 10.0  # Look this far back from a boundary for a pause
+DEFAULT_WORKERS = 4
+DEFAULT_RETRIES = 2
+MAX_OVERLAP_WORDS = 30
+
+
+def decode(path, rate=SAMPLE_RATE):
+    """Decode an audio file to a mono 16-bit PcmBuffer, or None if it can't be read."""
+    if shutil.which("ffmpeg"):
+        try:
+            return _decode_ffmpeg(path, rate)
+        except Exception as e:
+            log.warning(f"[long-audio] ffmpeg could not decode {path}: {e}")
+    if soundfile is not None:
+        try:
+            return _decode_soundfile(path)
+        except Exception as e:
+            log.warning(f"[long-audio] soundfile could not decode {path}: {e}")
+    return None
+
+
+def _decode_ffmpeg(path, rate):
+    proc = subprocess.Popen(
+        ["ffmpeg", "-nostdin", "-v", "error", "-i", str(path),
+         "-f", "s16le", "-acodec", "pcm_s16le", "-ac", "1", "-ar", str(rate), "-"],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+    )
+    buffer = PcmBuffer(rate, 1, 2)
+    while True:
+        data = proc.stdout.read(1 << 16)
+        if not data:
+            break
+        buffer.append(data)
+    _, stderr = proc.communicate()
+    if proc.returncode != 0:
+        raise RuntimeError(stderr.decode(errors="replace").strip() or f"exit {proc.returncode}")
+    return buffer
+
+
+def _decode_soundfile(path):
+    # Keeps the file's own sample rate; Whisper resamples server-side
+    samples, rate = soundfile.read(str(path), dtype="int16", always_2d=True)
+    if samples.shape[1] > 1:
+        samples = samples.mean(axis=1).astype("int16")
+    buffer = PcmBuffer(rate, 1, 2)
+    buffer.append(samples.tobytes())
+    return buffer
+
+
+def plan_windows(buffer, window=DEFAULT_WINDOW, overlap=DEFAULT_OVERLAP,
+                 search=DEFAULT_SEARCH):
+    """Split a PcmBuffer into overlapping (start, end) byte ranges cut at pauses."""
+    bytes_per_second = buffer.rate * buffer.channels * buffer.sample_width
+    frame = buffer.channels * buffer.sample_width
+    total = len(buffer)
+    window_bytes = int(window * bytes_per_second) // frame * frame
+    overlap_bytes = int(overlap * bytes_per_second) // frame * frame
+    if total <= window_bytes + overlap_bytes:
+        return [(0, total)]
+
+    pcm = buffer.pcm()
+    # 100 ms frames are short enough to land between words
+    step = max(bytes_per_second // 10 // frame, 1) * frame
+    search_bytes = int(search * bytes_per_second)
+
+    cuts = [0]
+    while total - cuts[-1] > window_bytes + overlap_bytes:
+        target = cuts[-1] + window_bytes
+        lo = max(target - search_bytes, cuts[-1] + step)
+        quietest, cut = None, target
+        for offset in range(lo, target, step):
+            rms = measure(pcm[offset:offset + step])[1]
+            if quietest is None or rms < quietest:
+                quietest, cut = rms, offset + step // 2 // frame * frame
+        cuts.append(cut)
+    cuts.append(total)
+    pcm.release()
+
+    return [(start, min(end + overlap_bytes, total)) for start, end in zip(cuts, cuts[1:])]
+
+
+def _normalize(word):
+    return re.sub(r"\W", "", word.lower())
+
+
+def stitch(texts, max_overlap=MAX_OVERLAP_WORDS):
+    """Join window texts in order, dropping words repeated across each seam."""
+    words = []
+    for text in texts:
+        tokens = (text or "").split()
+        if not tokens:
+            continue
+        tail = [_normalize(w) for w in words[-max_overlap:]]
+        head = [_normalize(w) for w in tokens[:max_overlap]]
+        # Longest run of at least two words that ends the text so far and starts this one
+        for k in range(min(len(tail), len(head)), 1, -1):
+            if tail[-k:] == head[:k]:
+                tokens = tokens[k:]
+                break
+        words.extend(tokens)
+    return " ".join(words)
+
+
+def transcribe_file(path, transcribe, workers=DEFAULT_WORKERS, window=DEFAULT_WINDOW,
+                    overlap=DEFAULT_OVERLAP, retries=DEFAULT_RETRIES, progress=None):
+    """Decode and transcribe a long file window by window.
+
+    Returns (text, error), or (None, None) if the file could not be
+    decoded and should be sent as-is instead.
+    """
+    buffer = decode(path)
+    if buffer is None:
+        return None, None
+    return transcribe_pcm(buffer, transcribe, workers, window, overlap, retries, progress)
+
+
+def transcribe_pcm(buffer, transcribe, workers=DEFAULT_WORKERS, window=DEFAULT_WINDOW,
+                   overlap=DEFAULT_OVERLAP, retries=DEFAULT_RETRIES, progress=None):
+    """Transcribe a decoded PcmBuffer window by window.
+
+    transcribe is called with a PcmBuffer per window and returns
+    (text, error). progress, if given, is called as progress(done,
+    total, retrying) from worker threads. Returns (text, error).
+    """
+    windows = plan_windows(buffer, window, overlap)
+    log.info(f"[long-audio] {buffer.duration:.0f}s in {len(windows)} window(s), "
+             f"{min(workers, len(windows))} at a time")
+
+    if len(windows) == 1:
+        pieces = [buffer]
+    else:
+        pcm = buffer.pcm()
+        pieces = []
+        for start, end in windows:
+            piece = PcmBuffer(buffer.rate, buffer.channels, buffer.sample_width)
+            piece.append(pcm[start:end])
+            pieces.append(piece)
+        pcm.release()
+
+    done = 0
+
+    def run(index):
+        for attempt in range(retries + 1):
+            text, error = transcribe(pieces[index])
+            if not error:
+                return text
+            log.warning(f"[long-audio] Window {index + 1} failed ({error}), attempt {attempt + 1}")
+            if attempt < retries:
+                if progress:
+                    progress(done, len(pieces), index + 1)
+                time.sleep(2 ** attempt)
+        raise RuntimeError(f"window {index + 1}: {error}")
+
+    texts = [None] * len(pieces)
+    start_time = time.time()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="long-audio") as pool:
+        futures = {pool.submit(run, i): i for i in range(len(pieces))}
+        try:
+            for future in as_completed(futures):
+                texts[futures[future]] = future.result()
+                done += 1
+                if progress:
+                    progress(done, len(pieces), None)
+        except Exception as e:
+            for future in futures:
+                future.cancel()
+            return None, str(e)
+
+    log.info(f"[long-audio] Done in {time.time() - start_time:.1f}s")
+    return stitch(texts), None
@@ -0,0 +1,216 @@
+"""
+Spoken numbers to digits for accounting mode.
+
+One compiled regex finds each run of number words in a single scan
+("twenty five", "one hundred and six", "three point one four",
+"forty two dollars and fifty cents"), and a small parser turns the run
+into digits:
+
+    "twenty five"                       -> "25"
+    "one hundred and six"               -> "106"
+    "two million three hundred thousand" -> "2300000"
+    "three point one four"              -> "3.14"
+    "forty two dollars and fifty cents" -> "$42.50"
+    "fifteen percent"                   -> "15%"
+
+Words that can't extend the number in progress start a new one, so
+"one two three" is still "1 2 3". Scale words need a number in front of
+them ("hundreds of people" and "a hundred" are left alone). Digits come
+out without separators; add_thousands_separators() adds the commas.
+"""
+
+import re
+
+UNITS = {
+    "zero": 0, "one": 1, "two": 2, "three": 3, "four": 4,
+    "five": 5, "six": 6, "seven": 7, "eight": 8, "nine": 9,
+}
+TEENS = {
+    "ten": 10, "eleven": 11, "twelve": 12, "thirteen": 13, "fourteen": 14,
+    "fifteen": 15, "sixteen": 16, "seventeen": 17, "eighteen": 18, "nineteen": 19,
+}
+TENS = {
+    "twenty": 20, "thirty": 30, "forty": 40, "fourty": 40, "fifty": 50,
+    "sixty": 60, "seventy": 70, "eighty": 80, "ninety": 90,
+}
+SCALES = {"thousand": 10 ** 3, "million": 10 ** 6, "billion": 10 ** 9}
+HUNDRED = "hundred"
+
+# Words that only mean something after a number
+CONNECTORS = ("and", "point", "dollars", "dollar", "cents", "cent", "percent", "per")
+
+_NUMBER_WORDS = sorted([*UNITS, *TEENS, *TENS, *SCALES, HUNDRED], key=len, reverse=True)
+_ALL_WORDS = sorted([*_NUMBER_WORDS, *CONNECTORS], key=len, reverse=True)
+
+# A run starts on a number word and continues over number words and connectors
+RUN_PATTERN = re.compile(
+    r"(?<![A-Za-z])(?:{num})(?:[\s-]+(?:{word}))*(?![A-Za-z])".format(
+        num="|".join(_NUMBER_WORDS), word="|".join(_ALL_WORDS)),
+    re.IGNORECASE,
+)
+_TOKEN = re.compile(r"[A-Za-z]+")
+THOUSANDS_PATTERN = re.compile(r"(?<![\w.])\d{4,}\b")
+
+
+class _Number:
+    """Cardinal being built up from words, e.g. two / million / three / hundred."""
+
+    def __init__(self, word):
+        self.total = 0  # Finished scale groups ("two million")
+        self.current = UNITS.get(word) or TEENS.get(word) or TENS.get(word) or 0  # Group in progress
+        self.last = _kind(word)
+        self.last_scale = None
+
+    @property
+    def value(self):
+        return self.total + self.current
+
+    def extend(self, word):
+        """Add word to the number if it continues it; False if it starts a new one."""
+        kind = _kind(word)
+        last = self.last
+        if kind == "unit":
+            ok = last in ("tens", "hundred", "scale")
+            value = UNITS[word]
+        elif kind in ("teen", "tens"):
+            ok = last in ("hundred", "scale")
+            value = TEENS.get(word) or TENS.get(word)
+        elif kind == "hundred":
+            ok = last in ("unit", "teen", "tens") and 0 < self.current < 100
+            if ok:
+                self.current *= 100
+                self.last = kind
+            return ok
+        elif kind == "scale":
+            scale = SCALES[word]
+            ok = (last in ("unit", "teen", "tens", "hundred") and self.current > 0
+                  and (self.last_scale is None or scale < self.last_scale))
+            if ok:
+                self.total += self.current * scale
+                self.current = 0
+                self.last_scale = scale
+                self.last = kind
+            return ok
+        else:
+            return False
+        if ok:
+            self.current += value
+            self.last = kind
+        return ok
+
+
+def _kind(word):
+    if word == "zero":
+        return "zero"
+    if word in UNITS:
+        return "unit"
+    if word in TEENS:
+        return "teen"
+    if word in TENS:
+        return "tens"
+    if word == HUNDRED:
+        return "hundred"
+    if word in SCALES:
+        return "scale"
+    return None
+
+
+def _parse_run(run):
+    """Digits for one run of words; words the parser can't use are kept as spoken."""
+    tokens = [(m.group(0).lower(), m.start(), m.end()) for m in _TOKEN.finditer(run)]
+    out = []
+    position = 0  # End of the text already copied to out
+    i = 0
+
+    def emit(start, end, replacement):
+        nonlocal position
+        out.append(run[position:start])
+        out.append(replacement)
+        position = end
+
+    while i < len(tokens):
+        word, start, end = tokens[i]
+        if _kind(word) in (None, "hundred", "scale"):
+            i += 1  # Connector or scale with no number in front: leave it
+            continue
+
+        number = _Number(word)
+        j = i + 1
+        while j < len(tokens):
+            word_j = tokens[j][0]
+            # "one hundred and six": "and" is skipped only when a number part follows
+            if (word_j == "and" and j + 1 < len(tokens) and number.last in ("hundred", "scale")
+                    and _kind(tokens[j + 1][0]) in ("unit", "teen", "tens")
+                    and number.extend(tokens[j + 1][0])):
+                j += 2
+                continue
+            if not number.extend(word_j):
+                break
+            j += 1
+        end = tokens[j - 1][2]
+        text = str(number.value)
+
+        # "three point one four"
+        if j + 1 < len(tokens) and tokens[j][0] == "point" and tokens[j + 1][0] in UNITS:
+            digits = []
+            j += 1
+            while j < len(tokens) and tokens[j][0] in UNITS:
+                digits.append(str(UNITS[tokens[j][0]]))
+                end = tokens[j][2]
+                j += 1
+            text += "." + "".join(digits)
+
+        # "fifteen percent" / "fifteen per cent"
+        if j < len(tokens) and tokens[j][0] == "percent":
+            text += "%"
+            end = tokens[j][2]
+            j += 1
+        elif j + 1 < len(tokens) and tokens[j][0] == "per" and tokens[j + 1][0] in ("cent", "cents"):
+            text += "%"
+            end = tokens[j + 1][2]
+            j += 2
+
+        # "forty two dollars" / "forty two dollars and fifty cents"
+        elif j < len(tokens) and tokens[j][0] in ("dollar", "dollars") and "." not in text:
+            end = tokens[j][2]
+            j += 1
+            cents = _cents(tokens, j)
+            if cents:
+                value, j = cents
+                end = tokens[j - 1][2]
+                text += ".%02d" % value
+            text = "$" + text
+
+        emit(start, end, text)
+        i = j
+
+    out.append(run[position:])
+    return "".join(out)
+
+
+def _cents(tokens, i):
+    """(cents, next index) for "and fifty cents" starting at tokens[i], else None."""
+    if i < len(tokens) and tokens[i][0] == "and":
+        i += 1
+    if i >= len(tokens) or _kind(tokens[i][0]) not in ("unit", "teen", "tens"):
+        return None
+    word = tokens[i][0]
+    number = _Number(word)
+    j = i + 1
+    while j < len(tokens) and number.extend(tokens[j][0]):
+        j += 1
+    if j < len(tokens) and tokens[j][0] in ("cent", "cents") and number.value < 100:
+        return number.value, j + 1
+    return None
+
+
+def convert_numbers(text):
+    """Replace spoken numbers in text with digits (one scan of the text)."""
+    if not text:
+        return text
+    return RUN_PATTERN.sub(lambda match: _parse_run(match.group(0)), text)
+
+
+def add_thousands_separators(text):
+    """1234567 -> 1,234,567 for whole numbers of four or more digits (decimals left alone)."""
+    return THOUSANDS_PATTERN.sub(lambda match: "{:,}".format(int(match.group(0))), text)
@@ -0,0 +1,87 @@
+"""
+Single-pass phrase replacement for macros, voice commands and emojis.
+
+All phrases from several tables are folded into one trie, and the trie
+is written out as a single regular expression. At every position the
+regex walks the trie once instead of trying each phrase in turn, so one
+scan replaces every phrase no matter how many tables or entries there
+are. The regex is compiled once and reused until the tables change.
+
+Matching is case-insensitive and on whole words: "comma" is a command,
+but the "comma" inside "command" is left alone. Where phrases overlap,
+the longest one wins.
+"""
+
+import re
+
+_END = ""  # Trie key marking "a phrase ends here"
+
+
+def _build_trie(phrases):
+    root = {}
+    for phrase in phrases:
+        node = root
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[_END] = {}
+    return root
+
+
+def _trie_pattern(node):
+    """Regex source for a trie node; longer continuations are tried first."""
+    branches = [re.escape(char) + _trie_pattern(child)
+                for char, child in sorted(node.items()) if char != _END]
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    if _END in node:
+        # Greedy optional: prefer the longer phrase, back off if it doesn't end on a word boundary
+        body = "(?:" + body + ")?"
+    return body
+
+
+class PhraseMatcher:
+    """Replaces phrases from one or more {phrase: replacement} tables in one scan.
+
+    Tables are given in priority order: if the same phrase appears in
+    several, the first table's replacement is used.
+    """
+
+    def __init__(self, *tables):
+        self.replacements = {}
+        for table in tables:
+            for phrase, replacement in table.items():
+                key = phrase.strip().lower()
+                if key:
+                    self.replacements.setdefault(key, replacement)
+
+        if self.replacements:
+            source = _trie_pattern(_build_trie(self.replacements))
+            self.pattern = re.compile(r"(?<!\w)(?:" + source + r")(?!\w)", re.IGNORECASE)
+        else:
+            self.pattern = None
+
+    def __len__(self):
+        return len(self.replacements)
+
+    def sub(self, text, expand=None):
+        """Replace every phrase in text.
+
+        expand, if given, is applied to each replacement as it is used
+        (e.g. to fill in {{DATE}}).
+        """
+        if self.pattern is None or not text:
+            return text
+
+        def replace(match):
+            phrase = match.group(0)
+            replacement = self.replacements.get(phrase.lower(), phrase)
+            return expand(replacement) if expand else replacement
+
+        return self.pattern.sub(replace, text)
+
+    def find(self, text):
+        """List the phrases (lowercased) that occur in text."""
+        if self.pattern is None or not text:
+            return []
+        return [match.group(0).lower() for match in self.pattern.finditer(text)]
@@ -0,0 +1,356 @@
+"""
+Rate-limit-aware scheduling for transcription requests.
+
+Every transcription goes through one RequestScheduler, so push-to-talk,
+file transcription and batch jobs share a single view of the API's
+limits:
+
+- A token bucket paces requests. It is sized from the server's
+  x-ratelimit-remaining-requests / x-ratelimit-reset-requests headers
+  (remaining requests spread over the time until the window resets) and
+  is paused outright for Retry-After when the server answers 429.
+- The number of requests in flight follows AIMD: it grows by roughly
+  one per round of successful requests and halves on a 429, so batch
+  jobs settle at the highest rate the account sustains instead of
+  hammering the API into a storm of 429s.
+
+On top of that, network errors and 5xx responses are retried with
+jittered exponential backoff, and interactive requests can be hedged:
+if no answer has arrived by the recent p95 latency, a duplicate is sent
+and whichever returns first wins. Latency grows with the length of the
+clip, so the p95 is kept per bucket of audio seconds (1-2 s, 2-4 s,
+4-8 s, ...): a long dictation is compared with other long ones rather
+than hedged almost every time against the typical short clip.
+"""
+
+import logging
+import math
+import random
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+
+log = logging.getLogger(__name__)
+
+DEFAULT_INITIAL_CONCURRENCY = 4
+DEFAULT_MAX_CONCURRENCY = 16
+DEFAULT_RATE_RETRIES = 3
+DEFAULT_THROTTLE_BACKOFF = 1.0  # Seconds, when a 429 carries no Retry-After
+DEFAULT_RETRIES = 3  # For network errors and 5xx
+DEFAULT_RETRY_BASE = 0.5  # Seconds; backoff before retry n is uniform(0, base * 2**n)
+DEFAULT_RETRY_CAP = 8.0
+HEDGE_MIN_SAMPLES = 10  # Latencies needed before the p95 is trusted
+HEDGE_MIN_DELAY = 0.3  # Never hedge sooner than this
+COUNTERS = ("retried", "rescued", "hedged", "hedge_wins", "hedge_saved")  # See take_counts()
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+
+
+def parse_duration(value):
+    """Parse "7.66s", "2m59.56s", "250ms" or plain seconds; None if missing or invalid."""
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts or "".join(n + u for n, u in parts) != value:
+        return None
+    return sum(float(n) * _DURATION_UNITS[u] for n, u in parts)
+
+
+def _bucket(seconds):
+    """Latency bucket for a clip: 0 below 2 s, then one per doubling; None if unknown."""
+    if seconds is None:
+        return None
+    return int(math.log2(max(seconds, 1.0)))
+
+
+def _parse_int(value):
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """Paces requests to rate per second with bursts up to capacity.
+
+    rate None means unlimited until the server tells us otherwise.
+    """
+
+    def __init__(self, rate=None, capacity=1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def paused_until(self):
+        return self._paused_until
+
+    def configure(self, rate, capacity):
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = rate
+            self.capacity = capacity
+            self._tokens = min(self._tokens, capacity)
+
+    def pause(self, seconds):
+        """Hand out nothing for the next seconds (e.g. a Retry-After)."""
+        with self._lock:
+            now = time.monotonic()
+            self._paused_until = max(self._paused_until, now + seconds)
+            self._tokens = 0.0
+            self._updated = max(now, self._paused_until)
+
+    def acquire(self):
+        """Block until a request may be sent. Returns the seconds spent waiting."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                wait = self._reserve(time.monotonic())
+            if wait <= 0:
+                return waited
+            time.sleep(wait)
+            waited += wait
+
+    def _reserve(self, now):
+        # Caller holds self._lock; returns 0 after taking a token, else seconds to wait
+        if now < self._paused_until:
+            return self._paused_until - now
+        if self.rate is None:
+            return 0.0
+        self._refill(now)
+        if self._tokens >= 1.0:
+            self._tokens -= 1.0
+            return 0.0
+        return (1.0 - self._tokens) / self.rate
+
+    def _refill(self, now):
+        if self.rate is not None and now > self._updated:
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = max(self._updated, now)
+
+
+class RequestScheduler:
+    """Central gate that every transcription request passes through."""
+
+    def __init__(self, initial_concurrency=DEFAULT_INITIAL_CONCURRENCY,
+                 max_concurrency=DEFAULT_MAX_CONCURRENCY, rate_retries=DEFAULT_RATE_RETRIES,
+                 retries=DEFAULT_RETRIES, retry_base=DEFAULT_RETRY_BASE,
+                 retry_cap=DEFAULT_RETRY_CAP):
+        self.max_concurrency = max_concurrency
+        self.rate_retries = rate_retries
+        self.retries = retries
+        self.retry_base = retry_base
+        self.retry_cap = retry_cap
+        self.limit = float(min(initial_concurrency, max_concurrency))
+        self.bucket = TokenBucket()
+        self.in_flight = 0
+        self._cond = threading.Condition()
+        self._last_decrease = 0.0
+
+        self.requests = 0
+        self.throttled = 0  # 429 responses seen
+        self.wait_seconds = 0.0  # Time spent waiting on the rate limit
+        self.retried = 0  # Retries after a network error or 5xx
+        self.rescued = 0  # Requests that only succeeded thanks to a retry
+        self.hedged = 0  # Duplicate requests sent
+        self.hedge_wins = 0  # ...that answered before the original
+        self.hedge_saved = 0.0  # Seconds the winning hedges saved
+
+        self._latencies = {}  # Audio-seconds bucket -> recent un-hedged request latencies
+        self._taken = dict.fromkeys(COUNTERS, 0)
+
+    def request(self, send, hedge=False, seconds=None):
+        """Call send() -> httpx.Response within the rate and concurrency limits.
+
+        Network errors and 5xx responses are retried with jittered
+        exponential backoff; after the last attempt the error is raised
+        or the response returned. With hedge=True a duplicate request is
+        sent once the original outlives the recent p95 latency of clips of
+        about the same length (seconds of audio, if known). send() must be
+        safe to call from several threads at once.
+        """
+        import httpx  # Already loaded by the client by now; kept out of app startup
+
+        for attempt in range(self.retries + 1):
+            try:
+                if hedge:
+                    response = self._hedged(send, seconds)
+                else:
+                    response = self._timed(send, seconds)
+                if response.status_code < 500:
+                    if attempt:
+                        self.rescued += 1
+                    return response
+                problem = f"HTTP {response.status_code}"
+            except httpx.TransportError as e:
+                if attempt == self.retries:
+                    raise
+                problem = f"{type(e).__name__}: {e}"
+            if attempt == self.retries:
+                return response
+            # Full jitter keeps clients that failed together from retrying together
+            delay = random.uniform(0, min(self.retry_cap, self.retry_base * 2 ** attempt))
+            self.retried += 1
+            log.warning(f"[scheduler] {problem}, retry {attempt + 1}/{self.retries} in {delay:.1f}s")
+            time.sleep(delay)
+
+    def summary(self):
+        """One line of counters for the log."""
+        return (f"{self.requests} requests, {self.throttled} rate-limited "
+                f"({self.wait_seconds:.1f}s paced, concurrency {int(self.limit)}), "
+                f"{self.retried} retries ({self.rescued} rescued), "
+                f"{self.hedged} hedged ({self.hedge_wins} won, {self.hedge_saved:.2f}s saved)")
+
+    def take_counts(self):
+        """How much each of COUNTERS grew since the last call."""
+        counts = {}
+        for name in COUNTERS:
+            value = getattr(self, name)
+            counts[name] = value - self._taken[name]
+            self._taken[name] = value
+        return counts
+
+    def hedge_delay(self, seconds=None):
+        """Seconds to wait before hedging a clip of this many seconds: the recent
+        p95 latency of its bucket, or None while the bucket has too few samples."""
+        latencies = sorted(self._latencies.get(_bucket(seconds), ()))
+        if len(latencies) < HEDGE_MIN_SAMPLES:
+            return None
+        return max(HEDGE_MIN_DELAY, latencies[int(0.95 * (len(latencies) - 1))])
+
+    def _timed(self, send, seconds=None):
+        start = time.monotonic()
+        response = self._limited(send)
+        if response.status_code < 400:
+            latencies = self._latencies.setdefault(_bucket(seconds), deque(maxlen=100))
+            latencies.append(time.monotonic() - start)
+        return response
+
+    def _hedged(self, send, seconds=None):
+        delay = self.hedge_delay(seconds)
+        if delay is None:
+            return self._timed(send, seconds)
+
+        primary = self._spawn(send, seconds)
+        done, _ = wait([primary], timeout=delay)
+        if done or not self._has_capacity():
+            # Answered in time, or hedging now would only add to the rate-limit pressure
+            return primary.result()
+
+        self.hedged += 1
+        log.debug(f"[scheduler] No answer after {delay:.2f}s, sending a hedged request")
+        backup = self._spawn(send, seconds)
+        pending = {primary, backup}
+        first_error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    response = future.result()
+                except Exception as e:
+                    first_error = first_error or e
+                    continue
+                if response.status_code >= 500 and pending:
+                    continue  # The other one may still succeed
+                if future is backup:
+                    self.hedge_wins += 1
+                    won_at = time.monotonic()
+                    primary.add_done_callback(lambda _, t=won_at: self._record_saving(t))
+                return response
+        raise first_error
+
+    def _record_saving(self, won_at):
+        saved = time.monotonic() - won_at
+        self.hedge_saved += saved
+        log.debug(f"[scheduler] Hedge won, saved {saved:.2f}s")
+
+    def _spawn(self, send, seconds=None):
+        # Daemon threads: a losing request must not hold up shutdown
+        future = Future()
+
+        def run():
+            try:
+                future.set_result(self._timed(send, seconds))
+            except BaseException as e:
+                future.set_exception(e)
+
+        threading.Thread(target=run, daemon=True).start()
+        return future
+
+    def _has_capacity(self):
+        with self._cond:
+            return self.in_flight < int(self.limit) and time.monotonic() >= self.bucket.paused_until
+
+    def _limited(self, send):
+        """One request under the rate and concurrency limits; a 429 is retried
+        up to rate_retries times after the server's Retry-After."""
+        for attempt in range(self.rate_retries + 1):
+            started = self._enter()
+            try:
+                response = send()
+            finally:
+                self._leave()
+            self.observe(response)
+            if response.status_code != 429:
+                return response
+            self._on_throttle(response, started, attempt)
+            if attempt < self.rate_retries:
+                log.warning(f"[scheduler] Rate limited, retry {attempt + 1}/{self.rate_retries} "
+                            f"(concurrency now {int(self.limit)})")
+        return response
+
+    def observe(self, response):
+        """Update pacing and concurrency from a response's status and headers."""
+        headers = response.headers
+        remaining = _parse_int(headers.get("x-ratelimit-remaining-requests"))
+        reset = parse_duration(headers.get("x-ratelimit-reset-requests"))
+        if remaining is not None and reset:
+            if remaining <= 0:
+                self.bucket.pause(reset)
+            else:
+                # Spread what is left evenly over the rest of the window
+                self.bucket.configure(rate=remaining / reset,
+                                      capacity=max(1.0, min(remaining, self.max_concurrency)))
+        if response.status_code != 429 and response.status_code < 500:
+            with self._cond:
+                # Additive increase: about +1 per limit's worth of successes
+                self.limit = min(self.max_concurrency, self.limit + 1.0 / self.limit)
+                self._cond.notify()
+
+    def _on_throttle(self, response, started, attempt):
+        retry_after = parse_duration(response.headers.get("retry-after"))
+        if retry_after is None:
+            retry_after = DEFAULT_THROTTLE_BACKOFF * 2 ** attempt
+        self.bucket.pause(retry_after)
+        with self._cond:
+            self.throttled += 1
+            # One decrease per congestion event: 429s for requests sent
+            # before the last decrease were caused by the old limit
+            if started > self._last_decrease:
+                self.limit = max(1.0, self.limit / 2)
+                self._last_decrease = time.monotonic()
+
+    def _enter(self):
+        self.wait_seconds += self.bucket.acquire()
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+            self.requests += 1
+        return time.monotonic()
+
+    def _leave(self):
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify()
@@ -0,0 +1,115 @@
+"""
+Pause-segmented transcription while the hotkey is still held.
+
+PauseSegmenter watches the level of every captured chunk, using the same
+"is this sound" threshold as the auto-stop path, and cuts the recording
+at natural pauses. Each finished segment is transcribed on a small
+worker pool while the user keeps talking, so after the key is released
+only the last stretch of audio is still outstanding. The results are
+stitched back together in recording order.
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from audio_encoding import PcmBuffer
+
+log = logging.getLogger(__name__)
+
+SOUND_LEVEL = 0.02  # Same background noise threshold as auto-stop
+DEFAULT_PAUSE_MS = 400  # Silence needed before a cut
+DEFAULT_MIN_SEGMENT = 5.0  # Seconds; shorter pieces cost more in overhead than they save
+DEFAULT_WORKERS = 2
+
+
+class PauseSegmenter:
+    """Splits one utterance at pauses and transcribes the pieces concurrently.
+
+    transcribe is called with a finished PcmBuffer on a worker thread and
+    must return (text, error), like transcribe_with_groq().
+    """
+
+    def __init__(self, transcribe, rate, channels, sample_width, preroll=(),
+                 pause_ms=DEFAULT_PAUSE_MS, min_segment=DEFAULT_MIN_SEGMENT,
+                 workers=DEFAULT_WORKERS):
+        self.transcribe = transcribe
+        self.rate = rate
+        self.channels = channels
+        self.sample_width = sample_width
+        self.workers = workers
+
+        bytes_per_second = rate * channels * sample_width
+        self._pause_bytes = int(pause_ms * bytes_per_second / 1000)
+        self._min_bytes = int(min_segment * bytes_per_second)
+
+        self._buffer = PcmBuffer(rate, channels, sample_width)
+        for data in preroll:
+            self._buffer.append(data)
+        self._silent_bytes = 0
+        self._heard_sound = False
+        self._futures = []
+        self._executor = None
+
+    @property
+    def segments(self):
+        """Number of segments sent so far."""
+        return len(self._futures)
+
+    def feed(self, data, level=None):
+        """Add a chunk; a level at or below SOUND_LEVEL counts toward a pause.
+
+        Chunks fed without a level are appended but never trigger a cut.
+        """
+        self._buffer.append(data)
+        if level is None:
+            return
+        if level > SOUND_LEVEL:
+            self._heard_sound = True
+            self._silent_bytes = 0
+            return
+        self._silent_bytes += len(data)
+        if (self._heard_sound and self._silent_bytes >= self._pause_bytes
+                and len(self._buffer) >= self._min_bytes):
+            self._submit()
+
+    def finish(self):
+        """Send the remaining tail and return the stitched (text, error)."""
+        if len(self._buffer):
+            self._submit()
+        texts = []
+        error = None
+        for future in self._futures:
+            try:
+                text, segment_error = future.result()
+            except Exception as e:
+                text, segment_error = None, str(e)
+            if segment_error:
+                error = error or segment_error
+            elif text and text.strip():
+                texts.append(text.strip())
+        self._shutdown()
+        if error:
+            return None, error
+        return " ".join(texts), None
+
+    def cancel(self):
+        """Drop any segments that have not started and release the workers."""
+        for future in self._futures:
+            future.cancel()
+        self._shutdown()
+
+    def _submit(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                thread_name_prefix="segment")
+        buffer = self._buffer
+        self._buffer = PcmBuffer(self.rate, self.channels, self.sample_width)
+        self._silent_bytes = 0
+        self._heard_sound = False
+        self._futures.append(self._executor.submit(self.transcribe, buffer))
+        log.debug(f"[segment] #{len(self._futures)} sent ({buffer.duration:.1f}s)")
+
+    def _shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
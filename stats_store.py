@@ -0,0 +1,122 @@
+"""
+Usage statistics with write-behind persistence.
+
+Counters live in memory and are updated under a lock, so several
+workers finishing at once can't lose increments. Updating them never
+touches the disk: a background thread writes the file at most once
+every FLUSH_INTERVAL seconds while there are unsaved changes, and
+close() writes whatever is left at shutdown. Each write goes to a temp
+file that is then renamed over the stats file, so a crash mid-write
+leaves the previous version intact.
+"""
+
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+
+log = logging.getLogger(__name__)
+
+FLUSH_INTERVAL = 10.0  # Seconds between writes while stats keep changing
+
+
+class StatsStore:
+    """Dict-like usage counters, saved to path in the background."""
+
+    def __init__(self, path, defaults, flush_interval=FLUSH_INTERVAL):
+        self.path = path
+        self.defaults = dict(defaults)
+        self.flush_interval = flush_interval
+        self._values = dict(defaults)
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()  # One file write at a time
+        self._dirty = False
+        self._changed = threading.Event()
+        self._closing = threading.Event()
+        self._thread = None
+
+    def load(self):
+        try:
+            saved = json.loads(self.path.read_text())
+            if isinstance(saved, dict):
+                self._values.update(saved)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            log.warning(f"[stats] Could not read {self.path}: {e}")
+        return self
+
+    def get(self, key, default=None):
+        with self._lock:
+            return self._values.get(key, default)
+
+    def __getitem__(self, key):
+        with self._lock:
+            return self._values[key]
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._values)
+
+    @contextmanager
+    def edit(self):
+        """with stats.edit() as values: values["total_words"] += n
+
+        The counters stay locked for the body of the with block; the change
+        is saved by the next background flush.
+        """
+        with self._lock:
+            yield self._values
+            self._dirty = True
+        self._schedule()
+
+    def add(self, key, amount=1):
+        with self.edit() as values:
+            values[key] = values.get(key, 0) + amount
+
+    def reset(self):
+        with self.edit() as values:
+            values.clear()
+            values.update(self.defaults)
+
+    def flush(self):
+        """Write the stats now if they changed since the last write."""
+        with self._write_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                data = json.dumps(self._values, indent=2)
+                self._dirty = False
+            temp = self.path.with_name(self.path.name + ".tmp")
+            try:
+                with open(temp, "w") as f:
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temp, self.path)
+            except OSError as e:
+                log.warning(f"[stats] Could not save: {e}")
+                with self._lock:
+                    self._dirty = True  # Try again on the next flush
+
+    def close(self):
+        """Stop the background writer and save any pending changes."""
+        self._closing.set()
+        self._changed.set()
+        self.flush()
+
+    def _schedule(self):
+        self._changed.set()
+        with self._lock:
+            if self._thread is None and not self._closing.is_set():
+                self._thread = threading.Thread(target=self._writer, daemon=True)
+                self._thread.start()
+
+    def _writer(self):
+        while not self._closing.is_set():
+            self._changed.wait()
+            self._changed.clear()
+            # Let more changes pile up; close() cuts the wait short
+            self._closing.wait(self.flush_interval)
+            self.flush()
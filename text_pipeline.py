@@ -0,0 +1,220 @@
+"""
+Post-processing of transcripts, shared by the full and lite builds.
+
+A TextPipeline is built from a snapshot of the settings (accounting,
+casual, filter words, replacements, macros...). Building it compiles
+everything the stages need once: regexes, the phrase matcher, the word
+replacement table. Stages that the settings switch off are left out
+entirely. The pipeline is reused for every utterance until invalidate()
+is called (the settings window does this on save), and the next
+transcript then rebuilds it from a fresh snapshot.
+
+Stages run in a fixed order:
+
+    polish:  capitalize, smart_quotes, replacements
+    process: normalize, accounting, filter, commands, phrases, casual
+
+polish() runs on the raw transcript (its result is what gets copied and
+shown in the widget); process() turns that into the text to type. Each
+stage marks the latency trace ("text:<stage>"); with profile=True the
+pipeline also keeps per-stage call counts and total time.
+"""
+
+import logging
+import re
+import threading
+import time
+
+import latency_trace
+from number_words import add_thousands_separators, convert_numbers
+from phrase_matcher import PhraseMatcher
+
+log = logging.getLogger(__name__)
+
+POLISH_STAGES = ("capitalize", "smart_quotes", "replacements")
+PROCESS_STAGES = ("normalize", "accounting", "filter", "commands", "phrases", "casual")
+STAGE_ORDER = POLISH_STAGES + PROCESS_STAGES
+
+SHORT_TEXT = 30  # Below this length a filter word anywhere in the text drops it
+
+SENTENCE_START = re.compile(r'([.!?]\s+)([a-z])')
+NUMBER_WITH_COMMAS = re.compile(r'\b[\d,]+\b')
+SENTENCE_PERIOD = re.compile(r'\.(\s|$)')
+REPEATED_BANG = re.compile(r'!{2,}')
+REPEATED_QUESTION = re.compile(r'\?{2,}')
+CASUAL_COMMA = re.compile(r',\s+')
+EXTRA_SPACES = re.compile(r' {2,}')
+
+
+def _capitalize(text):
+    text = text[:1].upper() + text[1:]
+    return SENTENCE_START.sub(lambda m: m.group(1) + m.group(2).upper(), text)
+
+
+def _smart_quotes(text):
+    if '"' not in text:
+        return text
+    parts = text.split('"')
+    # Even pieces sit outside quotes, so the quote after them opens one
+    return "".join(part + ("“" if i % 2 == 0 else "”") for i, part in enumerate(parts[:-1])) + parts[-1]
+
+
+def _normalize(text):
+    # The API sometimes returns "1,234,567"; keep digits only unless comma mode is on
+    return NUMBER_WITH_COMMAS.sub(lambda m: m.group(0).replace(",", ""), text)
+
+
+def _casual(text):
+    text = text.lower()
+    text = SENTENCE_PERIOD.sub(r'\1', text)
+    text = REPEATED_BANG.sub('!', text)
+    text = REPEATED_QUESTION.sub('?', text)
+    return CASUAL_COMMA.sub(' ', text)
+
+
+class TextPipeline:
+    """Precompiled transcript post-processing.
+
+    settings is a callable returning the current settings as a dict
+    (see build() for the keys); it is called again after invalidate().
+    run_action is called with the value of an action voice command
+    ("__UNDO__" etc.) when the whole utterance is one; expand fills in
+    placeholders in macro expansions.
+    """
+
+    def __init__(self, settings, run_action=None, expand=None, profile=False):
+        self.settings = settings
+        self.run_action = run_action
+        self.expand = expand
+        self.profile = profile
+        self.timings = {}  # stage -> [calls, seconds], when profiling
+        self._stages = None
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        """Drop the compiled stages; the next transcript rebuilds them from fresh settings."""
+        with self._lock:
+            self._stages = None
+
+    def stages(self):
+        """{stage name: callable} for the enabled stages, building them if needed."""
+        with self._lock:
+            if self._stages is None:
+                self._stages = self.build(self.settings())
+            return self._stages
+
+    def build(self, config):
+        stages = {}
+
+        if config.get("capitalize_sentences"):
+            stages["capitalize"] = _capitalize
+        if config.get("smart_quotes"):
+            stages["smart_quotes"] = _smart_quotes
+        replacements = dict(config.get("word_replacements") or {})
+        if replacements:
+            pattern = re.compile("|".join(re.escape(old) for old in sorted(replacements, key=len, reverse=True)))
+            stages["replacements"] = lambda text: pattern.sub(lambda m: replacements[m.group(0)], text)
+
+        comma = config.get("accounting_comma", False)
+        if not comma:
+            stages["normalize"] = _normalize
+        if config.get("accounting_mode"):
+            if comma:
+                stages["accounting"] = lambda text: add_thousands_separators(convert_numbers(text))
+            else:
+                stages["accounting"] = convert_numbers
+
+        filter_words = [word.lower().strip() for word in config.get("filter_words") or []]
+        filter_words = [word for word in filter_words if word]
+        exact = set(filter_words)
+
+        def filter_text(text):
+            lowered = text.lower()
+            if lowered in exact:
+                log.debug(f"[filtered] Matched filter: '{text}'")
+                return ""
+            if len(text) < SHORT_TEXT:
+                for word in filter_words:
+                    if word in lowered:
+                        log.debug(f"[filtered] Contains filter: '{word}'")
+                        return ""
+            return text
+
+        if filter_words:
+            stages["filter"] = filter_text
+
+        commands = {phrase.lower(): value for phrase, value in (config.get("voice_commands") or {}).items()}
+        inline_commands = {phrase: value for phrase, value in commands.items() if not value.startswith("__")}
+        if commands:
+            def run_command(text):
+                value = commands.get(text.lower())
+                if value is None:
+                    return text
+                if value.startswith("__"):
+                    if self.run_action:
+                        self.run_action(value)
+                    return None
+                log.debug(f"[command] '{text}' → '{value}'")
+                return value
+            stages["commands"] = run_command
+
+        macros = config.get("macros") or {}
+        emojis = config.get("emojis") or {}
+        with_commands = PhraseMatcher(macros, inline_commands, emojis)
+        without_commands = PhraseMatcher(macros, emojis) if inline_commands else with_commands
+        if len(with_commands):
+            expand = self.expand
+
+            def phrases(text, commands=True):
+                matcher = with_commands if commands else without_commands
+                return EXTRA_SPACES.sub(' ', matcher.sub(text, expand=expand)).strip(' ')
+            stages["phrases"] = phrases
+
+        if config.get("casual_mode"):
+            stages["casual"] = _casual
+
+        return stages
+
+    def polish(self, text):
+        """Capitalization, smart quotes and word replacements for a raw transcript."""
+        return self._run(POLISH_STAGES, (text or "").strip())
+
+    def process(self, text, commands=True):
+        """Turn a transcript into the text to type.
+
+        Returns "" when the text was filtered out and None when it was an
+        action command that has already been run. commands=False skips
+        voice commands (batch mode has nothing to act on).
+        """
+        text = (text or "").strip()
+        if not text:
+            return ""
+        return self._run(PROCESS_STAGES, text, commands)
+
+    def _run(self, names, text, commands=True):
+        stages = self.stages()
+        for name in names:
+            stage = stages.get(name)
+            if stage is None or (name == "commands" and not commands):
+                continue
+            started = time.perf_counter() if self.profile else 0.0
+            text = stage(text, commands) if name == "phrases" else stage(text)
+            if self.profile:
+                entry = self.timings.setdefault(name, [0, 0.0])
+                entry[0] += 1
+                entry[1] += time.perf_counter() - started
+            latency_trace.mark("text:" + name)
+            if not text:
+                # Filtered out (""), or an action command that has been run (None)
+                return text
+        return text
+
+    def profile_summary(self):
+        """One line per profiled stage: calls, total and mean time."""
+        lines = []
+        for name in STAGE_ORDER:
+            if name in self.timings:
+                calls, seconds = self.timings[name]
+                lines.append(f"{name:<13} {calls:>6} calls {seconds * 1000:>9.2f} ms "
+                             f"({seconds / calls * 1e6:.1f} us each)")
+        return "\n".join(lines)
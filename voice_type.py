@@ -11,7 +11,7 @@ import os
 import threading
 import time
 import json
-import tempfile
+import logging
 import re
 from pathlib import Path
 
@@ -22,22 +22,41 @@ if sys.stderr:
 
 print("Loading Voice Type...")
 
-import keyboard
-import pyperclip
-import tkinter as tk
-from tkinter import font as tkfont, ttk, messagebox
-import pyaudio
-import wave
-import httpx
-import pystray
-from PIL import Image, ImageDraw
+# `voice_type.py batch ...` runs headless: no GUI, tray, keyboard hooks or microphone
+BATCH_MODE = __name__ == "__main__" and sys.argv[1:2] == ["batch"]
+
+if not BATCH_MODE:
+    import keyboard
+    import pyperclip
+    import tkinter as tk
+    from tkinter import font as tkfont
+
+    from audio_engine import AudioEngine
+    from hotkeys import Hotkeys
+    # The tray (pystray, PIL), settings (ttk, messagebox), history window and
+    # HTTP client (httpx) are imported where they are first used, off the startup path
+
+import app_logging
+import latency_trace
+from audio_encoding import CodecPolicy
+from audio_levels import find_speech, measure as measure_levels
+from groq_client import GroqClient, DEFAULT_BASE_URL
+from history_index import HistoryIndex, SearchCancelled
+from history_store import HistoryStore
+from segmenter import PauseSegmenter
+from stats_store import StatsStore
+from text_pipeline import TextPipeline
 
 print("Ready!")
 
+log = logging.getLogger(__name__)
+
 # Config
 CONFIG_FILE = Path.home() / ".voice-type-config.json"
 MACROS_FILE = Path.home() / ".voice-type-macros.json"
 STATS_FILE = Path.home() / ".voice-type-stats.json"
+TRACE_FILE = Path.home() / ".voice-type-traces.jsonl"
+LOG_FILE = Path.home() / ".voice-type.log"
 SAMPLE_RATE = 16000
 
 # Default filter words - common filler words the model outputs when nothing is said
@@ -77,11 +96,19 @@ DEFAULT_STATS = {
     "total_minutes": 0.0,
     "first_used": None,
     "last_used": None,
+    "silence_trimmed_ms": 0,  # Silence cut off recordings before upload
+    "skipped_calls": 0,  # Recordings with no speech that were never sent
+    "api_retried": 0,  # Requests retried after a network error or 5xx
+    "api_rescued": 0,  # ...that only succeeded thanks to the retry
+    "api_hedged": 0,  # Duplicate requests sent for a slow answer
+    "api_hedge_wins": 0,  # ...that answered before the original
+    "api_hedge_saved": 0.0,  # Seconds the winning hedges saved
 }
 
-# History storage
-HISTORY_FILE = Path.home() / ".voice-type-history.json"
-HISTORY = []
+# History storage (append-only JSONL; the old .json list is migrated on first load)
+HISTORY_FILE = Path.home() / ".voice-type-history.jsonl"
+LEGACY_HISTORY_FILE = Path.home() / ".voice-type-history.json"
+SEARCH_DEBOUNCE_MS = 150  # Pause in typing before the history search runs
 
 # Load config
 config_data = {
@@ -90,10 +117,20 @@ config_data = {
     "hotkey": "shift",
     "accounting_mode": False,
     "history_enabled": True,
+    "history_limit": 0,  # Trim history to this many entries (0 = unlimited)
     "quicken_mode": False,  # Type character-by-character for Quicken compatibility
     "language": "auto",  # Auto-detect language or specify (en, es, fr, de, etc.)
     "auto_stop": False,  # Auto-stop recording after silence
     "silence_threshold": 2.0,  # Seconds of silence before auto-stop
+    "preroll_ms": 300,  # Audio kept from before the hotkey was pressed
+    "capture_mode": "callback",  # "callback" (non-blocking) or "blocking" stream reads
+    "upload_codec": "auto",  # "auto", "wav", "flac" or "opus"
+    "trim_silence": True,  # Trim silence and skip clips with no speech before upload
+    "pipeline_segments": True,  # Transcribe long dictations at pauses while still recording
+    "file_workers": 4,  # Parallel requests when transcribing long audio files
+    "hedge_requests": True,  # Send a duplicate request when push-to-talk answers are slow
+    "profile_pipeline": False,  # Log per-stage text-pipeline timings on exit
+    "debug_logging": False,  # Log every utterance (tray toggle); off logs only notable events
     "always_on_top": True,  # Widget always on top
     "autohide": True,  # Auto-hide widget after transcription
     "compact_mode": False,  # Smaller widget
@@ -101,8 +138,11 @@ config_data = {
     "save_audio": False,  # Save audio recordings
     "auto_copy": True,  # Auto-copy transcription to clipboard
     "show_timer": True,  # Show recording timer
+    "ui_fps": 30,  # Widget redraw rate while visible
     "minimize_startup": False,  # Start minimized to tray
     "widget_position": None,  # Remember widget position [x, y]
+    "api_base_url": DEFAULT_BASE_URL,  # Point at a Groq-compatible server
+    "api_ca_bundle": None,  # Extra CA bundle, e.g. for a local TLS stand-in
     # Custom vocabulary - words to prioritize in transcription
     "custom_vocabulary": [],
     # Word replacements - auto-replace words
@@ -141,10 +181,20 @@ ACCOUNTING_COMMA = config_data.get("accounting_comma", False)
 CASUAL_MODE = config_data.get("casual_mode", False)
 THEME = config_data.get("theme", "dark")  # "dark" or "light"
 HISTORY_ENABLED = config_data.get("history_enabled", True)
+HISTORY_LIMIT = config_data.get("history_limit", 0)  # Entries kept (0 = keep everything)
 QUICKEN_MODE = config_data.get("quicken_mode", False)  # Character-by-character typing for Quicken
 LANGUAGE = config_data.get("language", "auto")  # Auto-detect or specify language
 AUTO_STOP = config_data.get("auto_stop", False)  # Auto-stop recording after silence
 SILENCE_THRESHOLD = config_data.get("silence_threshold", 2.0)  # Seconds of silence before auto-stop
+PREROLL_MS = config_data.get("preroll_ms", 300)  # Audio kept from before the hotkey was pressed
+CAPTURE_MODE = config_data.get("capture_mode", "callback")  # Callback-driven or blocking capture
+UPLOAD_CODEC = config_data.get("upload_codec", "auto")  # Compress uploads (auto picks per clip)
+TRIM_SILENCE = config_data.get("trim_silence", True)  # Trim silence / skip no-speech clips
+PIPELINE_SEGMENTS = config_data.get("pipeline_segments", True)  # Send segments at pauses while recording
+FILE_WORKERS = config_data.get("file_workers", 4)  # Parallel requests for long audio files
+HEDGE_REQUESTS = config_data.get("hedge_requests", True)  # Hedge slow push-to-talk requests
+PROFILE_PIPELINE = config_data.get("profile_pipeline", False)  # Time each text-pipeline stage
+DEBUG_LOGGING = config_data.get("debug_logging", False)  # Verbose logging to console and LOG_FILE
 ALWAYS_ON_TOP = config_data.get("always_on_top", True)  # Widget always on top
 AUTOHIDE_ENABLED = config_data.get("autohide", True)  # Auto-hide widget after transcription
 COMPACT_MODE = config_data.get("compact_mode", False)  # Smaller widget
@@ -152,12 +202,19 @@ ACCENT_COLOR = config_data.get("accent_color", "#6366f1")  # Custom accent color
 SAVE_AUDIO = config_data.get("save_audio", False)  # Save audio recordings
 AUTO_COPY = config_data.get("auto_copy", True)  # Auto-copy transcription to clipboard
 SHOW_TIMER = config_data.get("show_timer", True)  # Show recording timer
+UI_FPS = config_data.get("ui_fps", 30)  # Widget redraw rate while something on it is moving
+LEVEL_SETTLED = 0.5 / 280  # Level bar within half a pixel of its target counts as still
 MINIMIZE_STARTUP = config_data.get("minimize_startup", False)  # Start minimized to tray
 WIDGET_POSITION = config_data.get("widget_position", None)  # Remember widget position
+API_BASE_URL = config_data.get("api_base_url") or DEFAULT_BASE_URL  # Groq-compatible server
+API_CA_BUNDLE = config_data.get("api_ca_bundle")  # CA bundle for a custom TLS server
 CUSTOM_VOCABULARY = config_data.get("custom_vocabulary", [])  # Custom words for transcription
 WORD_REPLACEMENTS = config_data.get("word_replacements", {})  # Auto-replace words
 FILTER_WORDS = config_data.get("filter_words", DEFAULT_FILTER_WORDS)
 
+app_logging.add_secret(API_KEY)
+app_logging.setup(debug=DEBUG_LOGGING, log_file=LOG_FILE)
+
 # Granular punctuation settings
 PUNCTUATION = config_data.get("punctuation", {
     "periods": True,
@@ -175,31 +232,36 @@ if MACROS_FILE.exists():
     try:
         user_macros = json.loads(MACROS_FILE.read_text())
         MACROS.update(user_macros)
-        print(f"[startup] Loaded {len(user_macros)} custom macros")
+        log.info(f"[startup] Loaded {len(user_macros)} custom macros")
     except:
         pass
 
-# Load statistics
-STATS = DEFAULT_STATS.copy()
-if STATS_FILE.exists():
-    try:
-        saved_stats = json.loads(STATS_FILE.read_text())
-        STATS.update(saved_stats)
-    except:
-        pass
+# Load statistics (kept in memory, written to disk in the background)
+STATS = StatsStore(STATS_FILE, DEFAULT_STATS).load()
+
+# History is indexed after startup (see load_history)
+history = HistoryStore(HISTORY_FILE, legacy_path=LEGACY_HISTORY_FILE, max_entries=HISTORY_LIMIT or None)
+history_index = HistoryIndex(history)  # Search index, kept current as entries are appended
+history_lock = threading.Lock()
 
-# Load history
-if HISTORY_FILE.exists() and HISTORY_ENABLED:
-    try:
-        HISTORY = json.loads(HISTORY_FILE.read_text())
-        print(f"[startup] Loaded {len(HISTORY)} history items")
-    except:
-        pass
 
-# Debug: Show config on startup
-print(f"[startup] Config file: {CONFIG_FILE}")
-print(f"[startup] ACCOUNTING_MODE from config: {ACCOUNTING_MODE}")
-print(f"[startup] Full config: {config_data}")
+def load_history():
+    """Index the history file and start the search index, once. Called after startup
+    and by anything that needs history before that has happened."""
+    with history_lock:
+        if not HISTORY_ENABLED:
+            return
+        try:
+            if not history.loaded:
+                history.load()
+                log.info(f"[startup] Loaded {len(history)} history items")
+            # Also when something else loaded the store first
+            history_index.start()
+        except Exception as e:
+            log.warning(f"[startup] Could not load history: {e}")
+
+log.debug(f"[startup] Config file: {CONFIG_FILE}")
+log.debug(f"[startup] Config: {dict(config_data, api_key=app_logging.REDACTED if API_KEY else '')}")
 
 
 # Auto-start helper functions
@@ -225,19 +287,19 @@ def set_autostart(enabled):
             key = winreg.OpenKey(winreg.HKEY_CURRENT_USER, key_path, 0, winreg.KEY_SET_VALUE)
             winreg.SetValueEx(key, app_name, 0, winreg.REG_SZ, exe_path)
             winreg.CloseKey(key)
-            print(f"[autostart] Enabled: {exe_path}")
+            log.info(f"[autostart] Enabled: {exe_path}")
             return True
         else:
             key = winreg.OpenKey(winreg.HKEY_CURRENT_USER, key_path, 0, winreg.KEY_SET_VALUE)
             try:
                 winreg.DeleteValue(key, app_name)
-                print("[autostart] Disabled")
+                log.info("[autostart] Disabled")
             except FileNotFoundError:
                 pass
             winreg.CloseKey(key)
             return True
     except Exception as e:
-        print(f"[autostart] Error: {e}")
+        log.warning(f"[autostart] Error: {e}")
         return False
 
 
@@ -250,6 +312,12 @@ class State:
 state = State()
 settings_open = False
 tray_icon = None
+audio_engine = None
+hotkeys = None
+startup_done = threading.Event()  # Set when deferred_startup() has finished
+groq_client = None
+codec_policy = None
+trace_log = None
 last_transcription = ""  # Store last transcription for copy feature
 last_transcription = ""  # Store last transcription for copy feature
 
@@ -424,6 +492,21 @@ class FloatingWidget:
         )
         self.current_level = 0
 
+        # Render state. Any thread may overwrite these; only the render tick
+        # reads them and touches Tk. The tick runs only while something is
+        # moving, so producers restart it through request_frame(), which
+        # queues one Tk event per idle-to-busy change and none while busy.
+        self.pending_level = 0.0
+        self.pending_status = None
+        self.recording_start = None
+        self.timer_running = False
+        self.drawn_status = None
+        self.drawn_bar = None
+        self.drawn_timer = None
+        self.frame_ms = max(1000 // max(UI_FPS, 1), 10)
+        self.tick_armed = False
+        self.tick_lock = threading.Lock()
+
         # Status colors
         self.colors = {
             "ready": (self.accent_success, "● Ready"),
@@ -521,19 +604,59 @@ class FloatingWidget:
         self.root.deiconify()
     
     def update_level(self, level):
-        """Update audio level indicator (0.0 to 1.0)."""
-        if not hasattr(self, 'level_canvas'):
-            return
-
-        # Smooth the level changes
-        self.current_level = self.current_level * 0.7 + level * 0.3
+        """Set the audio level (0.0 to 1.0). Safe from any thread."""
+        self.pending_level = level
+        self.request_frame()
+
+    def request_frame(self):
+        """Make sure a render tick is coming. Safe from any thread.
+
+        While the tick is armed this only checks a flag. Only the call that
+        finds it stopped queues an after() event: one per idle-to-busy change,
+        e.g. one per recording, never one per audio chunk. The alternative, a
+        tick that never stops, would wake the idle app several times a second.
+        """
+        with self.tick_lock:
+            if self.tick_armed:
+                return
+            self.tick_armed = True
+        self.root.after(self.frame_ms, self.render_tick)
+
+    def render_tick(self):
+        """Redraw whatever changed since the last frame.
+
+        Re-arms while recording or while the level bar is still catching up,
+        and stops once everything on screen is settled.
+        """
+        try:
+            status = self.pending_status
+            if status is not self.drawn_status:
+                self.drawn_status = status
+                self.draw_status(*status)
+            self.draw_level()
+            self.draw_timer()
+        finally:
+            with self.tick_lock:
+                # Checked under the lock, so a producer either sees the tick
+                # still armed after its write or re-arms it itself
+                busy = (self.timer_running
+                        or self.pending_status is not self.drawn_status
+                        or abs(self.current_level - self.pending_level) > LEVEL_SETTLED)
+                self.tick_armed = busy
+            if busy:
+                self.root.after(self.frame_ms, self.render_tick)
+
+    def draw_level(self):
+        """Draw the smoothed audio level bar if it visibly changed."""
+        # Smooth the level changes, snapping the last half pixel so the bar settles
+        self.current_level = self.current_level * 0.7 + self.pending_level * 0.3
+        if abs(self.current_level - self.pending_level) <= LEVEL_SETTLED:
+            self.current_level = self.pending_level
 
         # Update bar width
         canvas_width = 280
         bar_width = int(canvas_width * min(self.current_level, 1.0))
 
-        self.level_canvas.coords(self.level_bar, 0, 0, bar_width, 8)
-
         # Change color based on level
         if self.current_level < 0.3:
             color = self.accent_success  # Green - quiet
@@ -542,6 +665,10 @@ class FloatingWidget:
         else:
             color = "#ff4444"  # Red - too loud
 
+        if (bar_width, color) == self.drawn_bar:
+            return
+        self.drawn_bar = (bar_width, color)
+        self.level_canvas.coords(self.level_bar, 0, 0, bar_width, 8)
         self.level_canvas.itemconfig(self.level_bar, fill=color)
 
     def start_drag(self, event):
@@ -560,6 +687,7 @@ class FloatingWidget:
         if settings_open:
             return
         settings_open = True
+        from tkinter import ttk, messagebox
 
         win = tk.Toplevel()
         win.title(f"VoiceType v{__version__} Settings")
@@ -633,13 +761,7 @@ class FloatingWidget:
         mic_combo.pack(fill=tk.X, pady=(5, 15))
 
         # Get mics
-        p = pyaudio.PyAudio()
-        mics = []
-        for i in range(p.get_device_count()):
-            dev = p.get_device_info_by_index(i)
-            if dev["maxInputChannels"] > 0:
-                mics.append((i, dev["name"]))
-        p.terminate()
+        mics = audio_engine.input_devices()
 
         mic_combo["values"] = [f"{i}: {n}" for i, n in mics]
 
@@ -777,21 +899,36 @@ class FloatingWidget:
         stats_frame = tk.Frame(content, bg=self.bg_light, padx=10, pady=10)
         stats_frame.pack(fill=tk.X, pady=(5, 15))
         
+        record_scheduler_stats()  # Include file transcriptions since the last utterance
         stats_labels = [
             f"📝 Words typed: {STATS.get('total_words', 0):,}",
             f"🎤 Transcriptions: {STATS.get('total_transcriptions', 0):,}",
             f"📅 First used: {STATS.get('first_used', 'Never') or 'Never'}",
             f"🕒 Last used: {STATS.get('last_used', 'Never') or 'Never'}",
+            f"✂️ Silence trimmed: {STATS.get('silence_trimmed_ms', 0) / 1000:,.1f}s | "
+            f"🔇 Silent clips skipped: {STATS.get('skipped_calls', 0):,}",
+            f"🔁 Retries: {STATS.get('api_retried', 0):,} ({STATS.get('api_rescued', 0):,} rescued) | "
+            f"⚡ Hedged: {STATS.get('api_hedged', 0):,} ({STATS.get('api_hedge_wins', 0):,} won, "
+            f"{STATS.get('api_hedge_saved', 0.0):,.1f}s saved)",
         ]
         
         for stat_text in stats_labels:
             tk.Label(stats_frame, text=stat_text, bg=self.bg_light, fg=self.text_primary,
                     font=("Segoe UI", 10)).pack(anchor="w")
+
+        # Rolling per-stage latency from the recent utterance traces
+        stage_stats = trace_log.stage_percentiles() if trace_log else {}
+        if stage_stats:
+            tk.Label(stats_frame, text="⏱️ Latency per stage (ms)  p50 / p95 / p99",
+                    bg=self.bg_light, fg=self.text_primary,
+                    font=("Segoe UI", 10, "bold")).pack(anchor="w", pady=(8, 2))
+            for stage, (count, (p50, p95, p99)) in stage_stats.items():
+                tk.Label(stats_frame, text=f"{stage:<20}{p50:>8.0f}{p95:>8.0f}{p99:>8.0f}   n={count}",
+                        bg=self.bg_light, fg=self.text_secondary,
+                        font=("Consolas", 9)).pack(anchor="w")
         
         def reset_stats():
-            global STATS
-            STATS = DEFAULT_STATS.copy()
-            STATS_FILE.write_text(json.dumps(STATS, indent=2))
+            STATS.reset()
             stats_updated_label.config(text="✓ Stats reset!")
             win.after(1500, lambda: stats_updated_label.config(text=""))
         
@@ -1097,15 +1234,16 @@ class FloatingWidget:
         btn_frame.pack(pady=20)
 
         def save():
-            global API_KEY, MIC_INDEX, HOTKEY, ACCOUNTING_MODE, ACCOUNTING_COMMA, CASUAL_MODE, FILTER_WORDS, THEME, QUICKEN_MODE, LANGUAGE, AUTO_STOP, ALWAYS_ON_TOP, AUTOHIDE_ENABLED, COMPACT_MODE, ACCENT_COLOR, SAVE_AUDIO, AUTO_COPY, SHOW_TIMER, MINIMIZE_STARTUP, WORD_REPLACEMENTS
+            global API_KEY, MIC_INDEX, ACCOUNTING_MODE, ACCOUNTING_COMMA, CASUAL_MODE, FILTER_WORDS, THEME, QUICKEN_MODE, LANGUAGE, AUTO_STOP, ALWAYS_ON_TOP, AUTOHIDE_ENABLED, COMPACT_MODE, ACCENT_COLOR, SAVE_AUDIO, AUTO_COPY, SHOW_TIMER, MINIMIZE_STARTUP, WORD_REPLACEMENTS
             API_KEY = api_entry.get().strip()
+            app_logging.add_secret(API_KEY)
             idx = mic_combo.current()
             if idx >= 0 and mics:
                 MIC_INDEX = mics[idx][0]
             
             new_hotkey = hotkey_var.get().lower()
             if new_hotkey and new_hotkey != "...":
-                HOTKEY = new_hotkey
+                set_hotkey(new_hotkey)
 
             ACCOUNTING_MODE = accounting_var.get()
             ACCOUNTING_COMMA = comma_var.get()
@@ -1176,7 +1314,15 @@ class FloatingWidget:
             config_data["custom_vocabulary"] = CUSTOM_VOCABULARY
             config_data["filter_words"] = FILTER_WORDS
             CONFIG_FILE.write_text(json.dumps(config_data))
+            text_pipeline.invalidate()
             
+            # Switch the armed input stream to the newly selected mic
+            if audio_engine:
+                try:
+                    audio_engine.set_device(MIC_INDEX)
+                except Exception as e:
+                    log.warning(f"[audio] Could not switch microphone: {e}")
+
             # Apply always-on-top setting immediately
             if widget:
                 widget.root.attributes("-topmost", ALWAYS_ON_TOP)
@@ -1190,7 +1336,7 @@ class FloatingWidget:
         def reset_defaults():
             """Reset all settings to defaults."""
             if messagebox.askyesno("Reset Settings", "Reset all settings to defaults?\n\nAPI key will be preserved."):
-                global config_data, HOTKEY, ACCOUNTING_MODE, ACCOUNTING_COMMA, CASUAL_MODE, THEME
+                global config_data, ACCOUNTING_MODE, ACCOUNTING_COMMA, CASUAL_MODE, THEME
                 global QUICKEN_MODE, LANGUAGE, AUTO_STOP, ALWAYS_ON_TOP, AUTOHIDE_ENABLED, COMPACT_MODE, ACCENT_COLOR
                 global SAVE_AUDIO, CUSTOM_VOCABULARY, FILTER_WORDS
                 
@@ -1198,7 +1344,7 @@ class FloatingWidget:
                 saved_key = API_KEY
                 
                 # Reset to defaults
-                HOTKEY = "shift"
+                set_hotkey("shift")
                 ACCOUNTING_MODE = False
                 ACCOUNTING_COMMA = False
                 CASUAL_MODE = False
@@ -1233,6 +1379,7 @@ class FloatingWidget:
                 config_data["filter_words"] = FILTER_WORDS
                 
                 CONFIG_FILE.write_text(json.dumps(config_data))
+                text_pipeline.invalidate()
                 
                 messagebox.showinfo("Reset Complete", "Settings reset to defaults.\nPlease reopen settings to see changes.")
                 close_settings()
@@ -1275,9 +1422,11 @@ class FloatingWidget:
         win.protocol("WM_DELETE_WINDOW", on_close)
 
     def open_history(self):
-        """Open history browser window with search."""
-        global HISTORY
-        if not HISTORY:
+        """Open history browser window with indexed search (see history_index for the syntax)."""
+        from history_view import HistoryList
+
+        load_history()
+        if not len(history):
             return
         
         win = tk.Toplevel(self.root)
@@ -1299,25 +1448,15 @@ class FloatingWidget:
                                font=("Segoe UI", 11), width=40)
         search_entry.pack(side=tk.LEFT, padx=5)
         
-        # Results listbox
-        results_frame = tk.Frame(win, bg=self.bg_dark)
-        results_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
-        
-        scrollbar = tk.Scrollbar(results_frame)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        
-        listbox = tk.Listbox(results_frame, bg=self.bg_light, fg=self.text_primary,
-                            font=("Segoe UI", 10), selectmode=tk.SINGLE,
-                            yscrollcommand=scrollbar.set)
-        listbox.pack(fill=tk.BOTH, expand=True)
-        scrollbar.config(command=listbox.yview)
+        # Results list: only the rows on screen are ever in the Listbox
+        results_list = HistoryList(win, history, self.bg_dark, bg=self.bg_light,
+                                   fg=self.text_primary, font=("Segoe UI", 10))
+        results_list.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
         
         # Copy button
         def copy_selected():
-            selection = listbox.curselection()
-            if selection:
-                idx = selection[0]
-                entry = filtered_history[idx]
+            if results_list.selected is not None:
+                entry = history.get(results_list.selected)
                 pyperclip.copy(entry.get("text", ""))
         
         btn_frame = tk.Frame(win, bg=self.bg_dark)
@@ -1328,25 +1467,49 @@ class FloatingWidget:
                             font=("Segoe UI", 10))
         copy_btn.pack(side=tk.LEFT)
         
-        # Filter history based on search
-        filtered_history = HISTORY.copy()
+        count_label = tk.Label(btn_frame, text="", bg=self.bg_dark, fg=self.text_secondary,
+                               font=("Segoe UI", 9))
+        count_label.pack(side=tk.RIGHT)
+        
+        # Search runs on a worker thread against the index; typing a new
+        # query cancels the one in flight, and results come back via after()
+        search = {"generation": 0, "pending": None}
+        
+        def show_results(generation, found):
+            if generation != search["generation"] or not win.winfo_exists():
+                return
+            results_list.set_rows(found)
+            count_label.configure(text=f"{len(found)} of {len(history)}")
+        
+        def run_search(generation, query):
+            try:
+                found = history_index.search(
+                    query, cancelled=lambda: generation != search["generation"])
+            except SearchCancelled:
+                return
+            except Exception as e:
+                log.warning(f"[history] Search failed: {e}")
+                return
+            self.root.after(0, lambda: show_results(generation, found))
+        
+        def start_search():
+            search["pending"] = None
+            search["generation"] += 1
+            if not search_var.get().strip():
+                # Everything, newest first: a range, so nothing is read or copied up front
+                show_results(search["generation"], range(len(history) - 1, -1, -1))
+                return
+            threading.Thread(target=run_search, args=(search["generation"], search_var.get()),
+                             daemon=True).start()
         
         def update_results(*args):
-            nonlocal filtered_history
-            query = search_var.get().lower()
-            listbox.delete(0, tk.END)
-            filtered_history = []
-            
-            for entry in HISTORY:
-                text = entry.get("text", "").lower()
-                if not query or query in text:
-                    filtered_history.append(entry)
-                    timestamp = entry.get("timestamp", "")
-                    preview = entry.get("text", "")[:50]
-                    listbox.insert(tk.END, f"[{timestamp}] {preview}...")
+            if search["pending"] is not None:
+                win.after_cancel(search["pending"])
+            search["generation"] += 1  # Stop any search still running
+            search["pending"] = win.after(SEARCH_DEBOUNCE_MS, start_search)
         
         search_var.trace("w", update_results)
-        update_results()
+        start_search()
         
         win.transient(self.root)
         win.grab_set()
@@ -1354,12 +1517,34 @@ class FloatingWidget:
     def quit_app(self):
         state.running = False
         keyboard.unhook_all()
+        if audio_engine:
+            audio_engine.close()
+        if groq_client:
+            log.info(f"[scheduler] {groq_client.scheduler.summary()}")
+            record_scheduler_stats()
+            groq_client.close()
+        if PROFILE_PIPELINE:
+            log.info(f"[pipeline]\n{text_pipeline.profile_summary()}")
         if tray_icon:
             tray_icon.stop()
         self.root.quit()
+        history.close()
+        STATS.close()
+        app_logging.shutdown()
         os._exit(0)
 
     def update_status(self, status_key, text=""):
+        """Set the status shown on the next frame. Safe from any thread."""
+        if status_key == "recording":
+            self.recording_start = time.time()
+            self.timer_running = SHOW_TIMER
+        else:
+            self.timer_running = False
+            self.pending_level = 0.0
+        self.pending_status = (status_key, text)
+        self.request_frame()
+
+    def draw_status(self, status_key, text=""):
         color, status_text = self.colors.get(status_key, self.colors["ready"])
         display = f"{status_text} {text}" if text else status_text
         self.status_label.configure(text=display, fg=color)
@@ -1367,26 +1552,12 @@ class FloatingWidget:
             self.text_label.configure(text=text, fg="#f8f8f2")
         elif status_key == "recording":
             self.text_label.configure(text="Speak now...", fg="#f8f8f2")
-            # Start timer
-            if SHOW_TIMER:
-                self.start_timer()
         elif status_key == "processing":
             self.text_label.configure(text="Transcribing...", fg="#f8f8f2")
-            self.stop_timer()
 
-    def start_timer(self):
-        """Start recording timer display."""
-        self.recording_start = time.time()
-        self.timer_running = True
-        self.update_timer()
-
-    def stop_timer(self):
-        """Stop recording timer."""
-        self.timer_running = False
-
-    def update_timer(self):
-        """Update timer display every 100ms."""
-        if not self.timer_running:
+    def draw_timer(self):
+        """Draw the recording timer; the label only changes once a second."""
+        if not self.timer_running or self.recording_start is None:
             return
         elapsed = time.time() - self.recording_start
         mins = int(elapsed // 60)
@@ -1395,10 +1566,9 @@ class FloatingWidget:
             timer_text = f"⏱ {mins}:{secs:02d}"
         else:
             timer_text = f"⏱ {secs}s"
-        # Update timer label if it exists
-        if hasattr(self, 'timer_label'):
+        if timer_text != self.drawn_timer:
+            self.drawn_timer = timer_text
             self.timer_label.configure(text=timer_text)
-        self.root.after(100, self.update_timer)
 
     def run(self):
         self.root.mainloop()
@@ -1409,11 +1579,14 @@ widget = None
 
 def update_status(status_key, text=""):
     if widget:
-        widget.root.after(0, lambda: widget.update_status(status_key, text))
+        widget.update_status(status_key, text)
 
 
 def create_tray_icon():
     """Create system tray icon."""
+    import pystray
+    from PIL import Image, ImageDraw
+
     # Create a simple microphone icon
     width = 64
     height = 64
@@ -1435,7 +1608,7 @@ def create_tray_icon():
         global last_transcription
         if last_transcription:
             pyperclip.copy(last_transcription)
-            print(f"[clipboard] Copied: {last_transcription[:50]}...")
+            log.debug(f"[clipboard] Copied: {last_transcription[:50]}...")
     
     def on_show(icon, item):
         widget.root.after(0, widget.show_widget)
@@ -1449,6 +1622,17 @@ def create_tray_icon():
     def on_transcribe_file(icon, item):
         transcribe_audio_file()
 
+    def on_debug_logging(icon, item):
+        global DEBUG_LOGGING
+        DEBUG_LOGGING = not DEBUG_LOGGING
+        app_logging.set_debug(DEBUG_LOGGING)
+        config_data["debug_logging"] = DEBUG_LOGGING
+        try:
+            CONFIG_FILE.write_text(json.dumps(config_data))
+        except Exception as e:
+            log.warning(f"[config] Could not save: {e}")
+        log.info(f"[log] Debug logging {'on' if DEBUG_LOGGING else 'off'} ({LOG_FILE})")
+
     def on_quit(icon, item):
         widget.root.after(0, widget.quit_app)
 
@@ -1460,6 +1644,7 @@ def create_tray_icon():
         pystray.MenuItem("📁 Transcribe Audio File...", on_transcribe_file),
         pystray.MenuItem("Copy Last", on_copy_last, default=False),
         pystray.MenuItem("Show Widget", on_show),
+        pystray.MenuItem("Debug Logging", on_debug_logging, checked=lambda item: DEBUG_LOGGING),
         pystray.Menu.SEPARATOR,
         pystray.MenuItem("Quit", on_quit),
     )
@@ -1472,7 +1657,7 @@ def transcribe_audio_file():
     global last_transcription
     
     if not API_KEY:
-        print("[error] No API key set")
+        log.warning("[error] No API key set")
         return
     
     from tkinter import filedialog
@@ -1490,13 +1675,25 @@ def transcribe_audio_file():
     if not file_path:
         return
     
-    print(f"[file] Transcribing: {file_path}")
+    log.info(f"[file] Transcribing: {file_path}")
     update_status("processing", "Transcribing file...")
     widget.show_widget()
     
+    def show_progress(done, total, retrying):
+        if retrying:
+            update_status("processing", f"Transcribing file... {done}/{total} (retrying part {retrying})")
+        else:
+            update_status("processing", f"Transcribing file... {done}/{total}")
+
     def do_transcribe():
         global last_transcription
-        text, error = transcribe_with_groq(file_path)
+        from long_audio import transcribe_file
+        # Long files are split at pauses and sent in parallel windows
+        text, error = transcribe_file(file_path, transcribe_buffer, workers=FILE_WORKERS,
+                                      progress=show_progress)
+        if text is None and error is None:
+            # Could not decode locally; let the API have the file as-is
+            text, error = transcribe_with_groq(file_path)
         
         if text:
             text = text.strip()
@@ -1513,12 +1710,9 @@ def transcribe_audio_file():
             
             # Copy to clipboard
             pyperclip.copy(text)
-            print(f"[file] Transcribed: {text[:50]}...")
+            log.debug(f"[file] Transcribed: {text[:50]}...")
             
-            # Save to history
-            save_to_history(text)
-            
-            # Type the text
+            # Type the text (type_text records it in history)
             type_text(text)
         else:
             update_status("error", error or "Failed to transcribe")
@@ -1533,36 +1727,42 @@ def transcribe_audio_file():
     threading.Thread(target=do_transcribe, daemon=True).start()
 
 
-def transcribe_with_groq(audio_path):
-    """Use Groq Whisper API for transcription."""
+def transcribe_with_groq(audio, hedge=False):
+    """Use Groq Whisper API for transcription.
+
+    audio is a path to a file on disk, an EncodedAudio from the codec
+    policy, or an in-memory WAV (bytes, bytearray or memoryview), which
+    is uploaded without copying. hedge=True sends a duplicate request
+    if the answer is slow (interactive use only).
+    """
     global API_KEY, CUSTOM_VOCABULARY
 
     if not API_KEY:
         return None, "No API key"
 
     try:
-        url = "https://api.groq.com/openai/v1/audio/transcriptions"
-        headers = {"Authorization": f"Bearer {API_KEY}"}
-
-        with open(audio_path, "rb") as f:
-            files = {"file": ("audio.wav", f, "audio/wav")}
-            data = {"model": "whisper-large-v3-turbo", "response_format": "json"}
-            
-            # Add language parameter if specified (not auto-detect)
-            if LANGUAGE and LANGUAGE != "auto":
-                data["language"] = LANGUAGE
-            
-            # Add custom vocabulary as prompt to improve transcription accuracy
-            if CUSTOM_VOCABULARY:
-                vocab_prompt = "Context: " + ", ".join(CUSTOM_VOCABULARY[:50])  # Limit to avoid token limits
-                data["prompt"] = vocab_prompt
+        data = {"model": "whisper-large-v3-turbo", "response_format": "json"}
+        
+        # Add language parameter if specified (not auto-detect)
+        if LANGUAGE and LANGUAGE != "auto":
+            data["language"] = LANGUAGE
+        
+        # Add custom vocabulary as prompt to improve transcription accuracy
+        if CUSTOM_VOCABULARY:
+            vocab_prompt = "Context: " + ", ".join(CUSTOM_VOCABULARY[:50])  # Limit to avoid token limits
+            data["prompt"] = vocab_prompt
 
-            with httpx.Client(timeout=30) as client:
-                response = client.post(url, headers=headers, files=files, data=data)
+        # Shared client: the connection is usually already open and warm
+        latency_trace.mark("request_sent")
+        response = groq_client.transcribe(API_KEY, audio, data, hedge=hedge)
+        latency_trace.mark("response_received")
 
         if response.status_code == 200:
             result = response.json()
             return result.get("text"), None
+        elif response.status_code == 429:
+            # The scheduler already waited out Retry-After and retried
+            return None, "Rate limited"
         else:
             return None, f"HTTP {response.status_code}"
 
@@ -1687,83 +1887,8 @@ EMOJI_MAP = {
 }
 
 
-def convert_emojis(text):
-    """Convert emoji phrases to actual emojis."""
-    result = text
-    
-    # Sort by length (longest first) to avoid partial matches
-    sorted_emojis = sorted(EMOJI_MAP.items(), key=lambda x: len(x[0]), reverse=True)
-    
-    for phrase, emoji in sorted_emojis:
-        # Case-insensitive replacement
-        pattern = re.compile(re.escape(phrase), re.IGNORECASE)
-        result = pattern.sub(emoji, result)
-    
-    # Clean up any double spaces left after replacements
-    result = re.sub(r'\s+', ' ', result).strip()
-    
-    return result
-
-
 # Number word to digit mapping for accounting mode
 # Only use unambiguous number words to avoid false positives
-NUMBER_WORD_MAP = {
-    # Basic numbers 0-9
-    "zero": "0",
-    "one": "1",
-    "two": "2",
-    "three": "3",
-    "four": "4",
-    "five": "5",
-    "six": "6",
-    "seven": "7",
-    "eight": "8",
-    "nine": "9",
-    
-    # Teens
-    "ten": "10",
-    "eleven": "11",
-    "twelve": "12",
-    "thirteen": "13",
-    "fourteen": "14",
-    "fifteen": "15",
-    "sixteen": "16",
-    "seventeen": "17",
-    "eighteen": "18",
-    "nineteen": "19",
-    
-    # Tens
-    "twenty": "20",
-    "thirty": "30",
-    "forty": "40",
-    "fourty": "40",
-    "fifty": "50",
-    "sixty": "60",
-    "seventy": "70",
-    "eighty": "80",
-    "ninety": "90",
-}
-
-
-def convert_numbers_to_digits(text):
-    """Convert number words to digits for accounting mode."""
-    result = text
-    
-    # Sort by length (longest first) to avoid partial matches
-    sorted_numbers = sorted(NUMBER_WORD_MAP.items(), key=lambda x: len(x[0]), reverse=True)
-    
-    for word, digit in sorted_numbers:
-        # Match word boundaries including punctuation
-        # This handles "one, two, three" properly
-        pattern = re.compile(
-            r'(?<![a-zA-Z])' + re.escape(word) + r'(?![a-zA-Z])',
-            re.IGNORECASE
-        )
-        result = pattern.sub(digit, result)
-    
-    return result
-
-
 # Common Whisper hallucinations when no speech is detected
 HALLUCINATION_PHRASES = [
     "thank you",
@@ -1785,117 +1910,6 @@ HALLUCINATION_PHRASES = [
 ]
 
 
-def filter_text(text):
-    """Filter out unwanted words from transcription."""
-    global FILTER_WORDS
-    
-    if not text:
-        return ""
-    
-    result = text.strip()
-    
-    # If empty after stripping, return empty
-    if not result:
-        return ""
-    
-    # Only use user's custom filter words - NOT hardcoded hallucinations
-    # User has full control over what to filter
-    if not FILTER_WORDS:
-        return result
-    
-    # Check if the entire text matches a filter word (case-insensitive)
-    result_lower = result.lower()
-    for filter_word in FILTER_WORDS:
-        filter_word_lower = filter_word.lower().strip()
-        if result_lower == filter_word_lower:
-            print(f"[filtered] Matched filter: '{filter_word}'")
-            return ""
-    
-    # Also check if text contains filter word as substring (for short texts)
-    if len(result) < 30:
-        for filter_word in FILTER_WORDS:
-            filter_word_lower = filter_word.lower().strip()
-            if filter_word_lower in result_lower:
-                print(f"[filtered] Contains filter: '{filter_word}'")
-                return ""
-    
-    return result
-
-
-def normalize_numbers_from_api(text):
-    """Remove commas from numbers in API response unless comma mode is enabled."""
-    global ACCOUNTING_COMMA
-    
-    print(f"[NORMALIZE] ACCOUNTING_COMMA = {ACCOUNTING_COMMA}")
-    
-    if ACCOUNTING_COMMA:
-        # Comma mode is ON - keep commas as they are from API
-        print(f"[NORMALIZE] Keeping commas (comma mode ON)")
-        return text
-    
-    # Comma mode is OFF - remove commas from numbers
-    # This handles cases where Groq API returns "1,234,567"
-    def remove_commas(match):
-        return match.group(0).replace(',', '')
-    
-    result = re.sub(r'\b[\d,]+\b', remove_commas, text)
-    print(f"[NORMALIZE] Removed commas: '{text}' -> '{result}'")
-    return result
-
-
-def format_number_with_commas(text):
-    """Add commas to large numbers in text if accounting comma mode is enabled."""
-    global ACCOUNTING_COMMA
-    
-    print(f"[COMMA_FUNC] ACCOUNTING_COMMA value: {ACCOUNTING_COMMA}")
-    
-    # Explicit check - must be True to add commas
-    if ACCOUNTING_COMMA is not True:
-        print(f"[COMMA_FUNC] SKIPPING commas - mode is OFF")
-        return text
-    
-    def add_commas(match):
-        num = match.group(0)
-        # Add commas every 3 digits from the right
-        if len(num) > 3:
-            return "{:,}".format(int(num))
-        return num
-    
-    # Find all numbers with 4+ digits and add commas
-    print(f"[COMMA_FUNC] ADDING commas")
-    return re.sub(r'\b\d{4,}\b', add_commas, text)
-
-
-def apply_casual_mode(text):
-    """Apply casual formatting: lowercase and informal punctuation."""
-    global CASUAL_MODE
-    
-    if not CASUAL_MODE:
-        return text
-    
-    print(f"[CASUAL] Applying casual mode to: '{text}'")
-    
-    # Convert to lowercase
-    result = text.lower()
-    
-    # Replace formal punctuation with casual equivalents
-    # Remove periods at end of sentences (casual texting style)
-    result = re.sub(r'\.$', '', result)
-    result = re.sub(r'\.(\s)', r'\1', result)
-    
-    # Keep exclamation and question marks as they add emotion
-    # But remove multiple punctuation like "!!!" or "???" down to one
-    result = re.sub(r'[!]{2,}', '!', result)
-    result = re.sub(r'[?]{2,}', '?', result)
-    
-    # Remove formal commas that aren't needed for clarity
-    # Keep commas in numbers though
-    result = re.sub(r',\s+', ' ', result)
-    
-    print(f"[CASUAL] Result: '{result}'")
-    return result
-
-
 # Voice commands - speak these to control text
 VOICE_COMMANDS = {
     # Editing commands
@@ -1985,213 +1999,156 @@ VOICE_COMMANDS = {
 }
 
 
-def process_voice_commands(text):
-    """Process voice commands and return modified text or special actions."""
-    global VOICE_COMMANDS, last_transcription
-    
-    text_lower = text.lower().strip()
-    
-    # Check for exact command matches
-    if text_lower in VOICE_COMMANDS:
-        command_value = VOICE_COMMANDS[text_lower]
-        
-        # Handle special delete commands
-        if command_value == "__DELETE_WORD__":
-            print("[command] Delete last word")
-            keyboard.press_and_release("ctrl+backspace")
-            return None
-        elif command_value == "__DELETE_SENTENCE__":
-            print("[command] Delete last sentence")
-            keyboard.press_and_release("ctrl+shift+left")
-            keyboard.press_and_release("backspace")
-            return None
-        elif command_value == "__DELETE_ALL__":
-            print("[command] Delete all")
-            keyboard.press_and_release("ctrl+a")
-            keyboard.press_and_release("backspace")
-            return None
-        
-        # Handle navigation/editing commands
-        elif command_value == "__SELECT_ALL__":
-            print("[command] Select all")
-            keyboard.press_and_release("ctrl+a")
-            return None
-        elif command_value == "__COPY__":
-            print("[command] Copy")
-            keyboard.press_and_release("ctrl+c")
-            return None
-        elif command_value == "__PASTE__":
-            print("[command] Paste")
-            keyboard.press_and_release("ctrl+v")
-            return None
-        elif command_value == "__CUT__":
-            print("[command] Cut")
-            keyboard.press_and_release("ctrl+x")
-            return None
-        elif command_value == "__UNDO__":
-            print("[command] Undo")
-            keyboard.press_and_release("ctrl+z")
-            return None
-        elif command_value == "__REDO__":
-            print("[command] Redo")
-            keyboard.press_and_release("ctrl+y")
-            return None
-        elif command_value == "__REPEAT_LAST__":
-            print("[command] Repeat last transcription")
-            if last_transcription:
-                type_text(last_transcription)
-            return None
-        
-        # Return the replacement text
-        print(f"[command] '{text}' → '{command_value}'")
-        return command_value
-    
-    # Check for inline commands (commands within longer text)
-    result = text
-    for command, replacement in VOICE_COMMANDS.items():
-        if replacement.startswith("__"):
-            continue  # Skip special commands for inline use
-        pattern = re.compile(re.escape(command), re.IGNORECASE)
-        if pattern.search(result):
-            result = pattern.sub(replacement, result)
-            print(f"[command] Inline: '{command}' → '{replacement}'")
+def run_voice_action(command_value):
+    """Run an action voice command (an utterance that is just "undo", "delete all"...)."""
+    global last_transcription
     
+    # Handle special delete commands
+    if command_value == "__DELETE_WORD__":
+        log.debug("[command] Delete last word")
+        keyboard.press_and_release("ctrl+backspace")
+        return None
+    elif command_value == "__DELETE_SENTENCE__":
+        log.debug("[command] Delete last sentence")
+        keyboard.press_and_release("ctrl+shift+left")
+        keyboard.press_and_release("backspace")
+        return None
+    elif command_value == "__DELETE_ALL__":
+        log.debug("[command] Delete all")
+        keyboard.press_and_release("ctrl+a")
+        keyboard.press_and_release("backspace")
+        return None
+    
+    # Handle navigation/editing commands
+    elif command_value == "__SELECT_ALL__":
+        log.debug("[command] Select all")
+        keyboard.press_and_release("ctrl+a")
+        return None
+    elif command_value == "__COPY__":
+        log.debug("[command] Copy")
+        keyboard.press_and_release("ctrl+c")
+        return None
+    elif command_value == "__PASTE__":
+        log.debug("[command] Paste")
+        keyboard.press_and_release("ctrl+v")
+        return None
+    elif command_value == "__CUT__":
+        log.debug("[command] Cut")
+        keyboard.press_and_release("ctrl+x")
+        return None
+    elif command_value == "__UNDO__":
+        log.debug("[command] Undo")
+        keyboard.press_and_release("ctrl+z")
+        return None
+    elif command_value == "__REDO__":
+        log.debug("[command] Redo")
+        keyboard.press_and_release("ctrl+y")
+        return None
+    elif command_value == "__REPEAT_LAST__":
+        log.debug("[command] Repeat last transcription")
+        if last_transcription:
+            type_text(last_transcription)
+        return None
+
+
+def process_text(text, commands=True):
+    """Run the text pipeline on a transcript and return the text to type.
+
+    Returns "" when the text was filtered out and None when it was an
+    action command that has already been executed. Batch mode passes
+    commands=False, since there is nothing to act on.
+    """
+    result = text_pipeline.process(text, commands)
+    if result is None:
+        log.debug("[command] Action command executed")
+    elif not result:
+        log.debug("[filtered] Text was filtered out, nothing to type")
+    elif result != text:
+        log.debug(f"[text] '{text}' -> '{result}'")
     return result
 
 
 def type_text(text):
     """Type text using clipboard."""
-    global ACCOUNTING_MODE, ACCOUNTING_COMMA, CASUAL_MODE
-    
-    # Very explicit debug
-    print("=" * 60)
-    print(f"[TYPE_TEXT] ACCOUNTING_MODE = {ACCOUNTING_MODE}")
-    print(f"[TYPE_TEXT] ACCOUNTING_COMMA = {ACCOUNTING_COMMA}")
-    print(f"[TYPE_TEXT] Original text: '{text}'")
-    
-    # First, normalize numbers from API (remove commas unless comma mode is ON)
-    text = normalize_numbers_from_api(text)
-    
-    # Then convert number words to digits if accounting mode is enabled
-    # Do this BEFORE filtering so "one" -> "1" works
-    if ACCOUNTING_MODE:
-        original = text
-        text = convert_numbers_to_digits(text)
-        print(f"[TYPE_TEXT] CONVERTED: '{original}' -> '{text}'")
-        
-        # Add commas to large numbers if enabled
-        if ACCOUNTING_COMMA:
-            text_before_comma = text
-            text = format_number_with_commas(text)
-            if text != text_before_comma:
-                print(f"[TYPE_TEXT] COMMAS: '{text_before_comma}' -> '{text}'")
-    else:
-        print(f"[TYPE_TEXT] SKIPPING conversion - mode is OFF")
-    print("=" * 60)
-    
-    # Apply filter after conversion
-    text = filter_text(text)
-    
-    # If text was filtered out, don't type anything
+    text = process_text(text)
     if not text:
-        print("[filtered] Text was filtered out, nothing to type")
-        return
-    
-    # Apply voice macros (expand text shortcuts)
-    text = apply_macros(text)
-    
-    # Process voice commands (delete, new paragraph, etc.)
-    command_result = process_voice_commands(text)
-    if command_result is None:
-        # It was an action command (delete), already executed
-        print("[command] Action command executed")
         return
-    text = command_result
-    
-    # Convert emoji phrases to actual emojis
-    text = convert_emojis(text)
-    
-    # Apply casual mode (lowercase, informal punctuation)
-    text = apply_casual_mode(text)
     
     # Update statistics
     update_stats(text)
     
-    print(f"[typing] {text}")
+    log.debug(f"[typing] {text}")
     
     # Check if Quicken mode is enabled
-    if QUICKEN_MODE:
-        # Type character-by-character for Quicken compatibility
-        print("[quicken] Using character-by-character typing")
-        for char in text:
-            keyboard.write(char)
-            time.sleep(0.01)  # Small delay between characters for compatibility
-        # Add space at end
-        keyboard.write(" ")
-    else:
-        # Normal clipboard paste mode (faster)
-        pyperclip.copy(text)
-        time.sleep(0.05)
-        keyboard.press_and_release("ctrl+v")
+    # Our own keystrokes (a shifted capital, say) must not trigger push-to-talk
+    with hotkeys.paused():
+        if QUICKEN_MODE:
+            # Type character-by-character for Quicken compatibility
+            log.debug("[quicken] Using character-by-character typing")
+            for char in text:
+                keyboard.write(char)
+                time.sleep(0.01)  # Small delay between characters for compatibility
+            # Add space at end
+            keyboard.write(" ")
+        else:
+            # Normal clipboard paste mode (faster)
+            pyperclip.copy(text)
+            time.sleep(0.05)
+            keyboard.press_and_release("ctrl+v")
+    latency_trace.mark("paste")
 
+    # After the paste: the history writer saves it in the background
+    save_to_history(text)
 
-def apply_macros(text):
-    """Apply voice macros to expand shortcuts."""
-    global MACROS
-    
-    if not MACROS:
-        return text
-    
-    result = text
-    today = time.strftime("%Y-%m-%d")
-    now = time.strftime("%H:%M:%S")
-    datetime = time.strftime("%Y-%m-%d %H:%M:%S")
-    
-    # Sort by length (longest first) to avoid partial matches
-    sorted_macros = sorted(MACROS.items(), key=lambda x: len(x[0]), reverse=True)
-    
-    for phrase, expansion in sorted_macros:
-        # Case-insensitive replacement
-        pattern = re.compile(re.escape(phrase), re.IGNORECASE)
-        
-        # Replace dynamic placeholders
-        expansion = expansion.replace("{{DATE}}", today)
-        expansion = expansion.replace("{{TIME}}", now)
-        expansion = expansion.replace("{{DATETIME}}", datetime)
-        
-        result = pattern.sub(expansion, result)
-    
-    # Clean up any double spaces
-    result = re.sub(r'\s+', ' ', result).strip()
-    
-    return result
+
+def expand_macro(expansion):
+    """Fill in the dynamic placeholders of a macro expansion."""
+    if "{{" not in expansion:
+        return expansion
+    expansion = expansion.replace("{{DATE}}", time.strftime("%Y-%m-%d"))
+    expansion = expansion.replace("{{TIME}}", time.strftime("%H:%M:%S"))
+    expansion = expansion.replace("{{DATETIME}}", time.strftime("%Y-%m-%d %H:%M:%S"))
+    return expansion
+
+
+def pipeline_settings():
+    """Snapshot of the settings the text pipeline is built from."""
+    return {
+        "capitalize_sentences": CAPITALIZE_SENTENCES,
+        "smart_quotes": SMART_QUOTES,
+        "word_replacements": WORD_REPLACEMENTS,
+        "accounting_mode": ACCOUNTING_MODE,
+        "accounting_comma": ACCOUNTING_COMMA,
+        "filter_words": FILTER_WORDS,
+        "voice_commands": VOICE_COMMANDS,
+        "macros": MACROS,
+        "emojis": EMOJI_MAP,
+        "casual_mode": CASUAL_MODE,
+    }
+
+
+# Compiled on first use; settings save calls text_pipeline.invalidate()
+text_pipeline = TextPipeline(pipeline_settings, run_action=run_voice_action, expand=expand_macro,
+                             profile=PROFILE_PIPELINE)
 
 
 def save_to_history(text):
-    """Save transcription to history."""
-    global HISTORY
+    """Append a transcription to the history file."""
     if not HISTORY_ENABLED or not text:
         return
     
-    entry = {
-        "text": text,
-        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
-        "words": len(text.split())
-    }
-    HISTORY.insert(0, entry)
-    HISTORY = HISTORY[:100]  # Keep last 100
-    
     try:
-        HISTORY_FILE.write_text(json.dumps(HISTORY, indent=2))
-    except:
-        pass
+        load_history()
+        history.append(text)
+    except Exception as e:
+        log.warning(f"[history] Could not save: {e}")
 
 
 def export_history():
     """Export history to a text file on desktop."""
-    global HISTORY
-    if not HISTORY:
-        print("[export] No history to export")
+    load_history()
+    if not len(history):
+        log.info("[export] No history to export")
         return
     
     from datetime import datetime
@@ -2206,85 +2163,137 @@ def export_history():
         with open(export_file, "w", encoding="utf-8") as f:
             f.write("VoiceType Transcription History\n")
             f.write(f"Exported: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write(f"Total entries: {len(HISTORY)}\n")
+            f.write(f"Total entries: {len(history)}\n")
             f.write("=" * 50 + "\n\n")
             
-            for i, entry in enumerate(HISTORY, 1):
-                f.write(f"[{entry.get('timestamp', 'Unknown')}] ({entry.get('words', 0)} words)\n")
-                f.write(f"{entry.get('text', '')}\n\n")
+            # Newest first, a page at a time so the whole history is never in memory
+            for start in range(0, len(history), 1000):
+                for entry in history.page(start, 1000):
+                    f.write(f"[{entry.get('timestamp', 'Unknown')}] ({entry.get('words', 0)} words)\n")
+                    f.write(f"{entry.get('text', '')}\n\n")
         
-        print(f"[export] Exported {len(HISTORY)} entries to {export_file}")
+        log.info(f"[export] Exported {len(history)} entries to {export_file}")
     except Exception as e:
-        print(f"[export] Error: {e}")
+        log.error(f"[export] Error: {e}")
 
 
 def update_stats(text):
-    """Update usage statistics."""
-    global STATS
-    
+    """Update usage statistics (saved to disk later, off the typing path)."""
     word_count = len(text.split())
-    STATS["total_words"] += word_count
-    STATS["total_transcriptions"] += 1
-    STATS["last_used"] = time.strftime("%Y-%m-%d %H:%M:%S")
-    
-    if STATS["first_used"] is None:
-        STATS["first_used"] = STATS["last_used"]
-    
-    # Save stats to file
-    try:
-        STATS_FILE.write_text(json.dumps(STATS, indent=2))
-    except:
-        pass
-    
-    # Save to history
-    save_to_history(text)
+    with STATS.edit() as stats:
+        stats["total_words"] += word_count
+        stats["total_transcriptions"] += 1
+        stats["last_used"] = time.strftime("%Y-%m-%d %H:%M:%S")
+        if stats["first_used"] is None:
+            stats["first_used"] = stats["last_used"]
+
+
+def record_scheduler_stats():
+    """Add the retries and hedges since the last call to the usage stats."""
+    if groq_client is None:
+        return
+    counts = groq_client.scheduler.take_counts()
+    if any(counts.values()):
+        with STATS.edit() as stats:
+            for name, amount in counts.items():
+                stats[f"api_{name}"] = stats.get(f"api_{name}", 0) + amount
+
+
+def record_vad_stats(trims):
+    """Count silence trimmed and API calls skipped by the no-speech gate for one
+    push-to-talk utterance; trims holds the (trimmed_ms, skipped) of each request."""
+    if not trims:
+        return
+    with STATS.edit() as stats:
+        for trimmed_ms, skipped in trims:
+            stats["silence_trimmed_ms"] += int(trimmed_ms)
+            if skipped:
+                stats["skipped_calls"] += 1
+
+
+def trim_to_speech(buffer):
+    """Trim silence off a PcmBuffer in place. Returns (trimmed_ms, skipped);
+    skipped is True if it holds no speech."""
+    recorded_ms = buffer.duration * 1000
+    speech = find_speech(buffer.pcm(), buffer.rate)
+    if speech is None:
+        log.debug(f"[vad] No speech in {recorded_ms:.0f} ms, skipping API call")
+        return recorded_ms, True
+    buffer.trim(*speech)
+    trimmed_ms = recorded_ms - buffer.duration * 1000
+    log.debug(f"[vad] Trimmed {trimmed_ms:.0f} ms of {recorded_ms:.0f} ms")
+    return trimmed_ms, False
+
+
+def transcribe_buffer(buffer, hedge=False, trims=None):
+    """Trim, encode and transcribe a PcmBuffer. Returns ("", None) if it holds no speech.
+
+    If trims is a list, the trim result is appended to it (see record_vad_stats).
+    """
+    if TRIM_SILENCE:
+        trim = trim_to_speech(buffer)
+        if trims is not None:
+            trims.append(trim)
+        if trim[1]:
+            return "", None
+    encoded = codec_policy.encode(buffer, groq_client.uplink.throughput)
+    latency_trace.mark("encode_done")
+    log.debug(f"[encode] {encoded.codec}: {encoded.raw_size // 1024} KB -> "
+              f"{len(encoded) // 1024} KB in {encoded.encode_seconds * 1000:.0f} ms")
+    return transcribe_with_groq(encoded, hedge=hedge)
 
 
 def record_and_transcribe():
     """Record audio while Shift is held, then transcribe with Groq Whisper."""
+    trace = latency_trace.start("hotkey_down")
     # Show widget when recording starts
     if widget and widget.hidden:
         widget.root.after(0, widget.show_widget)
     update_status("recording", "Speak now...")
-    print("Recording...")
+    log.debug("Recording...")
+
+    # Open the API connection while the user is still talking
+    if API_KEY:
+        groq_client.warm()
 
+    segmenter = None
+    trims = []  # Trim results of this utterance's requests, for the VAD stats
     try:
-        mic_idx = MIC_INDEX if MIC_INDEX is not None else 0
-
-        p = pyaudio.PyAudio()
-
-        chunk = 1024
-        format = pyaudio.paInt16
-        channels = 1
-        rate = SAMPLE_RATE
-
-        stream = p.open(
-            format=format,
-            channels=channels,
-            rate=rate,
-            input=True,
-            input_device_index=mic_idx,
-            frames_per_buffer=chunk,
-        )
+        # The engine's stream is already running; this hands over the pre-roll
+        utterance = audio_engine.begin()
+
+        # Long dictations are sent in pieces at pauses while the key is still down
+        if PIPELINE_SEGMENTS and API_KEY:
+            # Segments are sent from worker threads, each into a child trace of its own
+            segment = latency_trace.per_segment(
+                trace, lambda buffer: transcribe_buffer(buffer, HEDGE_REQUESTS, trims))
+            segmenter = PauseSegmenter(segment, audio_engine.rate,
+                                       audio_engine.channels, audio_engine.sample_width,
+                                       preroll=utterance.preroll)
 
-        frames = []
         start_time = time.time()
         last_sound_time = time.time()  # Track when we last heard sound
         silence_start = None
-
-        while keyboard.is_pressed(HOTKEY):
-            data = stream.read(chunk, exception_on_overflow=False)
-            frames.append(data)
+        first_frame = True
+
+        # The key's release wakes read(), so the loop stops without waiting for a chunk
+        while hotkeys.is_held(HOTKEY):
+            data = utterance.read()
+            if data is None:
+                continue
+            if first_frame:
+                latency_trace.mark("first_frame")
+                first_frame = False
             
-            # Calculate audio level for visual feedback
-            import struct
-            samples = struct.unpack(f'<{len(data)//2}h', data)
-            max_sample = max(abs(s) for s in samples) if samples else 0
-            level = min(max_sample / 32768.0, 1.0)  # Normalize to 0-1
+            # Peak drives the level bar and silence detection; one pass over the buffer
+            level, _ = measure_levels(data)
             
-            # Update widget level indicator
+            # Update widget level indicator (drawn on the widget's next frame)
             if widget:
-                widget.root.after(0, lambda l=level: widget.update_level(l))
+                widget.update_level(level)
+
+            if segmenter:
+                segmenter.feed(data, level)
             
             # Silence detection for auto-stop
             if AUTO_STOP:
@@ -2300,17 +2309,20 @@ def record_and_transcribe():
                         silence_duration = time.time() - silence_start
                         # Auto-stop after threshold seconds of silence
                         if silence_duration >= SILENCE_THRESHOLD:
-                            print(f"[auto-stop] {SILENCE_THRESHOLD}s silence detected")
+                            log.debug(f"[auto-stop] {SILENCE_THRESHOLD}s silence detected")
                             break
 
+        audio_engine.end()
+        latency_trace.mark("hotkey_up")
         duration = time.time() - start_time
-        print(f"Recorded {duration:.1f}s")
 
-        stream.stop_stream()
-        stream.close()
-        p.terminate()
+        # Chunks that arrived after the loop's last read belong to the tail
+        if segmenter:
+            for data in utterance.drain():
+                segmenter.feed(data)
+        log.debug(f"Recorded {duration:.1f}s (+{utterance.preroll_count} pre-roll chunks)")
 
-        if len(frames) < 15:
+        if utterance.live_count < 15:
             update_status("error", "Too short")
             time.sleep(1)
             widget.root.after(0, widget.hide_widget)
@@ -2326,19 +2338,26 @@ def record_and_transcribe():
 
         update_status("processing", "")
 
-        # Save to temp wav
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as f:
-            temp_path = f.name
+        if segmenter and segmenter.segments:
+            # Earlier segments are already in flight; only the tail is left
+            text, error = segmenter.finish()
+            latency_trace.mark("segments_done")
+            log.debug(f"[segment] Stitched {segmenter.segments} segments")
+            if error:
+                log.warning(f"[segment] {error}, retrying as a single request")
+                trims.clear()  # Only the retry's trim counts
+                text, error = transcribe_buffer(utterance.buffer, HEDGE_REQUESTS, trims)
+        else:
+            if segmenter:
+                segmenter.cancel()
+            # Trim silence, compress if it pays off on this uplink, upload from memory
+            text, error = transcribe_buffer(utterance.buffer, HEDGE_REQUESTS, trims)
 
-        wf = wave.open(temp_path, "wb")
-        wf.setnchannels(channels)
-        wf.setsampwidth(p.get_sample_size(format))
-        wf.setframerate(rate)
-        wf.writeframes(b"".join(frames))
-        wf.close()
+        record_vad_stats(trims)
 
-        # Transcribe
-        text, error = transcribe_with_groq(temp_path)
+        # Trimming found nothing worth sending
+        if not text and not error:
+            error = "No speech detected"
         
         # Save audio if enabled
         if SAVE_AUDIO and text:
@@ -2346,44 +2365,13 @@ def record_and_transcribe():
             audio_dir.mkdir(exist_ok=True)
             timestamp = time.strftime("%Y%m%d_%H%M%S")
             audio_file = audio_dir / f"recording_{timestamp}.wav"
-            import shutil
-            shutil.copy(temp_path, audio_file)
-            print(f"[audio] Saved to {audio_file}")
-        
-        Path(temp_path).unlink(missing_ok=True)
+            audio_file.write_bytes(utterance.wav())
+            log.info(f"[audio] Saved to {audio_file}")
 
         if text:
-            text = text.strip()
+            text = text_pipeline.polish(text)
             
-            # Capitalize first letter of sentences if enabled
-            if CAPITALIZE_SENTENCES:
-                text = text[0].upper() + text[1:] if text else text
-                # Capitalize after sentence endings
-                import re
-                text = re.sub(r'([.!?]\s+)([a-z])', lambda m: m.group(1) + m.group(2).upper(), text)
-
-            # Apply smart quotes if enabled
-            if SMART_QUOTES:
-                # Replace straight quotes with curly quotes
-                result = []
-                in_quote = False
-                for char in text:
-                    if char == '"':
-                        if in_quote:
-                            result.append('"')  # Closing quote
-                        else:
-                            result.append('"')  # Opening quote
-                        in_quote = not in_quote
-                    else:
-                        result.append(char)
-                text = ''.join(result)
-            
-            # Apply word replacements if configured
-            if WORD_REPLACEMENTS:
-                for old_word, new_word in WORD_REPLACEMENTS.items():
-                    text = text.replace(old_word, new_word)
-            
-            print(f"[whisper] {text}")
+            log.debug(f"[whisper] {text}")
             
             # Store last transcription for copy feature
             last_transcription = text
@@ -2415,12 +2403,17 @@ def record_and_transcribe():
             threading.Thread(target=hide_after_error, daemon=True).start()
 
     except Exception as e:
+        audio_engine.end()
+        if segmenter:
+            segmenter.cancel()
         update_status("error", str(e)[:30])
-        print(f"Error: {e}")
+        log.error(f"Error: {e}")
         time.sleep(1.5)
         widget.root.after(0, widget.hide_widget)
     finally:
         state.recording = False
+        latency_trace.finish(trace_log)
+        record_scheduler_stats()
 
 
 # Keyboard shortcuts overlay
@@ -2509,31 +2502,48 @@ def show_shortcuts_overlay():
     overlay.mainloop()
 
 
-def hotkey_loop():
-    """Poll for hotkey state."""
-    was_pressed = False
-    while state.running:
-        is_pressed = keyboard.is_pressed(HOTKEY)
-        if is_pressed and not was_pressed and not state.recording:
-            was_pressed = True
-            state.recording = True
-            threading.Thread(target=record_and_transcribe, daemon=True).start()
-        elif not is_pressed and was_pressed:
-            was_pressed = False
-        
-        # Check for F1 to show shortcuts overlay
-        if keyboard.is_pressed("f1") and not SHORTCUTS_OVERLAY_VISIBLE:
-            keyboard.release("f1")
-            time.sleep(0.1)
-            show_shortcuts_overlay()
-        
-        # F2 to show quick snippets
-        if keyboard.is_pressed("f2") and not SNIPPETS_VISIBLE:
-            keyboard.release("f2")
-            time.sleep(0.1)
-            show_snippets_popup()
-        
-        time.sleep(0.02)
+def on_hotkey_press():
+    """Push-to-talk key went down: start recording."""
+    if not state.recording:
+        state.recording = True
+        threading.Thread(target=record_and_transcribe, daemon=True).start()
+
+
+def on_hotkey_release():
+    """Push-to-talk key came up: wake the recording loop so it stops right away."""
+    if audio_engine:
+        audio_engine.wake()
+
+
+def on_shortcuts_key():
+    if not SHORTCUTS_OVERLAY_VISIBLE:
+        threading.Thread(target=show_shortcuts_overlay, daemon=True).start()
+
+
+def on_snippets_key():
+    if not SNIPPETS_VISIBLE:
+        threading.Thread(target=show_snippets_popup, daemon=True).start()
+
+
+def setup_hotkeys():
+    """Hook push-to-talk, F1 (shortcuts) and F2 (snippets). Nothing polls the keyboard."""
+    global hotkeys
+    hotkeys = Hotkeys()
+    hotkeys.bind(HOTKEY, on_press=on_hotkey_press, on_release=on_hotkey_release)
+    hotkeys.bind("f1", on_press=on_shortcuts_key)
+    hotkeys.bind("f2", on_press=on_snippets_key)
+
+
+def set_hotkey(key):
+    """Move push-to-talk to key, keeping the old one if the keyboard library doesn't know it."""
+    global HOTKEY
+    if hotkeys and key != HOTKEY:
+        try:
+            hotkeys.rebind(HOTKEY, key)
+        except ValueError as e:
+            log.warning(f"[hotkey] Can't use '{key}': {e}")
+            return
+    HOTKEY = key
 
 
 # Quick snippets popup
@@ -2603,19 +2613,65 @@ def show_snippets_popup():
     popup.mainloop()
 
 
-def main():
-    global widget, tray_icon, STATS
+def start():
+    """Bring up what push-to-talk needs (widget, hotkey, microphone), then hand
+    the rest of startup to a background thread. Returns once the hotkey works."""
+    global widget, audio_engine, groq_client, codec_policy
+
+    widget = FloatingWidget()
+    setup_hotkeys()
+
+    # Open the microphone once and keep it armed so recording starts instantly
+    audio_engine = AudioEngine(device_index=MIC_INDEX, preroll_ms=PREROLL_MS, mode=CAPTURE_MODE)
+    try:
+        audio_engine.arm()
+    except Exception as e:
+        log.warning(f"[audio] Could not open microphone yet: {e}")
+
+    # One pooled API connection for the whole session; httpx is imported and
+    # the connection opened by the first keep-alive ping, in the background
+    groq_client = GroqClient(base_url=API_BASE_URL, verify=API_CA_BUNDLE or True)
+    codec_policy = CodecPolicy(mode=UPLOAD_CODEC)
 
+    # Start minimized if configured
+    if MINIMIZE_STARTUP:
+        widget.hide_widget()
+        print("Started minimized to tray")
+
+    print(f"\nReady! Hold {HOTKEY.upper()} to record.")
+    threading.Thread(target=deferred_startup, daemon=True).start()
+
+    # First run: open settings so the API key can be entered
+    if not API_KEY:
+        widget.root.after(500, widget.open_settings)
+
+
+def deferred_startup():
+    """Startup work push-to-talk doesn't wait for; runs once the widget is up."""
+    global tray_icon, trace_log
+    # Reads back the recent traces; utterances before this aren't recorded
+    trace_log = latency_trace.TraceLog(TRACE_FILE)
+    if API_KEY:
+        groq_client.warm()
+    groq_client.start_keepalive()
+    text_pipeline.stages()  # Compile the text stages now rather than on the first utterance
+    try:
+        tray_icon = create_tray_icon()
+        threading.Thread(target=tray_icon.run, daemon=True).start()
+    except Exception as e:
+        log.warning(f"[tray] Could not start tray icon: {e}")
+    load_history()
+    startup_done.set()
+    log.debug("[startup] Background startup done")
+
+
+def main():
     print("=" * 50)
     print(f"Voice Type v{__version__} - Groq Whisper (Hold {HOTKEY.upper()})")
     print("=" * 50)
 
     # Increment session count
-    STATS["total_sessions"] += 1
-    try:
-        STATS_FILE.write_text(json.dumps(STATS, indent=2))
-    except:
-        pass
+    STATS.add("total_sessions")
 
     if not API_KEY:
         print("\n  No API key found!")
@@ -2626,29 +2682,45 @@ def main():
     if MACROS:
         print(f"Macros loaded: {len(MACROS)}")
 
-    widget = FloatingWidget()
+    start()
 
-    # Start minimized if configured
-    if MINIMIZE_STARTUP:
-        widget.hide_widget()
-        print("Started minimized to tray")
+    try:
+        widget.run()
+    except KeyboardInterrupt:
+        widget.quit_app()
 
-    # Create and start tray icon
-    tray_icon = create_tray_icon()
-    threading.Thread(target=tray_icon.run, daemon=True).start()
 
-    threading.Thread(target=hotkey_loop, daemon=True).start()
+def batch_main(argv):
+    """Headless `voice_type.py batch` entry point."""
+    global groq_client, codec_policy
 
-    print(f"\nReady! Hold {HOTKEY.upper()} to record.")
+    import batch_transcribe
 
-    # Auto-open settings window on startup
-    widget.root.after(500, widget.open_settings)
+    # Parse first so --help and usage errors work without an API key
+    args = batch_transcribe.parse_args(argv)
+    if not API_KEY:
+        print("No API key found! Add it in Settings or ~/.voice-type-config.json")
+        return 1
 
+    groq_client = GroqClient(base_url=API_BASE_URL, verify=API_CA_BUNDLE or True)
+    codec_policy = CodecPolicy(mode=UPLOAD_CODEC)
     try:
-        widget.run()
-    except KeyboardInterrupt:
-        widget.quit_app()
+        return batch_transcribe.main(
+            args,
+            transcribe_buffer=transcribe_buffer,
+            transcribe_path=transcribe_with_groq,
+            process_text=lambda text: process_text(text_pipeline.polish(text), commands=False),
+        )
+    finally:
+        log.info(f"[scheduler] {groq_client.scheduler.summary()}")
+        if PROFILE_PIPELINE:
+            log.info(f"[pipeline]\n{text_pipeline.profile_summary()}")
+        groq_client.close()
+        STATS.close()
+        app_logging.shutdown()
 
 
 if __name__ == "__main__":
+    if BATCH_MODE:
+        sys.exit(batch_main(sys.argv[2:]))
     main()
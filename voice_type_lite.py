@@ -8,8 +8,7 @@ import os
 import threading
 import time
 import json
-import tempfile
-import re
+import logging
 from pathlib import Path
 
 if sys.stdout:
@@ -20,14 +19,22 @@ print("Loading Voice Type Lite...")
 import keyboard
 import pyperclip
 import tkinter as tk
-import pyaudio
-import wave
-import httpx
+
+import app_logging
+from audio_engine import AudioEngine
+from audio_encoding import CodecPolicy
+from audio_levels import find_speech
+from groq_client import GroqClient, DEFAULT_BASE_URL
+from hotkeys import Hotkeys
+from text_pipeline import TextPipeline
 
 print("Ready!")
 
+log = logging.getLogger(__name__)
+
 # Config - uses same config as regular version for compatibility
 CONFIG_FILE = Path.home() / ".voice-type-config.json"
+LOG_FILE = Path.home() / ".voice-type-lite.log"
 SAMPLE_RATE = 16000
 
 # Default filter words
@@ -44,7 +51,6 @@ config_data = {
 if CONFIG_FILE.exists():
     try:
         config_data = json.loads(CONFIG_FILE.read_text())
-        print(f"[config] Loaded from {CONFIG_FILE}")
     except Exception as e:
         print(f"[config] Error loading: {e}")
 
@@ -55,14 +61,28 @@ ACCOUNTING_MODE = config_data.get("accounting_mode", False)
 ACCOUNTING_COMMA = config_data.get("accounting_comma", False)
 CASUAL_MODE = config_data.get("casual_mode", False)
 FILTER_WORDS = config_data.get("filter_words", DEFAULT_FILTER_WORDS)
-
-print(f"[startup] HOTKEY: {HOTKEY}")
-print(f"[startup] MIC_INDEX: {MIC_INDEX}")
+PREROLL_MS = config_data.get("preroll_ms", 300)
+CAPTURE_MODE = config_data.get("capture_mode", "callback")
+API_BASE_URL = config_data.get("api_base_url") or DEFAULT_BASE_URL
+UPLOAD_CODEC = config_data.get("upload_codec", "auto")
+HEDGE_REQUESTS = config_data.get("hedge_requests", True)
+TRIM_SILENCE = config_data.get("trim_silence", True)
+API_CA_BUNDLE = config_data.get("api_ca_bundle")
+DEBUG_LOGGING = config_data.get("debug_logging", False)
+
+app_logging.add_secret(API_KEY)
+app_logging.setup(debug=DEBUG_LOGGING, log_file=LOG_FILE)
+log.debug(f"[startup] Config {CONFIG_FILE}: hotkey {HOTKEY}, mic {MIC_INDEX}")
 
 # State
 recording = False
 running = True
 settings_open = False
+audio_engine = None
+hotkeys = Hotkeys()
+startup_done = threading.Event()  # Set when deferred_startup() has finished
+groq_client = None
+codec_policy = None
 
 
 class FloatingWidget:
@@ -152,15 +172,8 @@ class FloatingWidget:
         mic_frame = tk.Frame(content, bg="#2d2d44")
         mic_frame.pack(fill=tk.X, pady=(5, 15))
         
-        p = pyaudio.PyAudio()
-        mics = []
-        mic_names = []
-        for i in range(p.get_device_count()):
-            dev = p.get_device_info_by_index(i)
-            if dev["maxInputChannels"] > 0:
-                mics.append((i, dev["name"]))
-                mic_names.append(f"{i}: {dev['name'][:35]}")
-        p.terminate()
+        mics = audio_engine.input_devices()
+        mic_names = [f"{i}: {name[:35]}" for i, name in mics]
 
         mic_var = tk.StringVar()
         if mics:
@@ -244,21 +257,28 @@ class FloatingWidget:
             global API_KEY, MIC_INDEX, HOTKEY, ACCOUNTING_MODE, ACCOUNTING_COMMA, CASUAL_MODE, FILTER_WORDS, config_data
             
             API_KEY = api_entry.get().strip()
+            app_logging.add_secret(API_KEY)
             
             selected = mic_var.get()
             for i, name in enumerate(mic_names):
                 if name == selected and i < len(mics):
                     MIC_INDEX = mics[i][0]
-                    print(f"[save] Mic: {MIC_INDEX}")
+                    log.debug(f"[save] Mic: {MIC_INDEX}")
                     break
+            try:
+                audio_engine.set_device(MIC_INDEX)
+            except Exception as e:
+                log.warning(f"[save] Could not switch microphone: {e}")
             
             new_hotkey = hotkey_var.get().lower()
-            if new_hotkey and new_hotkey != "...":
-                # Re-register hotkey
-                keyboard.unhook_all_hotkeys()
-                HOTKEY = new_hotkey
-                setup_hotkey()
-                print(f"[save] Hotkey: {HOTKEY}")
+            if new_hotkey and new_hotkey != "..." and new_hotkey != HOTKEY:
+                # Move the hook over; an unknown key name keeps the old one
+                try:
+                    hotkeys.rebind(HOTKEY, new_hotkey)
+                    HOTKEY = new_hotkey
+                    log.debug(f"[save] Hotkey: {HOTKEY}")
+                except ValueError as e:
+                    log.warning(f"[save] Can't use hotkey '{new_hotkey}': {e}")
 
             ACCOUNTING_MODE = accounting_var.get()
             ACCOUNTING_COMMA = comma_var.get()
@@ -274,13 +294,14 @@ class FloatingWidget:
             config_data["accounting_comma"] = ACCOUNTING_COMMA
             config_data["casual_mode"] = CASUAL_MODE
             config_data["filter_words"] = FILTER_WORDS
+            text_pipeline.invalidate()
             
             try:
                 CONFIG_FILE.write_text(json.dumps(config_data))
-                print(f"[save] Saved to {CONFIG_FILE}")
+                log.info(f"[save] Saved to {CONFIG_FILE}")
                 save_btn.config(text="✓ Saved!", bg="#00aa55")
             except Exception as e:
-                print(f"[save] ERROR: {e}")
+                log.error(f"[save] ERROR: {e}")
                 save_btn.config(text="Error!", bg="#aa0000")
             
             win.after(1500, lambda: save_btn.config(text="Save", bg="#4a9eff"))
@@ -292,12 +313,8 @@ class FloatingWidget:
 
         def close_and_quit():
             """Close settings and quit the entire app."""
-            global running
-            running = False
-            keyboard.unhook_all()
             win.destroy()
-            self.root.quit()
-            os._exit(0)
+            self.quit_app()
 
         save_btn = tk.Button(btn_frame, text="Save", command=save, 
                             bg="#4a9eff", fg="white", font=("Arial", 11, "bold"), 
@@ -320,7 +337,12 @@ class FloatingWidget:
         global running
         running = False
         keyboard.unhook_all()
+        if audio_engine:
+            audio_engine.close()
+        if groq_client:
+            groq_client.close()
         self.root.quit()
+        app_logging.shutdown()
         os._exit(0)
 
     def update_status(self, status, text=""):
@@ -340,24 +362,14 @@ class FloatingWidget:
 widget = None
 
 
-def transcribe_with_groq(audio_path):
-    """Use Groq Whisper API."""
+def transcribe_with_groq(audio):
+    """Use Groq Whisper API. audio is a file path, EncodedAudio or in-memory WAV buffer."""
     if not API_KEY:
         return None, "No API key"
 
     try:
-        url = "https://api.groq.com/openai/v1/audio/transcriptions"
-        headers = {"Authorization": f"Bearer {API_KEY}"}
-
-        # Read file contents first
-        with open(audio_path, "rb") as f:
-            audio_data = f.read()
-
-        files = {"file": ("audio.wav", audio_data, "audio/wav")}
         data = {"model": "whisper-large-v3-turbo", "response_format": "json"}
-
-        with httpx.Client(timeout=30) as client:
-            response = client.post(url, headers=headers, files=files, data=data)
+        response = groq_client.transcribe(API_KEY, audio, data, hedge=HEDGE_REQUESTS)
 
         if response.status_code == 200:
             result = response.json()
@@ -370,65 +382,37 @@ def transcribe_with_groq(audio_path):
                     error_msg += f": {error_detail['error'].get('message', str(error_detail['error']))}"
             except:
                 pass
-            print(f"[API] Error: {error_msg}")
+            log.warning(f"[API] Error: {error_msg}")
             return None, error_msg
 
     except Exception as e:
-        print(f"[API] Exception: {e}")
+        log.warning(f"[API] Exception: {e}")
         return None, str(e)
 
 
-NUMBER_WORDS = {
-    "zero": "0", "one": "1", "two": "2", "three": "3", "four": "4",
-    "five": "5", "six": "6", "seven": "7", "eight": "8", "nine": "9",
-    "ten": "10", "eleven": "11", "twelve": "12", "thirteen": "13",
-    "fourteen": "14", "fifteen": "15", "sixteen": "16", "seventeen": "17",
-    "eighteen": "18", "nineteen": "19", "twenty": "20", "thirty": "30",
-    "forty": "40", "fifty": "50", "sixty": "60", "seventy": "70",
-    "eighty": "80", "ninety": "90"
-}
-
-
-def convert_numbers(text):
-    if not ACCOUNTING_MODE:
-        return text
-    for word, digit in sorted(NUMBER_WORDS.items(), key=lambda x: -len(x[0])):
-        text = re.sub(rf'(?<![a-zA-Z]){word}(?![a-zA-Z])', digit, text, flags=re.IGNORECASE)
-    return text
+def pipeline_settings():
+    return {
+        "accounting_mode": ACCOUNTING_MODE,
+        "accounting_comma": ACCOUNTING_COMMA,
+        "filter_words": FILTER_WORDS,
+        "casual_mode": CASUAL_MODE,
+    }
 
 
-def filter_text(text):
-    if not text or not FILTER_WORDS:
-        return text.strip() if text else ""
-    text_lower = text.lower().strip()
-    for fw in FILTER_WORDS:
-        if text_lower == fw.lower().strip() or (len(text) < 30 and fw.lower().strip() in text_lower):
-            return ""
-    return text.strip()
+# Same post-processing as the full build, minus the features lite doesn't have
+text_pipeline = TextPipeline(pipeline_settings)
 
 
 def type_text(text):
+    text = text_pipeline.process(text)
     if not text:
         return
     
-    if not ACCOUNTING_COMMA:
-        text = re.sub(r'\b([\d]+),([\d]+)\b', r'\1\2', text)
-    
-    text = convert_numbers(text)
-    text = filter_text(text)
-    if not text:
-        return
-    
-    if CASUAL_MODE:
-        text = text.lower()
-        text = re.sub(r'\.\s', ' ', text)
-        text = re.sub(r'[!]{2,}', '!', text)
-        text = re.sub(r'[?]{2,}', '?', text)
-    
-    print(f"[typing] {text}")
+    log.debug(f"[typing] {text}")
     pyperclip.copy(text)
     time.sleep(0.03)
-    keyboard.press_and_release("ctrl+v")
+    with hotkeys.paused():
+        keyboard.press_and_release("ctrl+v")
 
 
 def record_and_transcribe():
@@ -437,31 +421,24 @@ def record_and_transcribe():
     if widget.hidden:
         widget.root.after(0, widget.show_widget)
     widget.update_status("recording")
-    print("Recording...")
+    log.debug("Recording...")
 
-    try:
-        mic_idx = MIC_INDEX if MIC_INDEX is not None else 0
-        p = pyaudio.PyAudio()
-        
-        chunk = 512
-        stream = p.open(format=pyaudio.paInt16, channels=1, rate=SAMPLE_RATE,
-                       input=True, input_device_index=mic_idx, frames_per_buffer=chunk)
+    if API_KEY:
+        groq_client.warm()
 
-        frames = []
+    try:
+        utterance = audio_engine.begin()
         start_time = time.time()
 
-        while keyboard.is_pressed(HOTKEY):
-            data = stream.read(chunk, exception_on_overflow=False)
-            frames.append(data)
+        # Releasing the key wakes read(), so this stops without waiting for a chunk
+        while hotkeys.is_held(HOTKEY):
+            utterance.read()
 
+        audio_engine.end()
         duration = time.time() - start_time
-        print(f"Recorded {duration:.1f}s")
-
-        stream.stop_stream()
-        stream.close()
-        p.terminate()
+        log.debug(f"Recorded {duration:.1f}s")
 
-        if len(frames) < 10:
+        if utterance.live_count < 10:
             widget.update_status("error", "Too short")
             time.sleep(1)
             widget.root.after(0, widget.hide_widget)
@@ -475,24 +452,25 @@ def record_and_transcribe():
             recording = False
             return
 
-        widget.update_status("processing")
-
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as f:
-            temp_path = f.name
+        if TRIM_SILENCE:
+            speech = find_speech(utterance.pcm(), audio_engine.rate)
+            if speech is None:
+                log.debug("[vad] No speech detected, skipping API call")
+                widget.update_status("error", "No speech")
+                time.sleep(1)
+                widget.root.after(0, widget.hide_widget)
+                recording = False
+                return
+            utterance.buffer.trim(*speech)
 
-        wf = wave.open(temp_path, "wb")
-        wf.setnchannels(1)
-        wf.setsampwidth(p.get_sample_size(pyaudio.paInt16))
-        wf.setframerate(SAMPLE_RATE)
-        wf.writeframes(b"".join(frames))
-        wf.close()
+        widget.update_status("processing")
 
-        text, error = transcribe_with_groq(temp_path)
-        Path(temp_path).unlink(missing_ok=True)
+        encoded = codec_policy.encode(utterance.buffer, groq_client.uplink.throughput)
+        text, error = transcribe_with_groq(encoded)
 
         if text:
             text = text.strip()
-            print(f"[whisper] {text}")
+            log.debug(f"[whisper] {text}")
             widget.update_status("done", text[:30])
             type_text(text)
             time.sleep(1.5)
@@ -503,7 +481,8 @@ def record_and_transcribe():
             widget.root.after(0, widget.hide_widget)
 
     except Exception as e:
-        print(f"Error: {e}")
+        audio_engine.end()
+        log.error(f"Error: {e}")
         widget.update_status("error", str(e)[:20])
         time.sleep(1.5)
         widget.root.after(0, widget.hide_widget)
@@ -516,19 +495,58 @@ def on_hotkey_press():
     global recording
     if not recording:
         recording = True
-        print(f"[hotkey] {HOTKEY} pressed, starting recording...")
+        log.debug(f"[hotkey] {HOTKEY} pressed, starting recording...")
         threading.Thread(target=record_and_transcribe, daemon=True).start()
 
 
+def on_hotkey_release():
+    """Called when hotkey is released: stop the recording loop now."""
+    if audio_engine:
+        audio_engine.wake()
+
+
 def setup_hotkey():
-    """Set up the hotkey hook."""
-    print(f"[hotkey] Setting up hotkey: {HOTKEY}")
-    keyboard.on_press_key(HOTKEY, lambda e: on_hotkey_press())
+    """Hook the hotkey's press and release (no polling)."""
+    log.debug(f"[hotkey] Setting up hotkey: {HOTKEY}")
+    hotkeys.bind(HOTKEY, on_press=on_hotkey_press, on_release=on_hotkey_release)
 
 
-def main():
-    global widget
+def start():
+    """Widget, hotkey and microphone first; returns once the hotkey works."""
+    global widget, audio_engine, groq_client, codec_policy
+
+    widget = FloatingWidget()
+    setup_hotkey()
+
+    # Keep the mic open between presses (chunk 512 keeps latency low on old machines)
+    audio_engine = AudioEngine(device_index=MIC_INDEX, chunk=512, preroll_ms=PREROLL_MS,
+                               mode=CAPTURE_MODE)
+    try:
+        audio_engine.arm()
+    except Exception as e:
+        log.warning(f"[audio] Could not open microphone yet: {e}")
+
+    # httpx is imported and the connection opened by the first ping, in the background
+    groq_client = GroqClient(base_url=API_BASE_URL, verify=API_CA_BUNDLE or True)
+    codec_policy = CodecPolicy(mode=UPLOAD_CODEC)
+
+    print(f"\nReady! Hold {HOTKEY.upper()} to record.")
+    threading.Thread(target=deferred_startup, daemon=True).start()
+
+    # Lite has no tray: the settings window is its control panel (closing it quits)
+    widget.root.after(500, widget.open_settings)
+
+
+def deferred_startup():
+    """Startup work the hotkey doesn't wait for."""
+    if API_KEY:
+        groq_client.warm()
+    groq_client.start_keepalive()
+    text_pipeline.stages()  # Compile the text stages now rather than on the first utterance
+    startup_done.set()
 
+
+def main():
     print("=" * 50)
     print(f"Voice Type Lite v1.2.0 (Hold {HOTKEY.upper()})")
     print("=" * 50)
@@ -538,15 +556,7 @@ def main():
     else:
         print(f"API key loaded")
 
-    widget = FloatingWidget()
-    
-    # Set up hotkey
-    setup_hotkey()
-    
-    print(f"\nReady! Hold {HOTKEY.upper()} to record.")
-
-    # Auto-open settings
-    widget.root.after(500, widget.open_settings)
+    start()
 
     try:
         widget.run()